@@ -0,0 +1,15 @@
+"""
+Import Path Setup for the Flask Grading API
+The Flask server runs from api/ (as a script or through wsgi.py) and shares
+the ml_backend package in py_api/, which is not installed. Import this module
+before anything from ml_backend.
+"""
+
+import sys
+from pathlib import Path
+
+PY_API_DIR = Path(__file__).resolve().parent.parent / "py_api"
+
+# ml_backend.scoring and ml_backend.metrics are pure Python, no extra dependencies
+if str(PY_API_DIR) not in sys.path:
+    sys.path.insert(0, str(PY_API_DIR))
@@ -6,7 +6,11 @@ Replaces RStudio API endpoint with Python implementation
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 import logging
-from grading_logic import predict_coffee_grade
+
+import bootstrap  # noqa: F401  (makes ml_backend importable; keep before the imports below)
+from grading_logic import grade_sample
+from params import PREDICT_PARAMS, ParamError
+from ml_backend.metrics import SampledLogger, instrument_flask
 
 # Configure logging
 logging.basicConfig(
@@ -14,9 +18,12 @@ logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
+# Per-request events are sampled (ML_LOG_SAMPLE_RATE) and formatted lazily
+prediction_log = SampledLogger(logger)
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for frontend requests
+instrument_flask(app)  # Request metrics, served at /metrics
 
 @app.route('/health', methods=['GET'])
 def health_check():
@@ -52,49 +59,34 @@ def predict():
         "secondary_defects": int,
         "total_defects": int
     }
+    
+    Invalid or missing parameters return 400 with every problem listed:
+    {"error": "colors is required; moisture must be a number",
+     "errors": [{"field": "colors", "message": "colors is required"}, ...]}
     """
     try:
-        # Get parameters from query string
-        altitude = request.args.get('altitude', 0)
-        bag_weight = request.args.get('bag_weight', 0)
-        processing_method = request.args.get('processing_method')
-        colors = request.args.get('colors')
-        moisture = request.args.get('moisture')
-        category_one_defects = request.args.get('category_one_defects', 0)
-        category_two_defects = request.args.get('category_two_defects', 0)
-        
-        # Validate required parameters
-        if processing_method is None:
-            return jsonify({'error': 'processing_method is required'}), 400
-        if colors is None:
-            return jsonify({'error': 'colors is required'}), 400
-        if moisture is None:
-            return jsonify({'error': 'moisture is required'}), 400
-        
-        logger.info(f"Prediction request: altitude={altitude}, processing={processing_method}, "
-                   f"colors={colors}, moisture={moisture}, "
-                   f"defects1={category_one_defects}, defects2={category_two_defects}")
+        # All parameters converted and validated in one pass
+        params = PREDICT_PARAMS.parse(request.args)
         
-        # Call prediction function
-        result = predict_coffee_grade(
-            altitude=altitude,
-            bag_weight=bag_weight,
-            processing_method=processing_method,
-            colors=colors,
-            moisture=moisture,
-            category_one_defects=category_one_defects,
-            category_two_defects=category_two_defects
+        result = grade_sample(
+            params['altitude'],
+            params['processing_method'],
+            params['colors'],
+            params['moisture'],
+            params['category_one_defects'],
+            params['category_two_defects']
         )
         
-        logger.info(f"Prediction result: {result['predicted_quality_grade']}")
+        prediction_log.event("prediction", grade=result['predicted_quality_grade'], **params)
         
         return jsonify(result), 200
         
-    except ValueError as e:
-        logger.error(f"Validation error: {str(e)}")
-        return jsonify({'error': str(e)}), 400
+    except ParamError as e:
+        # Sampled: clients sending bad input must not flood the log
+        prediction_log.event("invalid_request", logging.WARNING, errors=e.errors)
+        return jsonify(e.to_dict()), 400
     except Exception as e:
-        logger.error(f"Unexpected error: {str(e)}", exc_info=True)
+        logger.error("Unexpected error: %s", e, exc_info=True)
         return jsonify({'error': 'Internal server error', 'details': str(e)}), 500
 
 @app.errorhandler(404)
@@ -110,7 +102,7 @@ if __name__ == '__main__':
     port = int(os.environ.get('PORT', 7249))
     host = os.environ.get('HOST', '127.0.0.1')
     
-    logger.info(f"Starting Coffee Grading API server on {host}:{port}")
+    logger.info("Starting Coffee Grading API server on %s:%s", host, port)
     app.run(host=host, port=port, debug=False)
 
 
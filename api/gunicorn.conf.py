@@ -0,0 +1,43 @@
+"""
+Gunicorn Settings for the Coffee Grading API (production mode)
+Used by start_api.sh: gunicorn -c gunicorn.conf.py wsgi:app
+
+Grading is CPU-bound pure Python, so throughput scales with worker
+processes (one per core by default). Each worker also runs a few threads,
+which keep idle keep-alive connections and slow clients from tying up a
+whole process. On SIGTERM, workers stop accepting connections and finish
+in-flight requests for up to API_GRACEFUL_TIMEOUT seconds before exiting.
+
+Environment variables:
+    HOST, PORT            Bind address (default 127.0.0.1:7249, as the dev server)
+    API_WORKERS           Worker processes (default: CPU count)
+    API_THREADS           Threads per worker (default 4)
+    API_KEEPALIVE         Seconds an idle keep-alive connection stays open (default 5)
+    API_TIMEOUT           Seconds before a stuck worker is restarted (default 30)
+    API_GRACEFUL_TIMEOUT  Seconds to finish in-flight requests on shutdown (default 30)
+    API_MAX_REQUESTS      Restart a worker after this many requests (default 0: never)
+"""
+
+import os
+
+bind = f"{os.environ.get('HOST', '127.0.0.1')}:{os.environ.get('PORT', '7249')}"
+
+workers = int(os.environ.get('API_WORKERS', os.cpu_count() or 1))
+threads = int(os.environ.get('API_THREADS', 4))
+# Threaded workers also serve keep-alive connections (sync workers close them)
+worker_class = 'gthread'
+
+keepalive = int(os.environ.get('API_KEEPALIVE', 5))
+timeout = int(os.environ.get('API_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('API_GRACEFUL_TIMEOUT', 30))
+
+max_requests = int(os.environ.get('API_MAX_REQUESTS', 0))
+max_requests_jitter = max_requests // 10
+
+# Import the app once in the master; workers fork with it already loaded
+preload_app = True
+
+# Application logs (sampled prediction events) go to stderr; no access log,
+# request counts and latencies are in /metrics
+errorlog = '-'
+loglevel = os.environ.get('API_LOG_LEVEL', 'info')
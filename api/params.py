@@ -0,0 +1,95 @@
+"""
+Query Parameter Parsing for the Coffee Grading API
+A schema lists each parameter's type, default and whether it is required.
+It is compiled once at import into flat per-field steps, so parsing a request
+is a single loop that converts every field and collects all problems instead
+of stopping at the first one.
+
+Conversion follows predict_coffee_grade: an empty altitude or moisture
+counts as 0, and bag_weight is accepted but not used. Error bodies differ from
+the original handler, which reported only the first problem, with Python's
+conversion message ("Invalid input parameter: invalid literal for int() ...").
+Negative defect counts, once accepted and graded, are now rejected.
+"""
+
+from typing import Any, Callable, Dict, List, Mapping, NamedTuple, Optional, Tuple
+
+class Param(NamedTuple):
+    """One query parameter"""
+    name: str
+    kind: type                  # int or float
+    required: bool = False
+    default: Any = 0
+    blank_as_default: bool = False  # '' -> default instead of an error
+    minimum: Optional[float] = None  # smallest accepted value
+
+class ParamError(ValueError):
+    """Raised with every invalid parameter of a request"""
+
+    def __init__(self, errors: List[Dict[str, str]]):
+        self.errors = errors
+        super().__init__("; ".join(e['message'] for e in errors))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Error response body ('error' stays a string for existing clients)"""
+        return {'error': str(self), 'errors': self.errors}
+
+_TYPE_NAMES = {int: 'an integer', float: 'a number'}
+
+# (name, converter, required, default, blank_as_default, message if conversion
+#  fails, minimum, message if below it)
+_Step = Tuple[str, Callable[[str], Any], bool, Any, bool, str, Optional[float], str]
+
+class Schema:
+    """Parameters parsed together in one pass"""
+
+    def __init__(self, *params: Param):
+        self.params = params
+        self._steps: Tuple[_Step, ...] = tuple(
+            (p.name, p.kind, p.required, p.default, p.blank_as_default,
+             f"{p.name} must be {_TYPE_NAMES[p.kind]}",
+             p.minimum, f"{p.name} must be at least {p.minimum}")
+            for p in params
+        )
+
+    def parse(self, args: Mapping[str, str]) -> Dict[str, Any]:
+        """
+        Converted values for every parameter
+
+        Raises:
+            ParamError: Listing each missing or invalid parameter
+        """
+        values: Dict[str, Any] = {}
+        errors: Optional[List[Dict[str, str]]] = None
+        get = args.get
+        for name, convert, required, default, blank_as_default, invalid, minimum, too_small in self._steps:
+            raw = get(name)
+            if raw is None:
+                if required:
+                    errors = errors or []
+                    errors.append({'field': name, 'message': f"{name} is required"})
+                values[name] = default
+            elif blank_as_default and not raw:
+                values[name] = default
+            else:
+                try:
+                    value = values[name] = convert(raw)
+                except ValueError:
+                    errors = errors or []
+                    errors.append({'field': name, 'message': invalid})
+                    continue
+                if minimum is not None and value < minimum:
+                    errors = errors or []
+                    errors.append({'field': name, 'message': too_small})
+        if errors:
+            raise ParamError(errors)
+        return values
+
+PREDICT_PARAMS = Schema(
+    Param('altitude', float, blank_as_default=True),
+    Param('processing_method', int, required=True),
+    Param('colors', int, required=True),
+    Param('moisture', float, required=True, blank_as_default=True),
+    Param('category_one_defects', int, minimum=0),
+    Param('category_two_defects', int, minimum=0)
+)
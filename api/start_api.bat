@@ -1,5 +1,9 @@
 @echo off
 REM Start Coffee Grading API Server (Windows)
+REM
+REM Development only: this runs Flask's built-in (Werkzeug) server. Gunicorn,
+REM which start_api.sh uses in production, does not run on Windows; deploy
+REM the API on Linux (or WSL/Docker) with start_api.sh.
 
 echo Starting Coffee Grading API Server...
 echo.
@@ -20,7 +24,7 @@ if errorlevel 1 (
 )
 
 REM Start the server
-echo Starting server on http://127.0.0.1:7249
+echo Starting development server on http://127.0.0.1:7249 (not for production)
 echo Press Ctrl+C to stop
 echo.
 
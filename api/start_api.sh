@@ -1,5 +1,9 @@
 #!/bin/bash
 # Start Coffee Grading API Server
+#
+# Usage:
+#   ./start_api.sh         production mode: gunicorn (see gunicorn.conf.py for settings)
+#   ./start_api.sh --dev   Flask development server (single process, no keep-alive tuning)
 
 echo "Starting Coffee Grading API Server..."
 echo ""
@@ -11,19 +15,19 @@ if ! command -v python3 &> /dev/null; then
 fi
 
 # Check if dependencies are installed
-if ! python3 -c "import flask" 2>/dev/null; then
+if ! python3 -c "import flask, gunicorn" 2>/dev/null; then
     echo "Installing dependencies..."
     pip install -r requirements.txt
 fi
 
 # Start the server
-echo "Starting server on http://127.0.0.1:7249"
+echo "Starting server on http://${HOST:-127.0.0.1}:${PORT:-7249}"
 echo "Press Ctrl+C to stop"
 echo ""
 
 cd "$(dirname "$0")"
-python3 coffee_grading_api.py
-
-
-
-
+if [ "$1" = "--dev" ]; then
+    exec python3 coffee_grading_api.py
+fi
+# exec, so SIGTERM from the supervisor reaches gunicorn for a graceful shutdown
+exec python3 -m gunicorn -c gunicorn.conf.py wsgi:app
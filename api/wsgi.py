@@ -0,0 +1,11 @@
+"""
+WSGI Entry Point for the Coffee Grading API
+Production servers import the Flask app from here instead of running
+coffee_grading_api.py, whose app.run() starts Werkzeug's development server.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+"""
+
+from coffee_grading_api import app
+
+__all__ = ['app']
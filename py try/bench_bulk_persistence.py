@@ -0,0 +1,225 @@
+"""
+Benchmark: Bulk vs Single-Row Persistence
+Writes synthetic predictions, yield forecasts, grade assessments and
+environmental records twice: one INSERT and commit per row (the path of the
+save_* functions in database_integration_example.py), then with db_bulk's
+batched COPY/execute_values writers. Prints rows per second for each.
+
+Runs against a temporary SQLite stand-in by default. With --postgres it uses
+the DB_* environment variables (see db_pool.py) and a database created from
+database_schema.sql; its rows hang off a throwaway user that is deleted
+(with everything cascading from it) at the end.
+
+Usage (from py try/):
+    python bench_bulk_persistence.py                       # SQLite stand-in
+    python bench_bulk_persistence.py --rows 50000 --single-rows 2000
+    python bench_bulk_persistence.py --postgres --batch-rows 10000
+"""
+
+import argparse
+import random
+import tempfile
+import time
+import uuid
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Tuple
+
+from db_pool import Database, create_sqlite_schema
+from db_bulk import (
+    DEFAULT_BATCH_ROWS, ENVIRONMENTAL_COLUMNS, ENVIRONMENTAL_UPDATE_COLUMNS,
+    GRADE_ASSESSMENT_COLUMNS, PREDICTION_COLUMNS, YIELD_FORECAST_COLUMNS, _row_builder,
+    save_environmental_data_bulk, save_grade_assessments_bulk, save_predictions_bulk,
+    save_yield_forecasts_bulk
+)
+
+GRADES = ('Fine', 'Premium', 'Commercial')
+
+# =====================================================
+# FIXTURES
+# =====================================================
+
+def setup_owner(db: Database, farms: int) -> Tuple[int, List[int], List[int]]:
+    """Throwaway user with farms, one lot each and one harvest per lot"""
+    tag = uuid.uuid4().hex[:12]
+    with db.cursor() as cur:
+        cur.execute("""
+            INSERT INTO users (username, email, password_hash, full_name)
+            VALUES (%s, %s, %s, %s) RETURNING user_id
+        """, (f"bench_{tag}", f"bench_{tag}@example.com", "-", "Benchmark"))
+        user_id = cur.fetchone()[0]
+        farm_ids, harvest_ids = [], []
+        for i in range(farms):
+            cur.execute("""
+                INSERT INTO farms (user_id, farm_name, total_area_hectares)
+                VALUES (%s, %s, %s) RETURNING farm_id
+            """, (user_id, f"Farm {i}", 2.0))
+            farm_ids.append(cur.fetchone()[0])
+            cur.execute("""
+                INSERT INTO coffee_lots (farm_id, lot_name, area_hectares)
+                VALUES (%s, %s, %s) RETURNING lot_id
+            """, (farm_ids[-1], "Lot 1", 2.0))
+            lot_id = cur.fetchone()[0]
+            cur.execute("""
+                INSERT INTO harvests (lot_id, harvest_date, green_beans_kg)
+                VALUES (%s, %s, %s) RETURNING harvest_id
+            """, (lot_id, date(2024, 1, 1), 100.0))
+            harvest_ids.append(cur.fetchone()[0])
+    return user_id, farm_ids, harvest_ids
+
+def predictions(rng: random.Random, farm_ids: List[int], n: int) -> List[Dict[str, Any]]:
+    return [{
+        'farm_id': rng.choice(farm_ids),
+        'input_parameters': {
+            'altitude': rng.randint(300, 1400), 'moisture': round(rng.uniform(9, 14), 1),
+            'primary_defects': rng.randint(0, 5), 'secondary_defects': rng.randint(0, 15)
+        },
+        'predicted_grade': rng.choice(GRADES),
+        'predicted_pns_grade': rng.randint(1, 4),
+        'predicted_defect_pct': round(rng.uniform(0, 20), 2),
+        'predicted_cupping_score': round(rng.uniform(70, 88), 2),
+        'confidence_score': round(rng.random(), 3),
+    } for _ in range(n)]
+
+def forecasts(rng: random.Random, farm_ids: List[int], n: int) -> List[Dict[str, Any]]:
+    rows = []
+    for _ in range(n):
+        years = [{
+            'year': 2025 + y,
+            'yield_kg_per_ha': round(rng.uniform(500, 2500), 1),
+            'fine_probability': round(rng.random(), 3),
+            'premium_probability': round(rng.random(), 3),
+            'commercial_probability': round(rng.random(), 3),
+        } for y in range(5)]
+        rows.append({
+            'farm_id': rng.choice(farm_ids),
+            'forecast_period_years': 5,
+            'plant_age_months': rng.randint(24, 240),
+            'farm_area_ha': round(rng.uniform(0.5, 10), 2),
+            'fertilization_type': rng.choice(('Organic', 'Non-Organic')),
+            'forecast_data': years,
+            'total_yield_kg': round(sum(y['yield_kg_per_ha'] for y in years), 2),
+        })
+    return rows
+
+def assessments(rng: random.Random, harvest_ids: List[int], n: int) -> List[Dict[str, Any]]:
+    return [{
+        'harvest_id': rng.choice(harvest_ids),
+        'primary_defects': rng.randint(0, 5),
+        'secondary_defects': rng.randint(0, 15),
+        'total_defect_pct': round(rng.uniform(0, 20), 2),
+        'coffee_grade': rng.choice(GRADES),
+        'pns_grade': rng.randint(1, 4),
+        'cupping_score': round(rng.uniform(70, 88), 2),
+        'defect_details': {'black': rng.randint(0, 3), 'broken': rng.randint(0, 8)},
+    } for _ in range(n)]
+
+def environmental(rng: random.Random, farm_ids: List[int], n: int,
+                  start: date) -> List[Dict[str, Any]]:
+    # Distinct (farm, month) pairs, so every record is an insert
+    months = -(-n // len(farm_ids))
+    return [{
+        'farm_id': farm_id,
+        'record_date': start + timedelta(days=31 * m),
+        'monthly_temp_avg_c': round(rng.uniform(20, 30), 2),
+        'monthly_rainfall_mm': round(rng.uniform(50, 400), 2),
+        'soil_pH': round(rng.uniform(4.5, 7), 2),
+        'soil_moisture_pct': round(rng.uniform(10, 40), 2),
+    } for m in range(months) for farm_id in farm_ids][:n]
+
+# =====================================================
+# WRITERS
+# =====================================================
+
+def single_row_writer(table: str, columns: Mapping[str, Any], fixed: Mapping[str, Any],
+                      returning: str, upsert: str = '') -> Callable[[Database, Iterable], int]:
+    """One INSERT ... RETURNING and one commit per row, as the save_* functions"""
+    build = _row_builder(columns, fixed)
+    names = tuple(fixed) + tuple(columns)
+    sql = (f"INSERT INTO {table} ({', '.join(names)}) "
+           f"VALUES ({', '.join(['%s'] * len(names))}){upsert} RETURNING {returning}")
+
+    def write(db: Database, records: Iterable) -> int:
+        n = 0
+        for record in records:
+            with db.cursor() as cur:
+                cur.execute(sql, build(record))
+                cur.fetchone()
+            n += 1
+        return n
+    return write
+
+def rate(write: Callable[[], int]) -> float:
+    started = time.perf_counter()
+    n = write()
+    return n / (time.perf_counter() - started)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=20000, help="Rows per table for the bulk path")
+    parser.add_argument('--single-rows', type=int, default=2000,
+                        help="Rows per table for the single-row path (it is much slower)")
+    parser.add_argument('--batch-rows', type=int, default=DEFAULT_BATCH_ROWS)
+    parser.add_argument('--farms', type=int, default=200)
+    parser.add_argument('--postgres', action='store_true', help="Use DB_* settings instead of SQLite")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    tmp = None
+    if args.postgres:
+        db = Database.from_config()
+    else:
+        tmp = tempfile.TemporaryDirectory()
+        db = Database.sqlite(Path(tmp.name) / 'bench.db')
+        create_sqlite_schema(db)
+
+    rng = random.Random(args.seed)
+    user_id, farm_ids, harvest_ids = setup_owner(db, args.farms)
+    env_upsert = (" ON CONFLICT (farm_id, record_date) DO UPDATE SET "
+                  + ', '.join(f"{c} = EXCLUDED.{c}" for c in ENVIRONMENTAL_UPDATE_COLUMNS))
+    forecast_columns = dict(YIELD_FORECAST_COLUMNS, base_year=date.today().year)
+    # Separate date ranges, so the bulk records do not update the single-row ones
+    env_starts = iter([date(1900, 1, 1), date(1960, 1, 1)])
+    assessment_columns = dict(GRADE_ASSESSMENT_COLUMNS, assessment_date=date.today())
+
+    cases = [
+        ('predictions',
+         lambda n: predictions(rng, farm_ids, n),
+         single_row_writer('predictions', PREDICTION_COLUMNS, {'user_id': user_id}, 'prediction_id'),
+         lambda rows: save_predictions_bulk(db, user_id, rows, args.batch_rows)),
+        ('yield_forecasts',
+         lambda n: forecasts(rng, farm_ids, n),
+         single_row_writer('yield_forecasts', forecast_columns, {'user_id': user_id}, 'forecast_id'),
+         lambda rows: save_yield_forecasts_bulk(db, user_id, rows, args.batch_rows)),
+        ('grade_assessments',
+         lambda n: assessments(rng, harvest_ids, n),
+         single_row_writer('grade_assessments', assessment_columns, {'assessed_by': user_id},
+                           'assessment_id'),
+         # Throwaway rows, deleted at the end: no dashboard to invalidate
+         lambda rows: save_grade_assessments_bulk(db, rows, user_id, args.batch_rows, cache=None)),
+        ('environmental_data',
+         lambda n: environmental(rng, farm_ids, n, next(env_starts)),
+         single_row_writer('environmental_data', ENVIRONMENTAL_COLUMNS, {'recorded_by': user_id},
+                           'env_id', env_upsert),
+         lambda rows: save_environmental_data_bulk(db, rows, user_id, args.batch_rows)),
+    ]
+
+    print(f"backend: {db.backend}, bulk rows: {args.rows}, single rows: {args.single_rows}, "
+          f"batch rows: {args.batch_rows}")
+    print(f"{'table':<20} {'single rows/s':>14} {'bulk rows/s':>12} {'speedup':>8}")
+    try:
+        for table, make, single, bulk in cases:
+            single_rows, bulk_rows = make(args.single_rows), make(args.rows)
+            single_rate = rate(lambda: single(db, single_rows))
+            bulk_rate = rate(lambda: bulk(bulk_rows))
+            print(f"{table:<20} {single_rate:>14,.0f} {bulk_rate:>12,.0f} {bulk_rate / single_rate:>7.1f}x")
+    finally:
+        with db.cursor() as cur:
+            # Cascades to farms, lots, harvests, assessments, predictions, forecasts
+            cur.execute("DELETE FROM users WHERE user_id = %s", (user_id,))
+        db.close()
+        if tmp is not None:
+            tmp.cleanup()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Cached Dashboard Aggregates for the Robusta Coffee Dashboard
+Streamlit reruns the whole script on every widget interaction, and each run
+would repeat the aggregate queries behind get_dashboard_summary and
+get_grade_distribution over the user's whole harvest history. DashboardCache
+keeps their results per user for a TTL and drops them as soon as one of the
+user's harvests or assessments is written (write-through invalidation), so a
+render after a write always shows it. Every writer of farms, lots, harvests or
+assessments must invalidate: the single-row functions in
+database_integration_example.py do, and db_bulk.save_grade_assessments_bulk
+requires the cache as an argument.
+
+The cache lives in the Streamlit server process (create it with
+@st.cache_resource) and is shared by all sessions. With several server
+processes, a write is visible at once in the process that made it and
+within the TTL in the others.
+
+Usage:
+    cache = DashboardCache(ttl=60)
+    summary = cache.get_or_compute(user_id, 'dashboard_summary', compute)
+    ...
+    cache.invalidate(user_id)      # after the write has committed
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+class DashboardCache:
+    """
+    Per-user TTL cache for aggregate query results
+
+    Args:
+        ttl: Seconds a result stays fresh
+    """
+
+    def __init__(self, ttl: float = 60.0):
+        self.ttl = ttl
+        # user_id -> {name: (expires_at, value)}
+        self._entries: Dict[Hashable, Dict[str, Tuple[float, Any]]] = {}
+        # user_id -> invalidation count, so a result computed before a write
+        # that committed meanwhile is not stored
+        self._generations: Dict[Hashable, int] = {}
+        self._epoch = 0                 # bumped by clear()
+        self._lock = threading.Lock()
+        self._counts = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
+    def get_or_compute(self, user_id: Hashable, name: str, compute: Callable[[], Any]) -> Any:
+        """
+        Cached result of compute() for this user, computing it when missing or stale
+
+        Exceptions from compute() propagate and nothing is cached.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id, {}).get(name)
+            if entry is not None and entry[0] > now:
+                self._counts['hits'] += 1
+                return entry[1]
+            self._counts['misses'] += 1
+            generation = (self._epoch, self._generations.get(user_id, 0))
+
+        # Outside the lock: other users' renders do not wait on this query
+        value = compute()
+
+        with self._lock:
+            if (self._epoch, self._generations.get(user_id, 0)) == generation:
+                self._entries.setdefault(user_id, {})[name] = (time.monotonic() + self.ttl, value)
+        return value
+
+    def invalidate(self, user_id: Hashable):
+        """Drop every cached result of a user (call after the write commits)"""
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            self._counts['invalidations'] += 1
+
+    def clear(self):
+        """Drop everything"""
+        with self._lock:
+            self._epoch += 1
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit, miss and invalidation counts and the number of cached users"""
+        with self._lock:
+            return dict(self._counts, users=len(self._entries), ttl=self.ttl)
@@ -1,36 +1,39 @@
 """
 Database Integration Example for Robusta Coffee Dashboard
 This file shows how to integrate the database schema with the Streamlit app
+
+Connections come from the pool in db_pool.py: each function checks one out
+for a single transaction and returns it, so sessions no longer share (and
+close) one cached connection.
 """
 
 import streamlit as st
-import psycopg2
-from psycopg2.extras import RealDictCursor
 import json
 import bcrypt
 from datetime import datetime, date
 import pandas as pd
 
+from db_pool import Database
+from dashboard_cache import DashboardCache
+
 # =====================================================
 # DATABASE CONNECTION
 # =====================================================
 
 @st.cache_resource
-def get_db_connection():
-    """Create database connection - cached for performance"""
+def get_db():
+    """Create the connection pool - one per server process, shared by all sessions"""
     try:
-        conn = psycopg2.connect(
-            host=st.secrets["DB_HOST"],
-            database=st.secrets["DB_NAME"],
-            user=st.secrets["DB_USER"],
-            password=st.secrets["DB_PASSWORD"],
-            port=st.secrets.get("DB_PORT", 5432)
-        )
-        return conn
+        return Database.from_config(st.secrets)
     except Exception as e:
         st.error(f"Database connection error: {e}")
         return None
 
+@st.cache_resource
+def get_dashboard_cache():
+    """Dashboard aggregates per user, shared by all sessions"""
+    return DashboardCache(ttl=float(st.secrets.get("DASHBOARD_CACHE_TTL", 60)))
+
 # =====================================================
 # AUTHENTICATION FUNCTIONS
 # =====================================================
@@ -48,70 +51,56 @@ def verify_password(password, hashed):
 
 def authenticate_user(username, password):
     """Authenticate user and return user data"""
-    conn = get_db_connection()
-    if not conn:
+    db = get_db()
+    if not db:
         return None
     
     try:
-        cur = conn.cursor(cursor_factory=RealDictCursor)
-        cur.execute("""
-            SELECT user_id, username, password_hash, full_name, email, is_active
-            FROM users
-            WHERE username = %s AND is_active = TRUE
-        """, (username,))
-        
-        user = cur.fetchone()
-        cur.close()
-        
-        if user and verify_password(password, user['password_hash']):
-            # Update last login
-            cur = conn.cursor()
+        with db.cursor(dict_rows=True) as cur:
             cur.execute("""
-                UPDATE users SET last_login = %s WHERE user_id = %s
-            """, (datetime.now(), user['user_id']))
-            conn.commit()
-            cur.close()
-            conn.close()
-            return dict(user)
+                SELECT user_id, username, password_hash, full_name, email, is_active
+                FROM users
+                WHERE username = %s AND is_active = TRUE
+            """, (username,))
+            
+            user = cur.fetchone()
+            
+            if user and verify_password(password, user['password_hash']):
+                # Update last login
+                cur.execute("""
+                    UPDATE users SET last_login = %s WHERE user_id = %s
+                """, (datetime.now(), user['user_id']))
+                return dict(user)
         
-        conn.close()
         return None
     except Exception as e:
         st.error(f"Authentication error: {e}")
-        conn.close()
         return None
 
 def register_user(username, email, password, full_name, phone_number=None):
     """Register a new user"""
-    conn = get_db_connection()
-    if not conn:
+    db = get_db()
+    if not db:
         return None
     
     try:
         password_hash = hash_password(password)
-        cur = conn.cursor()
-        cur.execute("""
-            INSERT INTO users (username, email, password_hash, full_name, phone_number)
-            VALUES (%s, %s, %s, %s, %s)
-            RETURNING user_id, username, full_name
-        """, (username, email, password_hash, full_name, phone_number))
-        
-        user = cur.fetchone()
-        conn.commit()
-        cur.close()
-        conn.close()
+        with db.cursor() as cur:
+            cur.execute("""
+                INSERT INTO users (username, email, password_hash, full_name, phone_number)
+                VALUES (%s, %s, %s, %s, %s)
+                RETURNING user_id, username, full_name
+            """, (username, email, password_hash, full_name, phone_number))
+            
+            user = cur.fetchone()
         return {'user_id': user[0], 'username': user[1], 'full_name': user[2]}
-    except psycopg2.IntegrityError as e:
-        conn.rollback()
-        conn.close()
+    except db.IntegrityError as e:
         if 'username' in str(e):
             raise ValueError("Username already exists")
         elif 'email' in str(e):
             raise ValueError("Email already exists")
         raise ValueError("Registration failed")
     except Exception as e:
-        conn.rollback()
-        conn.close()
         raise ValueError(f"Registration error: {e}")
 
 # =====================================================
@@ -120,89 +109,79 @@ def register_user(username, email, password, full_name, phone_number=None):
 
 def get_user_farms(user_id):
     """Get all farms for a user"""
-    conn = get_db_connection()
-    if not conn:
+    db = get_db()
+    if not db:
         return []
     
     try:
-        cur = conn.cursor(cursor_factory=RealDictCursor)
-        cur.execute("""
-            SELECT farm_id, farm_name, total_area_hectares, elevation_masl,
-                   location_province, location_municipality, location_barangay
-            FROM farms
-            WHERE user_id = %s AND is_active = TRUE
-            ORDER BY farm_name
-        """, (user_id,))
-        
-        farms = cur.fetchall()
-        cur.close()
-        conn.close()
+        with db.cursor(dict_rows=True) as cur:
+            cur.execute("""
+                SELECT farm_id, farm_name, total_area_hectares, elevation_masl,
+                       location_province, location_municipality, location_barangay
+                FROM farms
+                WHERE user_id = %s AND is_active = TRUE
+                ORDER BY farm_name
+            """, (user_id,))
+            
+            farms = cur.fetchall()
         return [dict(farm) for farm in farms]
     except Exception as e:
         st.error(f"Error fetching farms: {e}")
-        conn.close()
         return []
 
 def create_farm(user_id, farm_data):
     """Create a new farm"""
-    conn = get_db_connection()
-    if not conn:
+    db = get_db()
+    if not db:
         return None
     
     try:
-        cur = conn.cursor()
-        cur.execute("""
-            INSERT INTO farms (
-                user_id, farm_name, location_province, location_municipality,
-                location_barangay, total_area_hectares, elevation_masl,
-                established_date, notes
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-            RETURNING farm_id
-        """, (
-            user_id,
-            farm_data['farm_name'],
-            farm_data.get('location_province'),
-            farm_data.get('location_municipality'),
-            farm_data.get('location_barangay'),
-            farm_data['total_area_hectares'],
-            farm_data.get('elevation_masl'),
-            farm_data.get('established_date'),
-            farm_data.get('notes')
-        ))
-        
-        farm_id = cur.fetchone()[0]
-        conn.commit()
-        cur.close()
-        conn.close()
+        with db.cursor() as cur:
+            cur.execute("""
+                INSERT INTO farms (
+                    user_id, farm_name, location_province, location_municipality,
+                    location_barangay, total_area_hectares, elevation_masl,
+                    established_date, notes
+                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+                RETURNING farm_id
+            """, (
+                user_id,
+                farm_data['farm_name'],
+                farm_data.get('location_province'),
+                farm_data.get('location_municipality'),
+                farm_data.get('location_barangay'),
+                farm_data['total_area_hectares'],
+                farm_data.get('elevation_masl'),
+                farm_data.get('established_date'),
+                farm_data.get('notes')
+            ))
+            
+            farm_id = cur.fetchone()[0]
+        get_dashboard_cache().invalidate(user_id)
         return farm_id
     except Exception as e:
-        conn.rollback()
-        conn.close()
         st.error(f"Error creating farm: {e}")
         return None
 
 def get_farm_lots(farm_id):
     """Get all coffee lots for a farm"""
-    conn = get_db_connection()
-    if not conn:
+    db = get_db()
+    if not db:
         return []
     
     try:
-        cur = conn.cursor(cursor_factory=RealDictCursor)
-        cur.execute("""
-            SELECT lot_id, lot_name, area_hectares, planting_date, variety, total_plants
-            FROM coffee_lots
-            WHERE farm_id = %s AND is_active = TRUE
-            ORDER BY lot_name
-        """, (farm_id,))
-        
-        lots = cur.fetchall()
-        cur.close()
-        conn.close()
+        with db.cursor(dict_rows=True) as cur:
+            cur.execute("""
+                SELECT lot_id, lot_name, area_hectares, planting_date, variety, total_plants
+                FROM coffee_lots
+                WHERE farm_id = %s AND is_active = TRUE
+                ORDER BY lot_name
+            """, (farm_id,))
+            
+            lots = cur.fetchall()
         return [dict(lot) for lot in lots]
     except Exception as e:
         st.error(f"Error fetching lots: {e}")
-        conn.close()
         return []
 
 # =====================================================
@@ -211,228 +190,288 @@ def get_farm_lots(farm_id):
 
 def create_harvest(lot_id, harvest_data):
     """Create a new harvest record"""
-    conn = get_db_connection()
-    if not conn:
+    db = get_db()
+    if not db:
         return None
     
     try:
-        cur = conn.cursor()
-        cur.execute("""
-            INSERT INTO harvests (
-                lot_id, harvest_date, harvest_season, harvest_method,
-                cherries_harvested_kg, green_beans_kg, processing_method,
-                moisture_content_pct, notes, harvested_by
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            RETURNING harvest_id
-        """, (
-            lot_id,
-            harvest_data['harvest_date'],
-            harvest_data.get('harvest_season'),
-            harvest_data.get('harvest_method'),
-            harvest_data.get('cherries_harvested_kg'),
-            harvest_data.get('green_beans_kg'),
-            harvest_data.get('processing_method'),
-            harvest_data.get('moisture_content_pct'),
-            harvest_data.get('notes'),
-            st.session_state.get('user_id')
-        ))
-        
-        harvest_id = cur.fetchone()[0]
-        conn.commit()
-        cur.close()
-        conn.close()
+        with db.cursor() as cur:
+            cur.execute("""
+                INSERT INTO harvests (
+                    lot_id, harvest_date, harvest_season, harvest_method,
+                    cherries_harvested_kg, green_beans_kg, processing_method,
+                    moisture_content_pct, notes, harvested_by
+                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                RETURNING harvest_id
+            """, (
+                lot_id,
+                harvest_data['harvest_date'],
+                harvest_data.get('harvest_season'),
+                harvest_data.get('harvest_method'),
+                harvest_data.get('cherries_harvested_kg'),
+                harvest_data.get('green_beans_kg'),
+                harvest_data.get('processing_method'),
+                harvest_data.get('moisture_content_pct'),
+                harvest_data.get('notes'),
+                st.session_state.get('user_id')
+            ))
+            
+            harvest_id = cur.fetchone()[0]
+            
+            # Owner of the lot, whose dashboard totals just changed
+            cur.execute("""
+                SELECT f.user_id
+                FROM coffee_lots cl
+                JOIN farms f ON cl.farm_id = f.farm_id
+                WHERE cl.lot_id = %s
+            """, (lot_id,))
+            owner_id = cur.fetchone()[0]
+        # After the commit, so no render can cache the totals without this harvest
+        get_dashboard_cache().invalidate(owner_id)
         return harvest_id
     except Exception as e:
-        conn.rollback()
-        conn.close()
         st.error(f"Error creating harvest: {e}")
         return None
 
 def save_grade_assessment(harvest_id, assessment_data):
     """Save grade assessment to database"""
-    conn = get_db_connection()
-    if not conn:
+    db = get_db()
+    if not db:
         return None
     
     try:
-        cur = conn.cursor()
-        cur.execute("""
-            INSERT INTO grade_assessments (
-                harvest_id, assessment_date, sample_weight_g,
-                primary_defects, secondary_defects, total_defect_count,
-                total_defect_pct, bean_screen_size_mm, bean_size_class,
-                pns_grade, coffee_grade, cupping_score,
-                climate_suitability_robusta, soil_suitability_robusta,
-                moisture_suitability, overall_quality_index,
-                environmental_stress_index, defect_details, assessed_by
-            ) VALUES (
-                %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
-            )
-            RETURNING assessment_id
-        """, (
-            harvest_id,
-            assessment_data.get('assessment_date', date.today()),
-            assessment_data.get('sample_weight_g', 350.0),
-            assessment_data.get('primary_defects', 0),
-            assessment_data.get('secondary_defects', 0),
-            assessment_data.get('total_defect_count', 0),
-            assessment_data.get('total_defect_pct', 0.0),
-            assessment_data.get('bean_screen_size_mm'),
-            assessment_data.get('bean_size_class'),
-            assessment_data.get('pns_grade'),
-            assessment_data.get('coffee_grade'),
-            assessment_data.get('cupping_score'),
-            assessment_data.get('climate_suitability_robusta'),
-            assessment_data.get('soil_suitability_robusta'),
-            assessment_data.get('moisture_suitability'),
-            assessment_data.get('overall_quality_index'),
-            assessment_data.get('environmental_stress_index'),
-            json.dumps(assessment_data.get('defect_details', {})),
-            st.session_state.get('user_id')
-        ))
-        
-        assessment_id = cur.fetchone()[0]
-        conn.commit()
-        cur.close()
-        conn.close()
+        with db.cursor() as cur:
+            cur.execute("""
+                INSERT INTO grade_assessments (
+                    harvest_id, assessment_date, sample_weight_g,
+                    primary_defects, secondary_defects, total_defect_count,
+                    total_defect_pct, bean_screen_size_mm, bean_size_class,
+                    pns_grade, coffee_grade, cupping_score,
+                    climate_suitability_robusta, soil_suitability_robusta,
+                    moisture_suitability, overall_quality_index,
+                    environmental_stress_index, defect_details, assessed_by
+                ) VALUES (
+                    %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
+                )
+                RETURNING assessment_id
+            """, (
+                harvest_id,
+                assessment_data.get('assessment_date', date.today()),
+                assessment_data.get('sample_weight_g', 350.0),
+                assessment_data.get('primary_defects', 0),
+                assessment_data.get('secondary_defects', 0),
+                assessment_data.get('total_defect_count', 0),
+                assessment_data.get('total_defect_pct', 0.0),
+                assessment_data.get('bean_screen_size_mm'),
+                assessment_data.get('bean_size_class'),
+                assessment_data.get('pns_grade'),
+                assessment_data.get('coffee_grade'),
+                assessment_data.get('cupping_score'),
+                assessment_data.get('climate_suitability_robusta'),
+                assessment_data.get('soil_suitability_robusta'),
+                assessment_data.get('moisture_suitability'),
+                assessment_data.get('overall_quality_index'),
+                assessment_data.get('environmental_stress_index'),
+                json.dumps(assessment_data.get('defect_details', {})),
+                st.session_state.get('user_id')
+            ))
+            
+            assessment_id = cur.fetchone()[0]
+            
+            cur.execute("""
+                SELECT f.user_id
+                FROM harvests h
+                JOIN coffee_lots cl ON h.lot_id = cl.lot_id
+                JOIN farms f ON cl.farm_id = f.farm_id
+                WHERE h.harvest_id = %s
+            """, (harvest_id,))
+            owner_id = cur.fetchone()[0]
+        get_dashboard_cache().invalidate(owner_id)
         return assessment_id
     except Exception as e:
-        conn.rollback()
-        conn.close()
         st.error(f"Error saving assessment: {e}")
         return None
 
+USER_HARVESTS_SQL = """
+    SELECT 
+        h.harvest_id, h.harvest_date, h.green_beans_kg,
+        f.farm_name, cl.lot_name,
+        ga.assessment_id, ga.coffee_grade, ga.pns_grade, ga.cupping_score,
+        ga.total_defect_pct, ga.bean_size_class
+    FROM harvests h
+    JOIN coffee_lots cl ON h.lot_id = cl.lot_id
+    JOIN farms f ON cl.farm_id = f.farm_id
+    LEFT JOIN grade_assessments ga ON h.harvest_id = ga.harvest_id
+    WHERE f.user_id = %s
+"""
+# A harvest may have several assessments (one row each) or none (one row with
+# NULLs), so rows are unique only by (harvest_date, harvest_id, assessment).
+# A missing assessment sorts as 0, after the harvest's real assessment ids.
+USER_HARVESTS_ROW_KEY = "(h.harvest_date, h.harvest_id, COALESCE(ga.assessment_id, 0))"
+# Newest first, a total order, so pages are stable
+USER_HARVESTS_ORDER = " ORDER BY h.harvest_date DESC, h.harvest_id DESC, COALESCE(ga.assessment_id, 0) DESC"
+
 def get_user_harvests(user_id, limit=20):
     """Get recent harvests for a user"""
-    conn = get_db_connection()
-    if not conn:
+    db = get_db()
+    if not db:
         return []
     
     try:
-        cur = conn.cursor(cursor_factory=RealDictCursor)
-        cur.execute("""
-            SELECT 
-                h.harvest_id, h.harvest_date, h.green_beans_kg,
-                f.farm_name, cl.lot_name,
-                ga.coffee_grade, ga.pns_grade, ga.cupping_score,
-                ga.total_defect_pct, ga.bean_size_class
-            FROM harvests h
-            JOIN coffee_lots cl ON h.lot_id = cl.lot_id
-            JOIN farms f ON cl.farm_id = f.farm_id
-            LEFT JOIN grade_assessments ga ON h.harvest_id = ga.harvest_id
-            WHERE f.user_id = %s
-            ORDER BY h.harvest_date DESC
-            LIMIT %s
-        """, (user_id, limit))
-        
-        harvests = cur.fetchall()
-        cur.close()
-        conn.close()
+        with db.cursor(dict_rows=True) as cur:
+            cur.execute(USER_HARVESTS_SQL + USER_HARVESTS_ORDER + " LIMIT %s", (user_id, limit))
+            
+            harvests = cur.fetchall()
         return [dict(h) for h in harvests]
     except Exception as e:
         st.error(f"Error fetching harvests: {e}")
-        conn.close()
         return []
 
+def get_user_harvests_page(user_id, limit=20, after=None):
+    """
+    Get one page of a user's harvests, newest first (keyset pagination)
+    
+    Each page seeks past the last row of the previous one instead of
+    skipping rows with OFFSET, so page 500 costs the same as page 1. A
+    harvest with several assessments may be split across pages.
+    
+    Args:
+        after: next_key returned with the previous page (None for the first)
+    
+    Returns:
+        (harvests, next_key); next_key is None on the last page
+    """
+    db = get_db()
+    if not db:
+        return [], None
+    
+    sql, params = USER_HARVESTS_SQL, [user_id]
+    if after is not None:
+        sql += f" AND {USER_HARVESTS_ROW_KEY} < (%s, %s, %s)"
+        params += list(after)
+    
+    try:
+        with db.cursor(dict_rows=True) as cur:
+            # One extra row tells whether another page follows
+            cur.execute(sql + USER_HARVESTS_ORDER + " LIMIT %s", params + [limit + 1])
+            
+            harvests = cur.fetchall()
+    except Exception as e:
+        st.error(f"Error fetching harvests: {e}")
+        return [], None
+    
+    if len(harvests) <= limit:
+        return harvests, None
+    harvests = harvests[:limit]
+    last = harvests[-1]
+    return harvests, (last['harvest_date'], last['harvest_id'], last['assessment_id'] or 0)
+
+def iter_user_harvests(user_id, batch_size=500):
+    """
+    Stream all of a user's harvests, newest first, as lists of up to batch_size rows
+    
+    A server-side cursor sends one batch per round trip, so exports of long
+    histories never hold more than one batch in memory. The connection stays
+    checked out until the loop finishes.
+    """
+    db = get_db()
+    if not db:
+        return
+    
+    try:
+        yield from db.stream(USER_HARVESTS_SQL + USER_HARVESTS_ORDER, (user_id,), batch_size)
+    except Exception as e:
+        st.error(f"Error fetching harvests: {e}")
+
 # =====================================================
 # PREDICTION & FORECAST FUNCTIONS
 # =====================================================
 
 def save_prediction(user_id, prediction_data):
     """Save prediction to database"""
-    conn = get_db_connection()
-    if not conn:
+    db = get_db()
+    if not db:
         return None
     
     try:
-        cur = conn.cursor()
-        cur.execute("""
-            INSERT INTO predictions (
-                user_id, farm_id, lot_id, prediction_type,
-                input_parameters, predicted_grade, predicted_pns_grade,
-                predicted_defect_pct, predicted_cupping_score,
-                confidence_score, model_name, model_version, notes
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            RETURNING prediction_id
-        """, (
-            user_id,
-            prediction_data.get('farm_id'),
-            prediction_data.get('lot_id'),
-            prediction_data.get('prediction_type', 'grade_prediction'),
-            json.dumps(prediction_data.get('input_parameters', {})),
-            prediction_data.get('predicted_grade'),
-            prediction_data.get('predicted_pns_grade'),
-            prediction_data.get('predicted_defect_pct'),
-            prediction_data.get('predicted_cupping_score'),
-            prediction_data.get('confidence_score', 0.0),
-            prediction_data.get('model_name', 'RandomForest'),
-            prediction_data.get('model_version', '1.0'),
-            prediction_data.get('notes')
-        ))
-        
-        prediction_id = cur.fetchone()[0]
-        conn.commit()
-        cur.close()
-        conn.close()
+        with db.cursor() as cur:
+            cur.execute("""
+                INSERT INTO predictions (
+                    user_id, farm_id, lot_id, prediction_type,
+                    input_parameters, predicted_grade, predicted_pns_grade,
+                    predicted_defect_pct, predicted_cupping_score,
+                    confidence_score, model_name, model_version, notes
+                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                RETURNING prediction_id
+            """, (
+                user_id,
+                prediction_data.get('farm_id'),
+                prediction_data.get('lot_id'),
+                prediction_data.get('prediction_type', 'grade_prediction'),
+                json.dumps(prediction_data.get('input_parameters', {})),
+                prediction_data.get('predicted_grade'),
+                prediction_data.get('predicted_pns_grade'),
+                prediction_data.get('predicted_defect_pct'),
+                prediction_data.get('predicted_cupping_score'),
+                prediction_data.get('confidence_score', 0.0),
+                prediction_data.get('model_name', 'RandomForest'),
+                prediction_data.get('model_version', '1.0'),
+                prediction_data.get('notes')
+            ))
+            
+            prediction_id = cur.fetchone()[0]
         return prediction_id
     except Exception as e:
-        conn.rollback()
-        conn.close()
         st.error(f"Error saving prediction: {e}")
         return None
 
 def save_yield_forecast(user_id, forecast_data):
     """Save yield forecast to database"""
-    conn = get_db_connection()
-    if not conn:
+    db = get_db()
+    if not db:
         return None
     
     try:
-        cur = conn.cursor()
-        cur.execute("""
-            INSERT INTO yield_forecasts (
-                user_id, farm_id, lot_id, forecast_period_years, base_year,
-                plant_age_months, farm_area_ha, fertilization_type,
-                fertilization_frequency, pest_management_frequency,
-                climate_suitability, soil_suitability, overall_quality_index,
-                forecast_data, total_yield_kg, avg_yield_per_year_kg_ha,
-                avg_fine_probability, avg_premium_probability,
-                avg_commercial_probability, notes
-            ) VALUES (
-                %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
-            )
-            RETURNING forecast_id
-        """, (
-            user_id,
-            forecast_data.get('farm_id'),
-            forecast_data.get('lot_id'),
-            forecast_data.get('forecast_period_years'),
-            forecast_data.get('base_year', datetime.now().year),
-            forecast_data.get('plant_age_months'),
-            forecast_data.get('farm_area_ha'),
-            forecast_data.get('fertilization_type'),
-            forecast_data.get('fertilization_frequency'),
-            forecast_data.get('pest_management_frequency'),
-            forecast_data.get('climate_suitability'),
-            forecast_data.get('soil_suitability'),
-            forecast_data.get('overall_quality_index'),
-            json.dumps(forecast_data.get('forecast_data', [])),
-            forecast_data.get('total_yield_kg'),
-            forecast_data.get('avg_yield_per_year_kg_ha'),
-            forecast_data.get('avg_fine_probability'),
-            forecast_data.get('avg_premium_probability'),
-            forecast_data.get('avg_commercial_probability'),
-            forecast_data.get('notes')
-        ))
-        
-        forecast_id = cur.fetchone()[0]
-        conn.commit()
-        cur.close()
-        conn.close()
+        with db.cursor() as cur:
+            cur.execute("""
+                INSERT INTO yield_forecasts (
+                    user_id, farm_id, lot_id, forecast_period_years, base_year,
+                    plant_age_months, farm_area_ha, fertilization_type,
+                    fertilization_frequency, pest_management_frequency,
+                    climate_suitability, soil_suitability, overall_quality_index,
+                    forecast_data, total_yield_kg, avg_yield_per_year_kg_ha,
+                    avg_fine_probability, avg_premium_probability,
+                    avg_commercial_probability, notes
+                ) VALUES (
+                    %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
+                )
+                RETURNING forecast_id
+            """, (
+                user_id,
+                forecast_data.get('farm_id'),
+                forecast_data.get('lot_id'),
+                forecast_data.get('forecast_period_years'),
+                forecast_data.get('base_year', datetime.now().year),
+                forecast_data.get('plant_age_months'),
+                forecast_data.get('farm_area_ha'),
+                forecast_data.get('fertilization_type'),
+                forecast_data.get('fertilization_frequency'),
+                forecast_data.get('pest_management_frequency'),
+                forecast_data.get('climate_suitability'),
+                forecast_data.get('soil_suitability'),
+                forecast_data.get('overall_quality_index'),
+                json.dumps(forecast_data.get('forecast_data', [])),
+                forecast_data.get('total_yield_kg'),
+                forecast_data.get('avg_yield_per_year_kg_ha'),
+                forecast_data.get('avg_fine_probability'),
+                forecast_data.get('avg_premium_probability'),
+                forecast_data.get('avg_commercial_probability'),
+                forecast_data.get('notes')
+            ))
+            
+            forecast_id = cur.fetchone()[0]
         return forecast_id
     except Exception as e:
-        conn.rollback()
-        conn.close()
         st.error(f"Error saving forecast: {e}")
         return None
 
@@ -442,90 +481,125 @@ def save_yield_forecast(user_id, forecast_data):
 
 def save_environmental_data(farm_id, env_data):
     """Save environmental data for a farm"""
-    conn = get_db_connection()
-    if not conn:
+    db = get_db()
+    if not db:
         return None
     
     try:
-        cur = conn.cursor()
-        cur.execute("""
-            INSERT INTO environmental_data (
-                farm_id, record_date, monthly_temp_avg_c, monthly_temp_min_c,
-                monthly_temp_max_c, monthly_rainfall_mm, relative_humidity_pct,
-                soil_pH, soil_moisture_pct, soil_organic_matter_pct,
-                recorded_by
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            ON CONFLICT (farm_id, record_date) 
-            DO UPDATE SET
-                monthly_temp_avg_c = EXCLUDED.monthly_temp_avg_c,
-                monthly_rainfall_mm = EXCLUDED.monthly_rainfall_mm,
-                soil_pH = EXCLUDED.soil_pH,
-                soil_moisture_pct = EXCLUDED.soil_moisture_pct
-            RETURNING env_id
-        """, (
-            farm_id,
-            env_data['record_date'],
-            env_data.get('monthly_temp_avg_c'),
-            env_data.get('monthly_temp_min_c'),
-            env_data.get('monthly_temp_max_c'),
-            env_data.get('monthly_rainfall_mm'),
-            env_data.get('relative_humidity_pct'),
-            env_data.get('soil_pH'),
-            env_data.get('soil_moisture_pct'),
-            env_data.get('soil_organic_matter_pct'),
-            st.session_state.get('user_id')
-        ))
-        
-        env_id = cur.fetchone()[0]
-        conn.commit()
-        cur.close()
-        conn.close()
+        with db.cursor() as cur:
+            cur.execute("""
+                INSERT INTO environmental_data (
+                    farm_id, record_date, monthly_temp_avg_c, monthly_temp_min_c,
+                    monthly_temp_max_c, monthly_rainfall_mm, relative_humidity_pct,
+                    soil_pH, soil_moisture_pct, soil_organic_matter_pct,
+                    recorded_by
+                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                ON CONFLICT (farm_id, record_date) 
+                DO UPDATE SET
+                    monthly_temp_avg_c = EXCLUDED.monthly_temp_avg_c,
+                    monthly_rainfall_mm = EXCLUDED.monthly_rainfall_mm,
+                    soil_pH = EXCLUDED.soil_pH,
+                    soil_moisture_pct = EXCLUDED.soil_moisture_pct
+                RETURNING env_id
+            """, (
+                farm_id,
+                env_data['record_date'],
+                env_data.get('monthly_temp_avg_c'),
+                env_data.get('monthly_temp_min_c'),
+                env_data.get('monthly_temp_max_c'),
+                env_data.get('monthly_rainfall_mm'),
+                env_data.get('relative_humidity_pct'),
+                env_data.get('soil_pH'),
+                env_data.get('soil_moisture_pct'),
+                env_data.get('soil_organic_matter_pct'),
+                st.session_state.get('user_id')
+            ))
+            
+            env_id = cur.fetchone()[0]
         return env_id
     except Exception as e:
-        conn.rollback()
-        conn.close()
         st.error(f"Error saving environmental data: {e}")
         return None
 
+FARM_ENVIRONMENT_SQL = """
+    SELECT 
+        record_date, monthly_temp_avg_c, monthly_rainfall_mm,
+        soil_pH, soil_moisture_pct, relative_humidity_pct
+    FROM environmental_data
+    WHERE farm_id = %s
+"""
+# One record per farm and date (unique), so record_date alone orders pages
+FARM_ENVIRONMENT_ORDER = " ORDER BY record_date DESC"
+
 def get_farm_environmental_data(farm_id, months=12):
     """Get recent environmental data for a farm"""
-    conn = get_db_connection()
-    if not conn:
+    db = get_db()
+    if not db:
         return []
     
     try:
-        cur = conn.cursor(cursor_factory=RealDictCursor)
-        cur.execute("""
-            SELECT 
-                record_date, monthly_temp_avg_c, monthly_rainfall_mm,
-                soil_pH, soil_moisture_pct, relative_humidity_pct
-            FROM environmental_data
-            WHERE farm_id = %s
-            ORDER BY record_date DESC
-            LIMIT %s
-        """, (farm_id, months))
-        
-        data = cur.fetchall()
-        cur.close()
-        conn.close()
+        with db.cursor(dict_rows=True) as cur:
+            cur.execute(FARM_ENVIRONMENT_SQL + FARM_ENVIRONMENT_ORDER + " LIMIT %s", (farm_id, months))
+            
+            data = cur.fetchall()
         return [dict(d) for d in data]
     except Exception as e:
         st.error(f"Error fetching environmental data: {e}")
-        conn.close()
         return []
 
+def get_farm_environmental_data_page(farm_id, months=12, before=None):
+    """
+    Get one page of a farm's monthly records, newest first (keyset pagination)
+    
+    Args:
+        before: next_key returned with the previous page (None for the first)
+    
+    Returns:
+        (records, next_key); next_key is None on the last page
+    """
+    db = get_db()
+    if not db:
+        return [], None
+    
+    sql, params = FARM_ENVIRONMENT_SQL, [farm_id]
+    if before is not None:
+        sql += " AND record_date < %s"
+        params.append(before)
+    
+    try:
+        with db.cursor(dict_rows=True) as cur:
+            cur.execute(sql + FARM_ENVIRONMENT_ORDER + " LIMIT %s", params + [months + 1])
+            
+            data = cur.fetchall()
+    except Exception as e:
+        st.error(f"Error fetching environmental data: {e}")
+        return [], None
+    
+    if len(data) <= months:
+        return data, None
+    data = data[:months]
+    return data, data[-1]['record_date']
+
+def iter_farm_environmental_data(farm_id, batch_size=120):
+    """
+    Stream a farm's whole environmental history, newest first, in batches
+    (see iter_user_harvests)
+    """
+    db = get_db()
+    if not db:
+        return
+    
+    try:
+        yield from db.stream(FARM_ENVIRONMENT_SQL + FARM_ENVIRONMENT_ORDER, (farm_id,), batch_size)
+    except Exception as e:
+        st.error(f"Error fetching environmental data: {e}")
+
 # =====================================================
 # ANALYTICS & DASHBOARD FUNCTIONS
 # =====================================================
 
-def get_dashboard_summary(user_id):
-    """Get dashboard summary for a user"""
-    conn = get_db_connection()
-    if not conn:
-        return None
-    
-    try:
-        cur = conn.cursor(cursor_factory=RealDictCursor)
+def _query_dashboard_summary(db, user_id):
+    with db.cursor(dict_rows=True) as cur:
         cur.execute("""
             SELECT 
                 COUNT(DISTINCT f.farm_id) as total_farms,
@@ -546,22 +620,25 @@ def get_dashboard_summary(user_id):
         """, (user_id,))
         
         summary = cur.fetchone()
-        cur.close()
-        conn.close()
+    return dict(summary) if summary else None
+
+def get_dashboard_summary(user_id):
+    """Get dashboard summary for a user (cached until the TTL or the user's next harvest/assessment)"""
+    db = get_db()
+    if not db:
+        return None
+    
+    try:
+        summary = get_dashboard_cache().get_or_compute(
+            user_id, 'dashboard_summary', lambda: _query_dashboard_summary(db, user_id)
+        )
         return dict(summary) if summary else None
     except Exception as e:
         st.error(f"Error fetching dashboard summary: {e}")
-        conn.close()
         return None
 
-def get_grade_distribution(user_id):
-    """Get grade distribution for a user"""
-    conn = get_db_connection()
-    if not conn:
-        return pd.DataFrame()
-    
-    try:
-        cur = conn.cursor(cursor_factory=RealDictCursor)
+def _query_grade_distribution(db, user_id):
+    with db.cursor(dict_rows=True) as cur:
         cur.execute("""
             SELECT 
                 ga.coffee_grade,
@@ -583,12 +660,22 @@ def get_grade_distribution(user_id):
         """, (user_id,))
         
         data = cur.fetchall()
-        cur.close()
-        conn.close()
-        return pd.DataFrame([dict(d) for d in data])
+    # Rows, not a DataFrame: each caller gets its own frame to modify
+    return tuple(dict(d) for d in data)
+
+def get_grade_distribution(user_id):
+    """Get grade distribution for a user (cached like get_dashboard_summary)"""
+    db = get_db()
+    if not db:
+        return pd.DataFrame()
+    
+    try:
+        rows = get_dashboard_cache().get_or_compute(
+            user_id, 'grade_distribution', lambda: _query_grade_distribution(db, user_id)
+        )
+        return pd.DataFrame([dict(row) for row in rows])
     except Exception as e:
         st.error(f"Error fetching grade distribution: {e}")
-        conn.close()
         return pd.DataFrame()
 
 # =====================================================
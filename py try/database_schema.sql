@@ -178,7 +178,8 @@ CREATE TABLE harvests (
 );
 
 CREATE INDEX idx_harvests_lot ON harvests(lot_id);
-CREATE INDEX idx_harvests_date ON harvests(harvest_date);
+-- harvest_id breaks date ties, so history pages can seek by (harvest_date, harvest_id)
+CREATE INDEX idx_harvests_date ON harvests(harvest_date, harvest_id);
 
 -- =====================================================
 -- 8. GRADE ASSESSMENTS (Coffee Quality Grading)
@@ -0,0 +1,400 @@
+"""
+Bulk Persistence for Predictions, Forecasts, Grades and Environmental Data
+The save_* functions in database_integration_example.py write one row per
+statement and commit each one, so persisting a batch-scoring run over 50k
+farms costs 50k round trips and 50k commits. These functions write any
+number of rows in batches: one round trip and one transaction per batch.
+
+PostgreSQL:
+    predictions, yield_forecasts, grade_assessments
+        COPY ... FROM STDIN (text format), the fastest way into a table
+    environmental_data
+        INSERT ... VALUES (...), (...) ON CONFLICT DO UPDATE via
+        psycopg2.extras.execute_values; COPY cannot upsert
+SQLite stand-in (db_pool.Database.sqlite):
+    executemany per batch, same SQL and defaults
+
+Rows take the same keys and defaults as the single-row functions. JSONB
+values (input_parameters, forecast_data, defect_details) are encoded with
+orjson when installed, compactly and with NumPy values understood, and are
+parsed by the server once, in the COPY stream.
+
+Each batch commits on its own: if one fails, the batches before it stay
+written and the exception says how many rows were.
+
+Grade assessments feed the cached dashboard aggregates, so
+save_grade_assessments_bulk requires the DashboardCache (keyword cache=): the
+owners of each batch's harvests are invalidated once it commits, as the
+single-row writers do. Only a database no dashboard reads may pass cache=None.
+
+Usage:
+    from db_pool import Database
+    from db_bulk import save_predictions_bulk
+
+    db = Database.from_config()
+    written = save_predictions_bulk(db, user_id, predictions, batch_rows=5000)
+"""
+
+import io
+import json
+import math
+from datetime import date, datetime
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # optional: pip install orjson
+    orjson = None
+
+try:
+    from psycopg2.extras import execute_values
+except ImportError:  # optional for the SQLite stand-in: pip install psycopg2-binary
+    execute_values = None
+
+from db_pool import Database
+from dashboard_cache import DashboardCache
+
+# Rows per batch (one round trip and one transaction each)
+DEFAULT_BATCH_ROWS = 5000
+
+class BulkWriteError(RuntimeError):
+    """Raised when a batch fails; earlier batches are already committed"""
+
+    def __init__(self, table: str, rows_written: int, cause: BaseException):
+        self.table = table
+        self.rows_written = rows_written
+        super().__init__(
+            f"Bulk write to {table} failed after {rows_written} rows were committed: {cause}"
+        )
+
+# =====================================================
+# VALUE ENCODING
+# =====================================================
+
+def _default(obj: Any) -> Any:
+    """Encode NumPy scalars and arrays (and anything with .tolist())"""
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    if hasattr(obj, 'item'):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def _finite(value: Any) -> Any:
+    """Replace NaN/inf with None (JSONB has no NaN), matching orjson"""
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {k: _finite(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_finite(v) for v in value]
+    return value
+
+def to_json(value: Any) -> str:
+    """Compact JSON text for a JSONB column"""
+    if orjson is not None:
+        return orjson.dumps(
+            value, default=_default,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        ).decode('utf-8')
+    try:
+        return json.dumps(value, default=_default, separators=(',', ':'), allow_nan=False)
+    except ValueError:
+        return json.dumps(_finite(json.loads(json.dumps(value, default=_default))),
+                          separators=(',', ':'))
+
+# COPY text format: backslash escapes, tab-separated, \N for NULL
+_COPY_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+def _copy_field(value: Any) -> str:
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, float) and math.isnan(value):
+        return '\\N'
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(value).translate(_COPY_ESCAPES)
+
+def _copy_buffer(rows: List[tuple]) -> io.StringIO:
+    buffer = io.StringIO()
+    buffer.writelines('\t'.join(map(_copy_field, row)) + '\n' for row in rows)
+    buffer.seek(0)
+    return buffer
+
+# =====================================================
+# TABLE LAYOUTS
+# =====================================================
+
+# column -> default when the row leaves it out (as the single-row functions)
+PREDICTION_COLUMNS: Dict[str, Any] = {
+    'farm_id': None,
+    'lot_id': None,
+    'prediction_type': 'grade_prediction',
+    'input_parameters': {},
+    'predicted_grade': None,
+    'predicted_pns_grade': None,
+    'predicted_defect_pct': None,
+    'predicted_cupping_score': None,
+    'confidence_score': 0.0,
+    'model_name': 'RandomForest',
+    'model_version': '1.0',
+    'notes': None,
+}
+
+YIELD_FORECAST_COLUMNS: Dict[str, Any] = {
+    'farm_id': None,
+    'lot_id': None,
+    'forecast_period_years': None,
+    'base_year': None,              # filled with the current year
+    'plant_age_months': None,
+    'farm_area_ha': None,
+    'fertilization_type': None,
+    'fertilization_frequency': None,
+    'pest_management_frequency': None,
+    'climate_suitability': None,
+    'soil_suitability': None,
+    'overall_quality_index': None,
+    'forecast_data': [],
+    'total_yield_kg': None,
+    'avg_yield_per_year_kg_ha': None,
+    'avg_fine_probability': None,
+    'avg_premium_probability': None,
+    'avg_commercial_probability': None,
+    'notes': None,
+}
+
+GRADE_ASSESSMENT_COLUMNS: Dict[str, Any] = {
+    'harvest_id': None,
+    'assessment_date': None,        # filled with today's date
+    'sample_weight_g': 350.0,
+    'primary_defects': 0,
+    'secondary_defects': 0,
+    'total_defect_count': 0,
+    'total_defect_pct': 0.0,
+    'bean_screen_size_mm': None,
+    'bean_size_class': None,
+    'pns_grade': None,
+    'coffee_grade': None,
+    'cupping_score': None,
+    'climate_suitability_robusta': None,
+    'soil_suitability_robusta': None,
+    'moisture_suitability': None,
+    'overall_quality_index': None,
+    'environmental_stress_index': None,
+    'defect_details': {},
+}
+
+ENVIRONMENTAL_COLUMNS: Dict[str, Any] = {
+    'farm_id': None,
+    'record_date': None,
+    'monthly_temp_avg_c': None,
+    'monthly_temp_min_c': None,
+    'monthly_temp_max_c': None,
+    'monthly_rainfall_mm': None,
+    'relative_humidity_pct': None,
+    'soil_pH': None,
+    'soil_moisture_pct': None,
+    'soil_organic_matter_pct': None,
+}
+
+# Columns an environmental upsert overwrites (as save_environmental_data)
+ENVIRONMENTAL_UPDATE_COLUMNS = (
+    'monthly_temp_avg_c', 'monthly_rainfall_mm', 'soil_pH', 'soil_moisture_pct'
+)
+
+JSON_COLUMNS = frozenset({'input_parameters', 'forecast_data', 'defect_details'})
+
+def _row_builder(columns: Mapping[str, Any], fixed: Mapping[str, Any]) -> Callable[[Mapping[str, Any]], tuple]:
+    """
+    Function turning a record into a row tuple
+
+    Args:
+        columns: Column -> default, in insert order
+        fixed: Values set for every row (user_id, assessed_by, ...), which
+            come first in the row
+    """
+    steps = tuple((name, default, name in JSON_COLUMNS) for name, default in columns.items())
+    head = tuple(fixed.values())
+
+    def build(record: Mapping[str, Any]) -> tuple:
+        get = record.get
+        return head + tuple(
+            to_json(get(name, default)) if is_json else get(name, default)
+            for name, default, is_json in steps
+        )
+    return build
+
+def _batches(rows: Iterable[tuple], size: int) -> Iterator[List[tuple]]:
+    iterator = iter(rows)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+# =====================================================
+# WRITERS
+# =====================================================
+
+def _write(db: Database, table: str, columns: Tuple[str, ...], rows: Iterable[tuple],
+           batch_rows: int, conflict: Optional[Tuple[str, ...]] = None,
+           update: Tuple[str, ...] = (),
+           on_batch: Optional[Callable[[Any, List[tuple]], Callable[[], None]]] = None) -> int:
+    """
+    Write rows in batches, one transaction per batch
+
+    Args:
+        on_batch: Called with the cursor and the batch inside the batch's
+            transaction; the function it returns runs after the commit
+
+    Returns:
+        Number of rows written
+
+    Raises:
+        BulkWriteError: A batch failed (earlier batches stay committed)
+    """
+    column_list = ', '.join(columns)
+    upsert = ''
+    if conflict:
+        assignments = ', '.join(f"{c} = EXCLUDED.{c}" for c in update)
+        upsert = f" ON CONFLICT ({', '.join(conflict)}) DO UPDATE SET {assignments}"
+
+    if db.backend == 'postgresql':
+        if conflict:
+            sql = f"INSERT INTO {table} ({column_list}) VALUES %s{upsert}"
+
+            def write_batch(cur, batch):
+                execute_values(cur, sql, batch, page_size=len(batch))
+        else:
+            sql = f"COPY {table} ({column_list}) FROM STDIN"
+
+            def write_batch(cur, batch):
+                cur.copy_expert(sql, _copy_buffer(batch))
+    else:
+        placeholders = ', '.join(['%s'] * len(columns))
+        sql = f"INSERT INTO {table} ({column_list}) VALUES ({placeholders}){upsert}"
+
+        def write_batch(cur, batch):
+            cur.executemany(sql, batch)
+
+    written = 0
+    for batch in _batches(rows, batch_rows):
+        try:
+            with db.cursor() as cur:
+                write_batch(cur, batch)
+                committed = on_batch(cur, batch) if on_batch else None
+        except Exception as e:
+            raise BulkWriteError(table, written, e) from e
+        written += len(batch)
+        if committed is not None:
+            committed()
+    return written
+
+def save_predictions_bulk(db: Database, user_id: int, predictions: Iterable[Mapping[str, Any]],
+                          batch_rows: int = DEFAULT_BATCH_ROWS) -> int:
+    """
+    Save many predictions (bulk save_prediction)
+
+    Args:
+        db: Connection pool
+        user_id: Owner of the predictions
+        predictions: Records with save_prediction's keys
+        batch_rows: Rows per transaction
+
+    Returns:
+        Number of rows written
+    """
+    build = _row_builder(PREDICTION_COLUMNS, {'user_id': user_id})
+    columns = ('user_id',) + tuple(PREDICTION_COLUMNS)
+    return _write(db, 'predictions', columns, map(build, predictions), batch_rows)
+
+def save_yield_forecasts_bulk(db: Database, user_id: int, forecasts: Iterable[Mapping[str, Any]],
+                              batch_rows: int = DEFAULT_BATCH_ROWS) -> int:
+    """
+    Save many yield forecasts (bulk save_yield_forecast)
+
+    forecast_data (the yearly breakdown) is written as compact JSON.
+
+    Returns:
+        Number of rows written
+    """
+    this_year = datetime.now().year
+    columns = dict(YIELD_FORECAST_COLUMNS, base_year=this_year)
+    build = _row_builder(columns, {'user_id': user_id})
+    return _write(db, 'yield_forecasts', ('user_id',) + tuple(columns),
+                  map(build, forecasts), batch_rows)
+
+# Harvest ids per owner lookup (SQLite allows 32766 parameters per statement)
+_OWNER_LOOKUP_IDS = 1000
+
+def _invalidate_harvest_owners(cache: DashboardCache, harvest_column: int):
+    """on_batch hook dropping the cached dashboards of the batch's farm owners"""
+
+    def on_batch(cur, batch: List[tuple]) -> Callable[[], None]:
+        harvest_ids = list({row[harvest_column] for row in batch})
+        owners = set()
+        for start in range(0, len(harvest_ids), _OWNER_LOOKUP_IDS):
+            chunk = harvest_ids[start:start + _OWNER_LOOKUP_IDS]
+            cur.execute(f"""
+                SELECT DISTINCT f.user_id
+                FROM harvests h
+                JOIN coffee_lots cl ON h.lot_id = cl.lot_id
+                JOIN farms f ON cl.farm_id = f.farm_id
+                WHERE h.harvest_id IN ({', '.join(['%s'] * len(chunk))})
+            """, chunk)
+            owners.update(row[0] for row in cur.fetchall())
+
+        def invalidate():
+            for user_id in owners:
+                cache.invalidate(user_id)
+        return invalidate
+    return on_batch
+
+def save_grade_assessments_bulk(db: Database, assessments: Iterable[Mapping[str, Any]],
+                                assessed_by: Optional[int] = None,
+                                batch_rows: int = DEFAULT_BATCH_ROWS, *,
+                                cache: Optional[DashboardCache]) -> int:
+    """
+    Save many grade assessments (bulk save_grade_assessment)
+
+    Args:
+        assessments: Records with save_grade_assessment's keys plus harvest_id
+        assessed_by: User recorded as the assessor
+        cache: Dashboard cache to invalidate for the harvests' owners after
+            each committed batch (get_dashboard_cache() in the Streamlit app).
+            Required: None only when no dashboard reads this database
+
+    Returns:
+        Number of rows written
+    """
+    columns = dict(GRADE_ASSESSMENT_COLUMNS, assessment_date=date.today())
+    build = _row_builder(columns, {'assessed_by': assessed_by})
+    names = ('assessed_by',) + tuple(columns)
+    on_batch = _invalidate_harvest_owners(cache, names.index('harvest_id')) if cache is not None else None
+    return _write(db, 'grade_assessments', names, map(build, assessments), batch_rows,
+                  on_batch=on_batch)
+
+def save_environmental_data_bulk(db: Database, records: Iterable[Mapping[str, Any]],
+                                 recorded_by: Optional[int] = None,
+                                 batch_rows: int = DEFAULT_BATCH_ROWS) -> int:
+    """
+    Upsert many monthly environmental records (bulk save_environmental_data)
+
+    Args:
+        records: Records with save_environmental_data's keys plus farm_id
+        recorded_by: User recorded as the author
+
+    Returns:
+        Number of rows written (after merging repeats of a farm and date)
+    """
+    build = _row_builder(ENVIRONMENTAL_COLUMNS, {'recorded_by': recorded_by})
+    # One statement cannot update the same row twice: keep the last record
+    # for each (farm_id, record_date)
+    latest: Dict[Tuple[Any, Any], tuple] = {}
+    for record in records:
+        latest[(record['farm_id'], record['record_date'])] = build(record)
+    return _write(db, 'environmental_data', ('recorded_by',) + tuple(ENVIRONMENTAL_COLUMNS),
+                  latest.values(), batch_rows,
+                  conflict=('farm_id', 'record_date'), update=ENVIRONMENTAL_UPDATE_COLUMNS)
@@ -0,0 +1,501 @@
+"""
+Pooled Database Access for the Robusta Coffee Dashboard
+Every Streamlit session and thread checks a connection out of a shared pool
+for the duration of one call and returns it afterwards, instead of sharing a
+single cached connection. Each checkout is one transaction: committed when the
+block finishes, rolled back when it raises, so one failed query no longer
+poisons the connection for everyone else.
+
+Backends:
+    PostgreSQL  psycopg2.pool.ThreadedConnectionPool (pip install psycopg2-binary)
+    SQLite      Stand-in with the same interface, for local runs and tests
+                without a Postgres server. Queries keep psycopg2's %s
+                placeholders; the stand-in translates them.
+
+Usage:
+    db = Database.from_config(st.secrets)      # or os.environ
+    with db.cursor(dict_rows=True) as cur:
+        cur.execute("SELECT * FROM farms WHERE user_id = %s", (user_id,))
+        farms = cur.fetchall()
+
+Configuration keys (st.secrets or environment):
+    DB_HOST, DB_NAME, DB_USER, DB_PASSWORD, DB_PORT   PostgreSQL connection
+    DB_SQLITE_PATH        Use the SQLite stand-in at this file instead
+    DB_POOL_MIN           Connections opened up front (default 1)
+    DB_POOL_MAX           Most connections open at once (default 10)
+    DB_POOL_TIMEOUT       Seconds to wait for a free connection (default 10)
+    DB_HEALTH_CHECK_SECS  Ping connections idle longer than this before
+                          handing them out (default 30; 0 pings every checkout)
+"""
+
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Mapping, Optional
+
+try:
+    import psycopg2
+    from psycopg2.extras import RealDictCursor
+    from psycopg2.pool import ThreadedConnectionPool
+except ImportError:  # optional for the SQLite stand-in: pip install psycopg2-binary
+    psycopg2 = None
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_PATH = Path(__file__).resolve().parent / 'database_schema.sql'
+
+class PoolTimeout(RuntimeError):
+    """Raised when no connection frees up within the pool timeout"""
+
+# =====================================================
+# SQLITE STAND-IN
+# =====================================================
+
+# %s -> ?, %% -> % (psycopg2 escapes a literal percent sign as %%)
+_PLACEHOLDER = re.compile(r'%(s|%)')
+
+def _to_qmark(sql: str) -> str:
+    return _PLACEHOLDER.sub(lambda m: '?' if m.group(1) == 's' else '%', sql)
+
+def _dict_row(cursor: sqlite3.Cursor, row: tuple) -> Dict[str, Any]:
+    return {col[0]: value for col, value in zip(cursor.description, row)}
+
+# Store dates as ISO text, as psycopg2 would send them
+sqlite3.register_adapter(date, date.isoformat)
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(' '))
+
+class SQLiteCursor:
+    """sqlite3 cursor that accepts psycopg2-style %s placeholders"""
+
+    def __init__(self, cursor: sqlite3.Cursor, dict_rows: bool = False):
+        self._cursor = cursor
+        if dict_rows:
+            cursor.row_factory = _dict_row
+
+    def execute(self, sql: str, params=()):
+        self._cursor.execute(_to_qmark(sql), params)
+        return self
+
+    def executemany(self, sql: str, seq_of_params):
+        self._cursor.executemany(_to_qmark(sql), seq_of_params)
+        return self
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size: int = 1):
+        return self._cursor.fetchmany(size)
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def close(self):
+        self._cursor.close()
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def rowcount(self) -> int:
+        return self._cursor.rowcount
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+class SQLiteConnection:
+    """sqlite3 connection with the parts of the psycopg2 interface used here"""
+
+    def __init__(self, path: str):
+        # Pooled connections move between threads, one thread at a time
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self.closed = 0
+
+    def cursor(self, dict_rows: bool = False) -> SQLiteCursor:
+        return SQLiteCursor(self._conn.cursor(), dict_rows)
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        self._conn.close()
+        self.closed = 1
+
+class SQLitePool:
+    """Connection pool over one SQLite file (getconn/putconn as psycopg2's pools)"""
+
+    def __init__(self, minconn: int, maxconn: int, path: str):
+        if path == ':memory:' or not path:
+            # Every connection would get its own empty database
+            raise ValueError("The SQLite stand-in needs a file path, not ':memory:'")
+        self.maxconn = maxconn
+        self.path = path
+        self._idle: List[SQLiteConnection] = []
+        self._used: Dict[int, SQLiteConnection] = {}
+        self._lock = threading.Lock()
+        for _ in range(minconn):
+            self._idle.append(SQLiteConnection(path))
+
+    def getconn(self) -> SQLiteConnection:
+        with self._lock:
+            if self._idle:
+                conn = self._idle.pop()
+            elif len(self._used) < self.maxconn:
+                conn = SQLiteConnection(self.path)
+            else:
+                raise RuntimeError("connection pool exhausted")
+            self._used[id(conn)] = conn
+            return conn
+
+    def putconn(self, conn: SQLiteConnection, close: bool = False):
+        with self._lock:
+            self._used.pop(id(conn), None)
+            if close or conn.closed:
+                if not conn.closed:
+                    conn.close()
+            else:
+                self._idle.append(conn)
+
+    def closeall(self):
+        with self._lock:
+            for conn in self._idle + list(self._used.values()):
+                conn.close()
+            self._idle.clear()
+            self._used.clear()
+
+    def open_count(self) -> int:
+        with self._lock:
+            return len(self._idle) + len(self._used)
+
+if psycopg2 is not None:
+    class PostgresPool(ThreadedConnectionPool):
+        """ThreadedConnectionPool that reports how many connections are open"""
+
+        def open_count(self) -> int:
+            with self._lock:
+                return len(self._pool) + len(self._used)
+
+# =====================================================
+# POOLED DATABASE
+# =====================================================
+
+class Database:
+    """
+    Thread-safe connection pool with per-call checkout
+
+    Args:
+        pool: PostgresPool or SQLitePool
+        backend: 'postgresql' or 'sqlite'
+        timeout: Seconds to wait for a free connection
+        health_check_secs: Ping connections idle longer than this on checkout
+    """
+
+    def __init__(self, pool, backend: str, timeout: float = 10.0,
+                 health_check_secs: float = 30.0):
+        self._pool = pool
+        self.backend = backend
+        self.maxconn = pool.maxconn
+        self.timeout = timeout
+        self.health_check_secs = health_check_secs
+        # Pool timeouts come from here; psycopg2's pools fail at once when full
+        self._slots = threading.BoundedSemaphore(pool.maxconn)
+        self._last_used: Dict[int, float] = {}
+        self._lock = threading.Lock()
+        self._in_use = 0
+        self._counts = {
+            'checkouts': 0,
+            'timeouts': 0,
+            'wait_seconds': 0.0,
+            'health_check_failures': 0,
+            'discarded': 0,
+        }
+        if backend == 'postgresql':
+            self.IntegrityError = psycopg2.IntegrityError
+            self._connection_errors = (psycopg2.OperationalError, psycopg2.InterfaceError)
+        else:
+            self.IntegrityError = sqlite3.IntegrityError
+            self._connection_errors = (sqlite3.OperationalError, sqlite3.InterfaceError)
+
+    @classmethod
+    def postgres(cls, minconn: int = 1, maxconn: int = 10, timeout: float = 10.0,
+                 health_check_secs: float = 30.0, **connect_kwargs) -> 'Database':
+        """Pool of PostgreSQL connections (connect_kwargs go to psycopg2.connect)"""
+        if psycopg2 is None:
+            raise ImportError("PostgreSQL support requires psycopg2: pip install psycopg2-binary")
+        pool = PostgresPool(minconn, maxconn, **connect_kwargs)
+        return cls(pool, 'postgresql', timeout, health_check_secs)
+
+    @classmethod
+    def sqlite(cls, path: str, minconn: int = 1, maxconn: int = 10,
+               timeout: float = 10.0, health_check_secs: float = 30.0) -> 'Database':
+        """Pool over a SQLite file, standing in for PostgreSQL"""
+        pool = SQLitePool(minconn, maxconn, str(path))
+        return cls(pool, 'sqlite', timeout, health_check_secs)
+
+    @classmethod
+    def from_config(cls, config: Optional[Mapping[str, Any]] = None) -> 'Database':
+        """
+        Build the pool from st.secrets or the environment
+
+        Args:
+            config: Mapping with the keys listed in the module docstring
+                (default: os.environ)
+        """
+        config = os.environ if config is None else config
+        options = dict(
+            minconn=int(config.get('DB_POOL_MIN', 1)),
+            maxconn=int(config.get('DB_POOL_MAX', 10)),
+            timeout=float(config.get('DB_POOL_TIMEOUT', 10)),
+            health_check_secs=float(config.get('DB_HEALTH_CHECK_SECS', 30)),
+        )
+        if config.get('DB_SQLITE_PATH'):
+            return cls.sqlite(config['DB_SQLITE_PATH'], **options)
+        return cls.postgres(
+            host=config['DB_HOST'],
+            database=config['DB_NAME'],
+            user=config['DB_USER'],
+            password=config['DB_PASSWORD'],
+            port=config.get('DB_PORT', 5432),
+            **options
+        )
+
+    # ----- checkout -----
+
+    def _healthy(self, conn) -> bool:
+        """Ping a connection that has sat idle; False when it is broken"""
+        if conn.closed:
+            return False
+        last_used = self._last_used.get(id(conn))
+        if last_used is not None and time.monotonic() - last_used < self.health_check_secs:
+            return True
+        try:
+            cur = conn.cursor()
+            cur.execute("SELECT 1")
+            cur.close()
+            conn.rollback()
+            return True
+        except Exception as e:
+            logger.warning("Discarding unhealthy %s connection: %s", self.backend, e)
+            return False
+
+    def _discard(self, conn):
+        self._last_used.pop(id(conn), None)
+        try:
+            self._pool.putconn(conn, close=True)
+        except Exception:
+            pass
+        with self._lock:
+            self._counts['discarded'] += 1
+
+    def _healthy_conn(self, started: float):
+        """
+        Next pooled connection that passes its health check
+
+        After a server restart every idle connection is dead: each is
+        discarded in turn until a live (or newly opened) one comes up. At most
+        maxconn + 1 tries, since by then the pool has had to open a fresh one.
+        """
+        for _ in range(self.maxconn + 1):
+            conn = self._pool.getconn()
+            if self._healthy(conn):
+                return conn
+            with self._lock:
+                self._counts['health_check_failures'] += 1
+            self._discard(conn)
+            if time.monotonic() - started >= self.timeout:
+                break
+        raise PoolTimeout(
+            f"No healthy database connection within {self.timeout:g}s "
+            f"(pool size {self.maxconn})"
+        )
+
+    def _checkout(self):
+        started = time.monotonic()
+        if not self._slots.acquire(timeout=self.timeout):
+            with self._lock:
+                self._counts['timeouts'] += 1
+            raise PoolTimeout(
+                f"No database connection free within {self.timeout:g}s "
+                f"(pool size {self.maxconn})"
+            )
+        try:
+            conn = self._healthy_conn(started)
+        except BaseException:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._in_use += 1
+            self._counts['checkouts'] += 1
+            self._counts['wait_seconds'] += time.monotonic() - started
+        return conn
+
+    def _checkin(self, conn, broken: bool):
+        try:
+            if broken or conn.closed:
+                self._discard(conn)
+            else:
+                self._last_used[id(conn)] = time.monotonic()
+                self._pool.putconn(conn)
+        finally:
+            with self._lock:
+                self._in_use -= 1
+            self._slots.release()
+
+    @contextmanager
+    def connection(self) -> Iterator[Any]:
+        """
+        Check out a connection for one transaction
+
+        Commits when the block finishes and rolls back when it raises. A
+        connection that fails with a connection-level error is closed
+        instead of going back to the pool.
+
+        Raises:
+            PoolTimeout: No connection frees up within the pool timeout
+        """
+        conn = self._checkout()
+        broken = False
+        try:
+            yield conn
+            conn.commit()
+        except BaseException as e:
+            broken = isinstance(e, self._connection_errors)
+            try:
+                conn.rollback()
+            except Exception:
+                broken = True
+            raise
+        finally:
+            self._checkin(conn, broken)
+
+    @contextmanager
+    def cursor(self, dict_rows: bool = False) -> Iterator[Any]:
+        """
+        Cursor on a checked-out connection, in its own transaction
+
+        Args:
+            dict_rows: Return rows as dicts (RealDictCursor on PostgreSQL)
+        """
+        with self.connection() as conn:
+            if self.backend == 'postgresql':
+                cur = conn.cursor(cursor_factory=RealDictCursor) if dict_rows else conn.cursor()
+            else:
+                cur = conn.cursor(dict_rows)
+            try:
+                yield cur
+            finally:
+                cur.close()
+
+    def stream(self, sql: str, params=(), batch_size: int = 1000,
+               dict_rows: bool = True) -> Iterator[List[Any]]:
+        """
+        Yield a query's rows in batches without loading the whole result
+
+        PostgreSQL uses a server-side (named) cursor, so the server sends
+        batch_size rows per round trip; SQLite steps through the result as
+        it is fetched. The connection stays checked out until the generator
+        is exhausted or closed, so consume it promptly (or close() it).
+
+        Args:
+            sql: Query with %s placeholders
+            params: Query parameters
+            batch_size: Rows per yielded list
+            dict_rows: Rows as dicts (RealDictCursor on PostgreSQL)
+        """
+        with self.connection() as conn:
+            if self.backend == 'postgresql':
+                # Named cursors live inside the checkout's transaction
+                name = f"stream_{threading.get_ident()}_{time.monotonic_ns()}"
+                cur = conn.cursor(name=name, cursor_factory=RealDictCursor if dict_rows else None)
+                cur.itersize = batch_size
+            else:
+                cur = conn.cursor(dict_rows)
+            try:
+                cur.execute(sql, params)
+                while True:
+                    rows = cur.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    yield rows
+            finally:
+                cur.close()
+
+    # ----- metrics -----
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Pool-size and checkout metrics
+
+        Returns:
+            Dict with open/in_use/idle/max connection counts, total checkouts,
+            timeouts, mean checkout wait, failed health checks and connections
+            discarded (each discard is replaced by a reconnect on demand)
+        """
+        open_count = self._pool.open_count()
+        with self._lock:
+            in_use = self._in_use
+            counts = dict(self._counts)
+        checkouts = counts.pop('checkouts')
+        wait_seconds = counts.pop('wait_seconds')
+        return {
+            'backend': self.backend,
+            'open': open_count,
+            'in_use': in_use,
+            'idle': max(open_count - in_use, 0),
+            'max': self.maxconn,
+            'checkouts': checkouts,
+            'avg_wait_ms': round(1000 * wait_seconds / checkouts, 3) if checkouts else 0.0,
+            **counts,
+        }
+
+    def close(self):
+        """Close every pooled connection"""
+        self._pool.closeall()
+        self._last_used.clear()
+
+# =====================================================
+# SCHEMA FOR THE STAND-IN
+# =====================================================
+
+# PostgreSQL-only column types and their SQLite equivalents
+_SQLITE_TYPES = [
+    (re.compile(r'\bSERIAL PRIMARY KEY\b'), 'INTEGER PRIMARY KEY'),
+    (re.compile(r'\bJSONB\b'), 'TEXT'),
+    (re.compile(r'\bPOINT\b'), 'TEXT'),
+]
+
+def sqlite_schema(path: Path = SCHEMA_PATH) -> List[str]:
+    """
+    Tables and indexes of database_schema.sql translated for SQLite
+
+    Views, functions and triggers are PostgreSQL-specific and left out.
+    """
+    statements = []
+    for statement in path.read_text(encoding='utf-8').split(';'):
+        lines = [line for line in statement.splitlines()
+                 if line.strip() and not line.strip().startswith('--')]
+        sql = '\n'.join(lines)
+        if not sql.startswith(('CREATE TABLE', 'CREATE INDEX')):
+            continue
+        for pattern, replacement in _SQLITE_TYPES:
+            sql = pattern.sub(replacement, sql)
+        statements.append(sql)
+    return statements
+
+def create_sqlite_schema(db: Database, path: Path = SCHEMA_PATH):
+    """Create the dashboard tables in a SQLite stand-in database"""
+    with db.cursor() as cur:
+        for sql in sqlite_schema(path):
+            cur.execute(sql.replace('CREATE TABLE', 'CREATE TABLE IF NOT EXISTS', 1)
+                           .replace('CREATE INDEX', 'CREATE INDEX IF NOT EXISTS', 1))
@@ -1,7 +1,7 @@
 import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
-from robusta_coffee_dashboard import calculate_yield_forecast
+from ml_backend.forecasting import calculate_yield_forecast
 
 # ==============================
 # Sidebar: Navigation Pages
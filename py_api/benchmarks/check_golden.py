@@ -0,0 +1,210 @@
+"""
+Golden-Output Check for the Scoring Engine
+Replays a fixed corpus of inputs through the scalar API (scoring.py) and the
+batch API (scoring_batch.py) and compares against recorded outputs, so the
+Flask, FastAPI and dashboard entry points cannot silently drift apart.
+
+Usage (from py_api/):
+    python benchmarks/check_golden.py              # verify, exit 1 on mismatch
+    python benchmarks/check_golden.py --regenerate # rewrite the corpus after an
+                                                   # intentional scoring change
+"""
+
+import argparse
+import itertools
+import json
+import math
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ml_backend.scoring import (
+    predict_grade,
+    predict_coffee_grade,
+    predict_quality_distribution,
+    generate_recommendations
+)
+from ml_backend.scoring_batch import predict_grade_batch, predict_coffee_grade_batch
+from ml_backend.forecasting import predict_yield
+
+GOLDEN_PATH = Path(__file__).resolve().parent / "golden_scoring.json"
+FLOAT_TOLERANCE = 1e-9
+
+# =====================================
+# CORPUS INPUTS
+# =====================================
+
+def grade_inputs() -> List[Dict[str, Any]]:
+    """Grid over site conditions and defects, including band edges"""
+    cases = []
+    grid = itertools.product(
+        [0, 600, 900, 1300],                 # elevation_masl
+        [10.0, 19.5, 27.0],                  # monthly_temp_avg_c
+        [50, 400],                           # monthly_rainfall_mm
+        [4.5, 6.0, 7.2],                     # soil_pH
+        [5, 35],                             # soil_moisture_pct
+        [(0, 0), (0, 5), (0, 6), (2, 10), (5, 20)]  # (primary, secondary)
+    )
+    for elevation, temp, rain, ph, moisture, (primary, secondary) in grid:
+        cases.append({
+            'plant_age_months': 48,
+            'bean_screen_size_mm': 5.0 + (len(cases) % 9) * 0.5,
+            'primary_defects': primary,
+            'secondary_defects': secondary,
+            'elevation_masl': elevation,
+            'monthly_temp_avg_c': temp,
+            'monthly_rainfall_mm': rain,
+            'soil_pH': ph,
+            'soil_moisture_pct': moisture,
+            'environmental_stress_index': None if len(cases) % 4 else 0.3,
+            'quality_score': None if len(cases) % 7 else 79.5
+        })
+    return cases
+
+def sample_inputs() -> List[Dict[str, Any]]:
+    """Grid over the Flask /predict parameters"""
+    cases = []
+    grid = itertools.product(
+        [0, 900, 1500],                      # altitude
+        [0, 1],                              # processing_method
+        [0, 1, 2, 3],                        # colors
+        [0, 8, 12, 14.5, 16, 18],            # moisture
+        # (category_one, category_two); /predict accepted negative counts before
+        # its schema rejected them, so keep their scores pinned
+        [(0, 0), (0, 4), (1, 6), (3, 12), (-4, 0), (0, -3), (2, -2), (-1, 3)]
+    )
+    for altitude, processing, colors, moisture, (one, two) in grid:
+        cases.append({
+            'altitude': altitude,
+            'processing_method': processing,
+            'colors': colors,
+            'moisture': moisture,
+            'category_one_defects': one,
+            'category_two_defects': two
+        })
+    return cases
+
+def quality_inputs() -> List[Dict[str, Any]]:
+    cases = []
+    for quality, climate, fert in itertools.product([None, 0.6, 0.7, 0.8, 0.9], [None, 0.5, 0.95], [None, 0.7, 1.0]):
+        cases.append({
+            'quality_score': quality,
+            'climate_suitability': climate,
+            'soil_suitability': 0.7,
+            'fertilization_factor': fert,
+            'pest_factor': 0.9
+        })
+    return cases
+
+def yield_inputs() -> List[Dict[str, Any]]:
+    cases = []
+    for age, fert_type, freq, elevation in itertools.product(
+        [12, 40, 70, 150, 230], ['Organic', 'Non-Organic'], [1, 3, 5], [900]
+    ):
+        cases.append({
+            'plant_age_months': age,
+            'farm_area_ha': 2.5,
+            'elevation_masl': elevation,
+            'fertilization_type': fert_type,
+            'fertilization_frequency': freq,
+            'pest_management_frequency': 6 - freq,
+            'forecast_years': 5
+        })
+    return cases
+
+def build_corpus() -> Dict[str, List[Dict[str, Any]]]:
+    """Compute outputs for every corpus input with the scalar API"""
+    def sample_grade(case):
+        return predict_coffee_grade(bag_weight=0, **case)
+
+    return {
+        'predict_grade': [{'input': c, 'output': predict_grade(c)} for c in grade_inputs()],
+        'generate_recommendations': [{'input': c, 'output': generate_recommendations(c)} for c in grade_inputs()[::9]],
+        'predict_coffee_grade': [{'input': c, 'output': sample_grade(c)} for c in sample_inputs()],
+        'predict_quality_distribution': [{'input': c, 'output': predict_quality_distribution(c)} for c in quality_inputs()],
+        'predict_yield': [{'input': c, 'output': predict_yield(c)} for c in yield_inputs()]
+    }
+
+# =====================================
+# COMPARISON
+# =====================================
+
+def _to_jsonable(value: Any) -> Any:
+    """Round-trip through JSON so NumPy scalars compare like recorded values"""
+    return json.loads(json.dumps(value, default=lambda v: v.item() if hasattr(v, 'item') else str(v)))
+
+def _diff(expected: Any, actual: Any, path: str = '') -> List[str]:
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        problems = []
+        for key in sorted(set(expected) | set(actual)):
+            if key not in actual or key not in expected:
+                problems.append(f"{path}.{key}: missing on one side")
+            else:
+                problems.extend(_diff(expected[key], actual[key], f"{path}.{key}"))
+        return problems
+    if isinstance(expected, list) and isinstance(actual, list):
+        if len(expected) != len(actual):
+            return [f"{path}: length {len(actual)} != {len(expected)}"]
+        return [p for i, (e, a) in enumerate(zip(expected, actual)) for p in _diff(e, a, f"{path}[{i}]")]
+    if isinstance(expected, float) or isinstance(actual, float):
+        if isinstance(expected, (int, float)) and isinstance(actual, (int, float)) \
+                and math.isclose(expected, actual, rel_tol=0, abs_tol=FLOAT_TOLERANCE):
+            return []
+    elif expected == actual:
+        return []
+    return [f"{path}: {actual!r} != expected {expected!r}"]
+
+def _batch_rows(columns: Dict[str, Any]) -> List[Dict[str, Any]]:
+    keys = list(columns)
+    return [dict(zip(keys, values)) for values in zip(*(columns[k].tolist() for k in keys))]
+
+def check(corpus: Dict[str, List[Dict[str, Any]]]) -> List[str]:
+    """Compare scalar and batch outputs against the recorded corpus"""
+    current = _to_jsonable(build_corpus())
+    problems = []
+    for name, cases in corpus.items():
+        for i, (golden, now) in enumerate(zip(cases, current[name])):
+            problems.extend(f"{name}[{i}] scalar{p}" for p in _diff(golden['output'], now['output']))
+
+    batch_checks = {
+        'predict_grade': predict_grade_batch,
+        'predict_coffee_grade': predict_coffee_grade_batch
+    }
+    for name, batch_fn in batch_checks.items():
+        inputs = [case['input'] for case in corpus[name]]
+        columns = {key: [row[key] for row in inputs] for key in inputs[0]}
+        rows = _to_jsonable(_batch_rows(batch_fn(columns)))
+        for i, (golden, row) in enumerate(zip(corpus[name], rows)):
+            problems.extend(f"{name}[{i}] batch{p}" for p in _diff(golden['output'], row))
+    return problems
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--regenerate", action="store_true", help="Rewrite the golden corpus")
+    args = parser.parse_args()
+
+    if args.regenerate:
+        corpus = _to_jsonable(build_corpus())
+        # One case per line keeps the file small and diffs readable
+        sections = [
+            f'"{name}": [\n' + ",\n".join(json.dumps(case, sort_keys=True) for case in cases) + "\n]"
+            for name, cases in sorted(corpus.items())
+        ]
+        GOLDEN_PATH.write_text("{\n" + ",\n".join(sections) + "\n}\n")
+        print(f"Wrote {sum(len(v) for v in corpus.values())} cases to {GOLDEN_PATH}")
+        return
+
+    corpus = json.loads(GOLDEN_PATH.read_text())
+    problems = check(corpus)
+    total = sum(len(v) for v in corpus.values())
+    if problems:
+        for problem in problems[:50]:
+            print(f"FAIL {problem}")
+        print(f"{len(problems)} mismatches across {total} golden cases")
+        sys.exit(1)
+    print(f"OK: {total} golden cases match (scalar and batch)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Per-Request Latency of predict_yield
+Compares the lean tuple-based forecast core used by /forecast-yield with the
+previous implementation, which built a pandas DataFrame per request and
+reduced it with .sum()/.mean()/.to_dict('records'). Also checks that both
+produce the same response.
+
+Usage (from py_api/):
+    python benchmarks/forecast_latency.py [--requests 2000] [--years 5]
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ml_backend.forecasting import calculate_yield_forecast, predict_yield
+from ml_backend.scoring import calculate_suitability_scores
+
+def predict_yield_dataframe(params: Dict[str, Any]) -> Dict[str, Any]:
+    """predict_yield as it was before the lean core (DataFrame per request)"""
+    scores = calculate_suitability_scores(
+        params['elevation_masl'], params['monthly_temp_avg_c'], params['monthly_rainfall_mm'],
+        params['soil_pH'], params['soil_moisture_pct']
+    )
+    forecast_df = calculate_yield_forecast(
+        plant_age_months=params['plant_age_months'],
+        farm_area_ha=params['farm_area_ha'],
+        climate_suitability=scores['climate_suitability'],
+        soil_suitability=scores['soil_suitability'],
+        fertilization_type=params['fertilization_type'],
+        fertilization_frequency=params['fertilization_frequency'],
+        pest_management_frequency=params['pest_management_frequency'],
+        bean_screen_size=6.5,
+        overall_quality_index=scores['overall_quality_index'],
+        forecast_years=params['forecast_years']
+    )
+    return {
+        'forecast_data': forecast_df.to_dict('records'),
+        'summary': {
+            'total_yield_kg': round(forecast_df['Total Yield (kg)'].sum(), 2),
+            'avg_yield_kg_per_ha': round(forecast_df['Yield (kg/ha)'].mean(), 2),
+            'avg_fine_probability': round(forecast_df['Fine Probability'].mean(), 3),
+            'avg_premium_probability': round(forecast_df['Premium Probability'].mean(), 3),
+            'forecast_years': params['forecast_years']
+        },
+        'suitability_scores': {
+            'climate_suitability': round(scores['climate_suitability'], 3),
+            'soil_suitability': round(scores['soil_suitability'], 3),
+            'overall_quality_index': round(scores['overall_quality_index'], 3)
+        }
+    }
+
+def time_per_call(fn: Callable, params: Dict[str, Any], requests: int) -> float:
+    """Median microseconds per call over 5 rounds"""
+    rounds = []
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(requests):
+            fn(params)
+        rounds.append((time.perf_counter() - start) / requests * 1e6)
+    return statistics.median(rounds)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000, help="Calls per timing round")
+    parser.add_argument("--years", type=int, default=5, help="forecast_years per request")
+    args = parser.parse_args()
+
+    params = {
+        'plant_age_months': 48, 'farm_area_ha': 2.5, 'elevation_masl': 900,
+        'monthly_temp_avg_c': 22.0, 'monthly_rainfall_mm': 180, 'soil_pH': 5.8,
+        'soil_moisture_pct': 30, 'fertilization_type': 'Organic', 'fertilization_frequency': 4,
+        'pest_management_frequency': 3, 'forecast_years': args.years
+    }
+
+    if predict_yield(params) != predict_yield_dataframe(params):
+        print("FAIL: lean and DataFrame forecasts differ")
+        sys.exit(1)
+
+    lean_us = time_per_call(predict_yield, params, args.requests)
+    df_us = time_per_call(predict_yield_dataframe, params, max(1, args.requests // 10))
+
+    print(f"{'implementation':<20} {'us/request':>12}")
+    print(f"{'DataFrame (before)':<20} {df_us:>12.1f}")
+    print(f"{'lean core':<20} {lean_us:>12.1f}")
+    print(f"speedup: {df_us / lean_us:.0f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Import-Time Benchmark for the ml_backend package
+Measures cold-start import cost for the grading-only path versus the full
+pandas/scikit-learn core. Totals are wall-clock (``perf_counter``) around each
+scenario in a fresh interpreter: ``-X importtime`` does not report modules the
+package loads through ``importlib.import_module`` in its PEP 562 ``__getattr__``,
+so it is only used for the per-module breakdown.
+
+Usage (from py_api/):
+    python benchmarks/import_time.py [--runs 5] [--top 10]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+PY_API_DIR = Path(__file__).resolve().parent.parent
+
+SCENARIOS = {
+    'package only': "import ml_backend",
+    'grading only': "import ml_backend; ml_backend.calculate_pns_grade(12.0)",
+    'scoring module': "from ml_backend.scoring import predict_grade",
+    'full core': "from ml_backend.robusta_ml_core import train_grade_classification_model",
+}
+
+# Wall-clock around the scenario; interpreter startup and site are excluded
+TIMER = """\
+import time as _time
+_started = _time.perf_counter()
+{code}
+print((_time.perf_counter() - _started) * 1e6)
+"""
+
+def run_importtime(code: str) -> Tuple[int, List[Tuple[int, str]]]:
+    """
+    Run code in a fresh interpreter with -X importtime
+
+    Returns:
+        (wall-clock microseconds of the code,
+         list of (cumulative_us, module) for every import -X importtime reports)
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", TIMER.format(code=code)],
+        cwd=PY_API_DIR, capture_output=True, text=True, check=True
+    )
+    entries = []
+    started = False
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        # Interpreter startup (up to site and its .pth imports) is the same for
+        # every scenario; children are printed before their parent
+        if started:
+            entries.append((int(cumulative_us), name.strip()))
+        elif name.strip() == "site" and not name[1:].startswith(" "):
+            started = True
+    return round(float(proc.stdout.split()[-1])), entries
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per scenario")
+    parser.add_argument("--top", type=int, default=8, help="Heaviest modules to list per scenario")
+    args = parser.parse_args()
+
+    results: Dict[str, float] = {}
+    for label, code in SCENARIOS.items():
+        totals = []
+        entries = []
+        for _ in range(args.runs):
+            total, entries = run_importtime(code)
+            totals.append(total)
+        results[label] = statistics.median(totals) / 1000
+
+        print(f"\n{label}: {results[label]:.1f} ms (median of {args.runs})")
+        for cumulative, name in sorted(entries, reverse=True)[:args.top]:
+            print(f"    {cumulative / 1000:8.1f} ms  {name.strip()}")
+
+    baseline = results['full core']
+    print("\nSummary (relative to full core):")
+    for label, ms in results.items():
+        print(f"  {label:<16} {ms:8.1f} ms  {ms / baseline:6.1%}")
+
+if __name__ == "__main__":
+    main()
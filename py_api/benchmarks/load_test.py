@@ -0,0 +1,317 @@
+"""
+HTTP Load Test for the Flask and FastAPI Services
+Drives /predict (Flask) and /grade, /forecast-yield, /recommendations
+(FastAPI) with request parameters sampled from robusta_coffee_dataset.csv,
+and reports throughput and p50/p95/p99 latency per endpoint, client
+concurrency and server configuration. Results are written as JSON so runs
+on different configurations (or before/after a change) can be compared.
+
+By default the harness starts the server itself, once per worker count:
+FastAPI under uvicorn (--workers N), Flask under gunicorn with
+api/gunicorn.conf.py (API_WORKERS=N) or, with --flask-server dev, the
+single-process Flask development server.
+Pass --url to load an already running server instead (any config; name
+it with --label).
+
+The client is one asyncio process, closed-loop: each of the C concurrent
+users sends its next request as soon as the previous one returns. Keep an
+eye on the client's own CPU: on a small machine it competes with the server.
+
+Usage (from py_api/):
+    python benchmarks/load_test.py --service fastapi --workers 1,2,4 --concurrency 1,16,64
+    python benchmarks/load_test.py --service flask --duration 20 --out flask.json
+    python benchmarks/load_test.py --service flask --flask-server dev --out flask-dev.json
+    python benchmarks/load_test.py --service fastapi --url http://10.0.0.5:8000 --label "prod x4"
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import json
+import os
+import platform
+import signal
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+import numpy as np
+import pandas as pd
+
+PY_API = Path(__file__).resolve().parent.parent
+API_DIR = PY_API.parent / "api"
+sys.path.insert(0, str(PY_API))
+
+from ml_backend.robusta_ml_core import engineer_features
+
+DATASET = PY_API / "robusta_coffee_dataset.csv"
+
+# A request: (method, path, query params, JSON body)
+Request = Tuple[str, str, Optional[Dict[str, Any]], Optional[Dict[str, Any]]]
+
+# =====================================
+# REQUEST PARAMETERS
+# =====================================
+
+def _grade_body(row: Dict[str, Any], rng: np.random.Generator) -> Dict[str, Any]:
+    return {
+        'plant_age_months': int(row['plant_age_months']),
+        'bean_screen_size_mm': round(float(row['bean_screen_size_mm']), 2),
+        'primary_defects': min(int(row['primary_defects']), 50),
+        'secondary_defects': min(int(row['secondary_defects']), 50),
+        'elevation_masl': float(row['elevation_masl']),
+        'monthly_temp_avg_c': float(row['monthly_temp_avg_c']),
+        'monthly_rainfall_mm': float(row['monthly_rainfall_mm']),
+        'soil_pH': float(row['soil_pH']),
+        'soil_moisture_pct': float(row['soil_moisture_pct'])
+    }
+
+def _forecast_body(row: Dict[str, Any], rng: np.random.Generator) -> Dict[str, Any]:
+    # Management practices are not in the dataset: drawn uniformly
+    return {
+        'plant_age_months': int(row['plant_age_months']),
+        'farm_area_ha': float(row['farm_area_hectares']),
+        'elevation_masl': float(row['elevation_masl']),
+        'monthly_temp_avg_c': float(row['monthly_temp_avg_c']),
+        'monthly_rainfall_mm': float(row['monthly_rainfall_mm']),
+        'soil_pH': float(row['soil_pH']),
+        'soil_moisture_pct': float(row['soil_moisture_pct']),
+        'fertilization_type': str(rng.choice(['Organic', 'Non-Organic'])),
+        'fertilization_frequency': int(rng.integers(1, 6)),
+        'pest_management_frequency': int(rng.integers(1, 6)),
+        'forecast_years': int(rng.integers(1, 11))
+    }
+
+def _predict_params(row: Dict[str, Any], rng: np.random.Generator) -> Dict[str, Any]:
+    # Processing method and color are not in the dataset: drawn uniformly
+    return {
+        'altitude': row['elevation_masl'],
+        'bag_weight': 60,
+        'processing_method': int(rng.integers(0, 2)),
+        'colors': int(rng.integers(0, 3)),
+        'moisture': row['bean_moisture_pct'],
+        'category_one_defects': int(row['primary_defects']),
+        'category_two_defects': int(row['secondary_defects'])
+    }
+
+ENDPOINTS: Dict[str, Tuple[str, str, Callable]] = {
+    'predict': ('flask', 'GET', _predict_params),
+    'grade': ('fastapi', 'POST', _grade_body),
+    'forecast-yield': ('fastapi', 'POST', _forecast_body),
+    'recommendations': ('fastapi', 'POST', _grade_body)
+}
+
+def sample_requests(endpoint: str, count: int, seed: int = 0) -> List[Request]:
+    """Requests for one endpoint built from randomly drawn dataset rows"""
+    _, method, build = ENDPOINTS[endpoint]
+    rng = np.random.default_rng(seed)
+    df = engineer_features(pd.read_csv(DATASET))
+    rows = df.iloc[rng.integers(0, len(df), count)].to_dict('records')
+    requests = []
+    for row in rows:
+        values = build(row, rng)
+        if method == 'GET':
+            requests.append((method, f"/{endpoint}", values, None))
+        else:
+            requests.append((method, f"/{endpoint}", None, values))
+    return requests
+
+# =====================================
+# SERVERS
+# =====================================
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def server_command(service: str, workers: int, port: int, flask_server: str = 'gunicorn') -> Tuple[str, List[str], Path, Dict[str, str]]:
+    """Label, command line, working directory and environment for a local server"""
+    env = {**os.environ, 'PORT': str(port), 'HOST': '127.0.0.1', 'API_WORKERS': str(workers)}
+    if service == 'fastapi':
+        return (f"uvicorn x{workers}", [
+            sys.executable, "-m", "uvicorn", "ml_backend.fastapi_app:app",
+            "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers),
+            "--log-level", "warning", "--no-access-log"
+        ], PY_API, env)
+    if flask_server == 'dev':
+        if workers != 1:
+            raise SystemExit("The Flask development server runs a single process (use --workers 1)")
+        return ("flask dev server", [sys.executable, "coffee_grading_api.py"], API_DIR, env)
+    if importlib.util.find_spec("gunicorn") is None:
+        raise SystemExit("gunicorn is not installed (pip install gunicorn, or use --flask-server dev)")
+    threads = os.environ.get('API_THREADS', '4')
+    return (f"gunicorn x{workers}/{threads}t", [
+        sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "wsgi:app"
+    ], API_DIR, env)
+
+class Server:
+    """A server process for the duration of a with block"""
+
+    def __init__(self, service: str, workers: int, flask_server: str = 'gunicorn', startup_timeout: float = 60.0):
+        self.port = _free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.label, self.command, self.cwd, self.env = server_command(service, workers, self.port, flask_server)
+        self.startup_timeout = startup_timeout
+
+    def __enter__(self) -> "Server":
+        # Own process group, so uvicorn/gunicorn workers are stopped too
+        self.process = subprocess.Popen(
+            self.command, cwd=self.cwd, env=self.env, start_new_session=True,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        deadline = time.monotonic() + self.startup_timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise SystemExit(f"{self.label} exited during start-up: {' '.join(self.command)}")
+            try:
+                if httpx.get(f"{self.url}/health", timeout=1.0).status_code == 200:
+                    return self
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.2)
+        self.__exit__()
+        raise SystemExit(f"{self.label} did not become healthy within {self.startup_timeout:.0f}s")
+
+    def __exit__(self, *exc) -> None:
+        try:
+            os.killpg(self.process.pid, signal.SIGTERM)
+            self.process.wait(timeout=15)
+        except ProcessLookupError:
+            pass
+        except subprocess.TimeoutExpired:
+            os.killpg(self.process.pid, signal.SIGKILL)
+            self.process.wait()
+
+# =====================================
+# LOAD GENERATOR
+# =====================================
+
+async def drive(url: str, requests: List[Request], concurrency: int, duration: float, warmup: float) -> Dict[str, Any]:
+    """
+    Closed-loop load: `concurrency` users send requests back to back
+
+    Requests that start during the warm-up are sent but not counted.
+    """
+    latencies: List[float] = []
+    errors = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30.0) as client:
+        loop_start = time.perf_counter()
+        measure_start = loop_start + warmup
+        end = measure_start + duration
+
+        async def user(index: int) -> None:
+            nonlocal errors
+            i = index
+            while True:
+                start = time.perf_counter()
+                if start >= end:
+                    return
+                method, path, params, body = requests[i % len(requests)]
+                i += concurrency
+                try:
+                    response = await client.request(method, path, params=params, json=body)
+                    ok = response.status_code == 200
+                except httpx.HTTPError:
+                    ok = False
+                if start >= measure_start:
+                    if ok:
+                        latencies.append(time.perf_counter() - start)
+                    else:
+                        errors += 1
+
+        await asyncio.gather(*(user(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - measure_start
+
+    ms = np.array(latencies) * 1000
+    summary = {
+        "requests": len(latencies),
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed > 0 else 0.0
+    }
+    if len(ms):
+        p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+        summary["latency_ms"] = {
+            "mean": round(float(ms.mean()), 3), "p50": round(float(p50), 3), "p95": round(float(p95), 3),
+            "p99": round(float(p99), 3), "max": round(float(ms.max()), 3)
+        }
+    return summary
+
+# =====================================
+# MAIN
+# =====================================
+
+def _int_list(text: str) -> List[int]:
+    return [int(v) for v in text.split(",") if v.strip()]
+
+def _print_run(run: Dict[str, Any]) -> None:
+    latency = run.get("latency_ms", {})
+    print(
+        f"{run['server']:<18} {run['endpoint']:<16} {run['concurrency']:>5} {run['throughput_rps']:>9.1f} "
+        f"{latency.get('p50', 0):>8.2f} {latency.get('p95', 0):>8.2f} {latency.get('p99', 0):>8.2f} {run['errors']:>7}",
+        flush=True
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--service", choices=["fastapi", "flask"], required=True)
+    parser.add_argument("--endpoints", help="Comma-separated endpoints (default: all of the service's)")
+    parser.add_argument("--workers", type=_int_list, default=[1], help="Server worker counts to start, e.g. 1,2,4")
+    parser.add_argument("--concurrency", type=_int_list, default=[1, 8, 32], help="Concurrent users, e.g. 1,8,32")
+    parser.add_argument("--duration", type=float, default=10.0, help="Measured seconds per run")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Unmeasured seconds before each run")
+    parser.add_argument("--samples", type=int, default=2000, help="Distinct requests drawn from the dataset")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--flask-server", choices=["gunicorn", "dev"], default="gunicorn",
+                        help="Flask server to start (threads per gunicorn worker: API_THREADS)")
+    parser.add_argument("--url", help="Load this running server instead of starting one")
+    parser.add_argument("--label", default="external", help="Name of the --url server's configuration")
+    parser.add_argument("--out", type=Path, help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    endpoints = args.endpoints.split(",") if args.endpoints else [
+        name for name, (service, _, _) in ENDPOINTS.items() if service == args.service
+    ]
+    for endpoint in endpoints:
+        if ENDPOINTS.get(endpoint, (None,))[0] != args.service:
+            parser.error(f"{endpoint!r} is not a {args.service} endpoint")
+    requests = {e: sample_requests(e, args.samples, args.seed) for e in endpoints}
+
+    runs: List[Dict[str, Any]] = []
+
+    def load(url: str, server: str, workers: Optional[int]) -> None:
+        for endpoint in endpoints:
+            for concurrency in args.concurrency:
+                result = asyncio.run(drive(url, requests[endpoint], concurrency, args.duration, args.warmup))
+                run = {"service": args.service, "server": server, "server_workers": workers,
+                       "endpoint": endpoint, "concurrency": concurrency, **result}
+                runs.append(run)
+                _print_run(run)
+
+    print(f"{'server':<18} {'endpoint':<16} {'conc':>5} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    if args.url:
+        load(args.url.rstrip("/"), args.label, None)
+    else:
+        for workers in args.workers:
+            with Server(args.service, workers, args.flask_server) as server:
+                load(server.url, server.label, workers)
+
+    if args.out:
+        args.out.write_text(json.dumps({
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "machine": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+            "settings": {
+                "duration": args.duration, "warmup": args.warmup, "samples": args.samples, "seed": args.seed
+            },
+            "runs": runs
+        }, indent=2))
+        print(f"\nWrote {len(runs)} runs to {args.out}")
+
+if __name__ == "__main__":
+    main()
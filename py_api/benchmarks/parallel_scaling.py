@@ -0,0 +1,99 @@
+"""
+Core Scaling of the Process-Parallel Scoring Engine
+Scores a synthetic table with score_parallel at 1..N workers and reports
+throughput and speedup over the single-process batch function. Each worker
+count reuses one process pool across rounds, so pool start-up is excluded.
+Also checks that every parallel result matches the single-process one.
+
+Usage (from py_api/):
+    python benchmarks/parallel_scaling.py [--kind grade] [--rows 4000000] [--max-workers N]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ml_backend.parallel import SCORERS, score_parallel
+
+def synthetic_columns(kind: str, rows: int, seed: int = 0) -> Dict[str, np.ndarray]:
+    """Random inputs in the ranges the API accepts"""
+    rng = np.random.default_rng(seed)
+    if kind == 'coffee_grade':
+        return {
+            'altitude': rng.uniform(200, 1500, rows),
+            'processing_method': rng.integers(0, 2, rows).astype(float),
+            'colors': rng.integers(0, 3, rows).astype(float),
+            'moisture': rng.uniform(8, 16, rows),
+            'category_one_defects': rng.integers(0, 10, rows).astype(float),
+            'category_two_defects': rng.integers(0, 20, rows).astype(float)
+        }
+    columns = {
+        'bean_screen_size_mm': rng.uniform(5.0, 8.0, rows),
+        'primary_defects': rng.integers(0, 12, rows).astype(float),
+        'secondary_defects': rng.integers(0, 30, rows).astype(float),
+        'elevation_masl': rng.uniform(200, 1500, rows),
+        'monthly_temp_avg_c': rng.uniform(15, 30, rows),
+        'monthly_rainfall_mm': rng.uniform(50, 400, rows),
+        'soil_pH': rng.uniform(4.5, 7.5, rows),
+        'soil_moisture_pct': rng.uniform(10, 45, rows)
+    }
+    if kind == 'forecast':
+        columns.update({
+            'plant_age_months': rng.integers(12, 240, rows).astype(float),
+            'farm_area_ha': rng.uniform(0.5, 10, rows),
+            'fertilization_frequency': rng.integers(1, 6, rows).astype(float),
+            'pest_management_frequency': rng.integers(1, 6, rows).astype(float)
+        })
+    return columns
+
+def same_result(a: Dict[str, Any], b: Dict[str, Any]) -> bool:
+    return a.keys() == b.keys() and all(np.array_equal(np.asarray(a[k]), np.asarray(b[k])) for k in a)
+
+def timed(fn, rounds: int) -> float:
+    """Median seconds over the rounds"""
+    times = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--kind", choices=sorted(SCORERS), default="grade", help="Scorer to run")
+    parser.add_argument("--rows", type=int, default=None,
+                        help="Input rows (default 4,000,000; 200,000 for forecast)")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1, help="Highest worker count")
+    parser.add_argument("--rounds", type=int, default=3, help="Timing rounds per worker count")
+    args = parser.parse_args()
+
+    rows = args.rows or (200000 if args.kind == 'forecast' else 4000000)
+    columns = synthetic_columns(args.kind, rows)
+    scorer = SCORERS[args.kind]
+
+    expected = scorer(columns, 0)
+    baseline = timed(lambda: scorer(columns, 0), args.rounds)
+
+    print(f"{args.kind}: {rows:,} rows, {os.cpu_count()} cores")
+    print(f"{'workers':>8} {'seconds':>9} {'rows/s':>12} {'speedup':>8}")
+    print(f"{'inline':>8} {baseline:>9.3f} {rows / baseline:>12,.0f} {1.0:>7.2f}x")
+    for workers in range(1, args.max_workers + 1):
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            run = lambda: score_parallel(args.kind, columns, workers=workers, executor=pool)
+            if not same_result(run(), expected):
+                print(f"FAIL: {workers}-worker result differs from the single-process one")
+                sys.exit(1)
+            seconds = timed(run, args.rounds)
+        print(f"{workers:>8} {seconds:>9.3f} {rows / seconds:>12,.0f} {baseline / seconds:>7.2f}x")
+
+if __name__ == "__main__":
+    main()
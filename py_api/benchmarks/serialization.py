@@ -0,0 +1,84 @@
+"""
+Response Serialization Benchmark
+Compares FastAPI's default path (jsonable_encoder + stdlib json, as used by
+JSONResponse) with ml_backend.serialization.dumps, for a forecast response and
+a large batch-grading payload, in records and columnar shapes.
+
+Usage (from py_api/):
+    python benchmarks/serialization.py [--rows 10000]
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+from fastapi.encoders import jsonable_encoder
+
+from ml_backend.forecasting import predict_yield
+from ml_backend.scoring_batch import predict_grade_batch
+from ml_backend.serialization import dumps, to_columnar, orjson
+
+def default_render(content: Any) -> bytes:
+    """What FastAPI does for a returned dict with the stock JSONResponse"""
+    return json.dumps(
+        jsonable_encoder(content), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+def best_ms(fn: Callable[[Any], bytes], content: Any, repeat: int) -> float:
+    rounds = []
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            fn(content)
+        rounds.append((time.perf_counter() - start) / repeat * 1000)
+    return statistics.median(rounds)
+
+def batch_records(rows: int):
+    rng = np.random.default_rng(0)
+    columns = {
+        'plant_age_months': rng.integers(12, 240, rows),
+        'bean_screen_size_mm': rng.uniform(5.0, 8.0, rows),
+        'primary_defects': rng.integers(0, 6, rows),
+        'secondary_defects': rng.integers(0, 20, rows),
+        'elevation_masl': rng.uniform(200, 1600, rows),
+        'monthly_temp_avg_c': rng.uniform(15, 30, rows),
+        'monthly_rainfall_mm': rng.uniform(50, 400, rows),
+        'soil_pH': rng.uniform(4.5, 7.5, rows),
+        'soil_moisture_pct': rng.uniform(10, 40, rows)
+    }
+    result = predict_grade_batch(columns)
+    keys = list(result)
+    return [dict(zip(keys, values)) for values in zip(*(result[k].tolist() for k in keys))]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000, help="Rows in the batch payload")
+    args = parser.parse_args()
+
+    forecast = predict_yield({'plant_age_months': 48, 'farm_area_ha': 2.5, 'forecast_years': 10})
+    forecast_columnar = dict(forecast, forecast_data=to_columnar(forecast['forecast_data']))
+    records = batch_records(args.rows)
+
+    payloads = [
+        ("forecast, records", {"success": True, "data": forecast}, 2000),
+        ("forecast, columnar", {"success": True, "data": forecast_columnar}, 2000),
+        (f"batch {args.rows}, records", {"success": True, "data": records}, 3),
+        (f"batch {args.rows}, columnar", {"success": True, "data": to_columnar(records)}, 3)
+    ]
+
+    print(f"encoder for dumps(): {'orjson' if orjson is not None else 'stdlib json'}")
+    print(f"{'payload':<26} {'default ms':>11} {'dumps ms':>10} {'speedup':>8} {'bytes':>11}")
+    for name, content, repeat in payloads:
+        default_ms = best_ms(default_render, content, repeat)
+        fast_ms = best_ms(dumps, content, repeat)
+        print(f"{name:<26} {default_ms:>11.3f} {fast_ms:>10.3f} {default_ms / fast_ms:>7.1f}x {len(dumps(content)):>11,}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Startup-Time Regression Check for py_api/app.py
+Verifies that the helpers the lightweight app imports load without pulling in
+the Streamlit dashboard, Streamlit itself or scikit-learn, and within a time
+budget. Exits non-zero on regression so it can gate a deploy.
+
+Usage (from py_api/):
+    python benchmarks/startup_time.py [--budget-ms 1500] [--runs 5]
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+PY_API_DIR = Path(__file__).resolve().parent.parent
+
+# Imports app.py needs besides Streamlit/plotly themselves
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+from ml_backend.forecasting import calculate_yield_forecast
+from ml_backend.scoring import calculate_pns_grade, calculate_fine_premium_grade, classify_bean_size
+calculate_yield_forecast(48, 1.0, 0.8, 0.8, 'Organic', 3, 3, 6.5, 0.8)
+elapsed_ms = (time.perf_counter() - start) * 1000
+print(json.dumps({
+    'elapsed_ms': elapsed_ms,
+    'forbidden': [m for m in ('robusta_coffee_dashboard', 'streamlit', 'sklearn') if m in sys.modules]
+}))
+"""
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=1500.0, help="Maximum median import + first-call time")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to measure")
+    args = parser.parse_args()
+
+    timings = []
+    forbidden = set()
+    for _ in range(args.runs):
+        proc = subprocess.run(
+            [sys.executable, "-c", PROBE],
+            cwd=PY_API_DIR, capture_output=True, text=True, check=True
+        )
+        result = json.loads(proc.stdout)
+        timings.append(result['elapsed_ms'])
+        forbidden.update(result['forbidden'])
+
+    median_ms = statistics.median(timings)
+    print(f"Forecast/grading helpers: median {median_ms:.1f} ms, max {max(timings):.1f} ms "
+          f"over {args.runs} runs (budget {args.budget_ms:.0f} ms)")
+
+    failures = []
+    if forbidden:
+        failures.append(f"heavy modules imported as a side effect: {', '.join(sorted(forbidden))}")
+    if median_ms > args.budget_ms:
+        failures.append(f"median {median_ms:.1f} ms exceeds budget {args.budget_ms:.0f} ms")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print("OK")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""
+Benchmark Suite for the Scoring, Forecasting and Training Hot Paths
+Times each case (fastest of several rounds, the figure least disturbed by
+other load on the machine), compares it with the stored
+baselines in benchmarks/baselines.json and exits with status 1 if any case
+is slower than its baseline by more than the threshold. Run it before each
+deploy, on the machine the baselines were recorded on.
+
+Cases: predict_grade, predict_coffee_grade, generate_recommendations and
+predict_yield per call; engineer_features on 15k/150k/1.5M synthetic rows;
+both training functions and save_model/load_model on 15k rows.
+
+Usage (from py_api/):
+    python benchmarks/suite.py                  # compare with baselines
+    python benchmarks/suite.py --quick          # skip the slow cases (1.5M rows, training)
+    python benchmarks/suite.py -k features      # only cases whose name contains 'features'
+    python benchmarks/suite.py --save           # record new baselines
+    python benchmarks/suite.py --json out.json  # also write the results
+"""
+
+import argparse
+import functools
+import json
+import math
+import os
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ml_backend import robusta_ml_core as core
+from ml_backend.scoring import predict_grade, predict_coffee_grade, generate_recommendations
+from ml_backend.forecasting import predict_yield
+from ml_backend.synthetic import generate
+
+BASELINES = Path(__file__).resolve().parent / "baselines.json"
+
+# Allowed slowdown over the baseline before the suite fails
+DEFAULT_THRESHOLD = 0.25
+
+class Case(NamedTuple):
+    name: str
+    setup: Callable[[], Callable[[], Any]]
+    slow: bool
+
+CASES: List[Case] = []
+
+def case(name: str, slow: bool = False):
+    """Register a setup function returning the zero-argument callable to time"""
+    def register(setup):
+        CASES.append(Case(name, setup, slow))
+        return setup
+    return register
+
+# =====================================
+# FIXTURES
+# =====================================
+
+GRADE_PARAMS = {
+    'plant_age_months': 48, 'bean_screen_size_mm': 6.8, 'primary_defects': 1, 'secondary_defects': 4,
+    'elevation_masl': 950, 'monthly_temp_avg_c': 22.5, 'monthly_rainfall_mm': 180,
+    'soil_pH': 5.9, 'soil_moisture_pct': 28
+}
+YIELD_PARAMS = {
+    'plant_age_months': 48, 'farm_area_ha': 2.5, 'elevation_masl': 900, 'monthly_temp_avg_c': 22.0,
+    'monthly_rainfall_mm': 180, 'soil_pH': 5.8, 'soil_moisture_pct': 30, 'fertilization_type': 'Organic',
+    'fertilization_frequency': 4, 'pest_management_frequency': 3, 'forecast_years': 5
+}
+
+@functools.lru_cache(maxsize=None)
+def dataset(rows: int):
+    return generate(rows, seed=rows)
+
+@functools.lru_cache(maxsize=None)
+def engineered(rows: int):
+    return core.engineer_features(dataset(rows))
+
+# =====================================
+# CASES
+# =====================================
+
+@case("scoring/predict_grade")
+def _():
+    return lambda: predict_grade(GRADE_PARAMS)
+
+@case("scoring/predict_coffee_grade")
+def _():
+    # String arguments, as the Flask API passes them
+    return lambda: predict_coffee_grade(
+        altitude='900', bag_weight='60', processing_method='0', colors='1', moisture='11.5',
+        category_one_defects='1', category_two_defects='4'
+    )
+
+@case("scoring/generate_recommendations")
+def _():
+    return lambda: generate_recommendations(GRADE_PARAMS)
+
+@case("forecast/predict_yield")
+def _():
+    return lambda: predict_yield(YIELD_PARAMS)
+
+for _rows, _slow in ((15000, False), (150000, False), (1500000, True)):
+    @case(f"features/engineer_features[{_rows // 1000}k]", slow=_slow)
+    def _(rows=_rows):
+        df = dataset(rows)
+        return lambda: core.engineer_features(df)
+
+@case("training/train_grade_classification_model[15k]", slow=True)
+def _():
+    df = engineered(15000)
+    return lambda: core.train_grade_classification_model(df)
+
+@case("training/train_defect_prediction_model[15k]", slow=True)
+def _():
+    df = engineered(15000)
+    return lambda: core.train_defect_prediction_model(df)
+
+@functools.lru_cache(maxsize=None)
+def _trained_model():
+    results = core.train_grade_classification_model(engineered(15000))
+    best = results[results['best_model']]
+    # Keep the benchmark's artifacts out of the served models directory
+    core.MODEL_DIR = Path(tempfile.mkdtemp(prefix="ml_benchmark_models_"))
+    return best
+
+@case("persistence/save_model", slow=True)
+def _():
+    best = _trained_model()
+    return lambda: core.save_model(best['model'], best['scaler'], 'benchmark', best['feature_columns'])
+
+@case("persistence/load_model", slow=True)
+def _():
+    best = _trained_model()
+    core.save_model(best['model'], best['scaler'], 'benchmark', best['feature_columns'])
+    return lambda: core.load_model('benchmark')
+
+# =====================================
+# RUNNER
+# =====================================
+
+def measure(fn: Callable[[], Any], rounds: int = 5, min_round_seconds: float = 0.2) -> float:
+    """
+    Seconds per call in the fastest round
+
+    Each round repeats the call enough times to last about
+    min_round_seconds, so fast functions are timed over many calls.
+    """
+    start = time.perf_counter()
+    fn()
+    first = time.perf_counter() - start
+    loops = max(1, math.ceil(min_round_seconds / max(first, 1e-9)))
+    if first > 1.0:
+        rounds = min(rounds, 3)
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        timings.append((time.perf_counter() - start) / loops)
+    return min(timings)
+
+def machine() -> Dict[str, Any]:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpus": os.cpu_count()
+    }
+
+def format_seconds(seconds: float) -> str:
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.1f} us"
+    if seconds < 1:
+        return f"{seconds * 1e3:.1f} ms"
+    return f"{seconds:.2f} s"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-k", dest="match", default="", help="Only run cases whose name contains this")
+    parser.add_argument("--quick", action="store_true", help="Skip slow cases (1.5M rows, training, persistence)")
+    parser.add_argument("--save", action="store_true", help="Store the results as the new baselines")
+    parser.add_argument("--threshold", type=float, default=None,
+                        help=f"Allowed slowdown as a fraction (default: stored, else {DEFAULT_THRESHOLD})")
+    parser.add_argument("--json", type=Path, help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    stored = json.loads(BASELINES.read_text()) if BASELINES.exists() else {}
+    baselines = stored.get("results", {})
+    threshold = args.threshold if args.threshold is not None else stored.get("threshold", DEFAULT_THRESHOLD)
+    if baselines and not args.save and stored.get("machine") != machine():
+        print(f"warning: baselines were recorded on {stored.get('machine')}; comparisons may not hold\n")
+
+    selected = [c for c in CASES if args.match in c.name and not (args.quick and c.slow)]
+    results: Dict[str, float] = {}
+    regressions = []
+    print(f"{'case':<50} {'best':>10} {'baseline':>10} {'change':>8}")
+    for c in selected:
+        seconds = measure(c.setup())
+        results[c.name] = seconds
+        baseline = baselines.get(c.name)
+        if baseline:
+            change = seconds / baseline - 1
+            flag = "  REGRESSION" if change > threshold else ""
+            if flag:
+                regressions.append(c.name)
+            print(f"{c.name:<50} {format_seconds(seconds):>10} {format_seconds(baseline):>10} {change:>+7.0%}{flag}")
+        else:
+            print(f"{c.name:<50} {format_seconds(seconds):>10} {'-':>10} {'':>8}")
+
+    if args.json:
+        args.json.write_text(json.dumps({"machine": machine(), "results": results}, indent=2))
+    if args.save:
+        merged = {**baselines, **results}
+        BASELINES.write_text(json.dumps(
+            {"machine": machine(), "threshold": threshold, "results": dict(sorted(merged.items()))}, indent=2
+        ) + "\n")
+        print(f"\nSaved {len(results)} baselines to {BASELINES}")
+    elif regressions:
+        print(f"\nFAIL: {len(regressions)} case(s) slower than baseline by more than {threshold:.0%}")
+        sys.exit(1)
+    else:
+        print(f"\nOK: no case slower than baseline by more than {threshold:.0%}")
+
+if __name__ == "__main__":
+    main()
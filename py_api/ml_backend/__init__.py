@@ -1,24 +1,39 @@
 """
 Robusta Coffee ML Backend Package
+
+Public names are imported lazily (PEP 562): importing the package is free, the
+pure-Python scoring module loads on first use of a grading function, and the
+pandas/scikit-learn core only loads when a data, forecasting or training
+function is accessed.
 """
 
+import importlib
+
 __version__ = "1.0.0"
 
-from .robusta_ml_core import (
-    load_data,
-    engineer_features,
-    calculate_pns_grade,
-    calculate_fine_premium_grade,
-    classify_bean_size,
-    predict_grade,
-    predict_yield,
-    predict_quality_distribution,
-    generate_recommendations,
-    train_grade_classification_model,
-    train_defect_prediction_model,
-    save_model,
-    load_model
-)
+# Public name -> submodule that defines it
+_LAZY_ATTRS = {
+    # Light, pure-Python scoring
+    'calculate_pns_grade': 'scoring',
+    'calculate_fine_premium_grade': 'scoring',
+    'classify_bean_size': 'scoring',
+    'predict_grade': 'scoring',
+    'predict_quality_distribution': 'scoring',
+    'generate_recommendations': 'scoring',
+    'predict_coffee_grade': 'scoring',
+    # Column-at-a-time scoring (NumPy)
+    'predict_grade_batch': 'scoring_batch',
+    'predict_coffee_grade_batch': 'scoring_batch',
+    'score_parallel': 'parallel',
+    # Heavy core (pandas + scikit-learn; forecasting needs pandas only)
+    'load_data': 'robusta_ml_core',
+    'engineer_features': 'robusta_ml_core',
+    'predict_yield': 'forecasting',
+    'train_grade_classification_model': 'robusta_ml_core',
+    'train_defect_prediction_model': 'robusta_ml_core',
+    'save_model': 'robusta_ml_core',
+    'load_model': 'robusta_ml_core'
+}
 
 __all__ = [
     'load_data',
@@ -30,9 +45,24 @@ __all__ = [
     'predict_yield',
     'predict_quality_distribution',
     'generate_recommendations',
+    'predict_coffee_grade',
+    'predict_grade_batch',
+    'predict_coffee_grade_batch',
+    'score_parallel',
     'train_grade_classification_model',
     'train_defect_prediction_model',
     'save_model',
     'load_model'
 ]
 
+def __getattr__(name):
+    module_name = _LAZY_ATTRS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    # Cache so later lookups bypass __getattr__
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRS))
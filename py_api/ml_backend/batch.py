@@ -0,0 +1,299 @@
+"""
+Offline Batch Scoring CLI for the Robusta Coffee ML Backend
+Runs the scoring engine over whole CSV or Parquet files for nightly jobs,
+without going through the HTTP API. Input columns use the API field names
+(see GradeRequest / YieldRequest / RecommendationRequest); missing columns
+and empty cells take the API defaults.
+
+Usage (from py_api/):
+    python -m ml_backend.batch grade     --in farms.parquet --out graded.parquet
+    python -m ml_backend.batch grade     --samples --in sheets.csv --out graded.csv
+    python -m ml_backend.batch forecast  --in farms.csv --out forecast.parquet --id-column farm_id
+    python -m ml_backend.batch recommend --in farms.csv --out recommendations.csv
+
+Chunks of --chunk-rows rows are scored in parallel across --workers
+processes and written in input order. Parquet needs pyarrow; the progress
+bar uses tqdm when installed.
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from .scoring import generate_recommendations
+from .scoring_batch import predict_grade_batch, predict_coffee_grade_batch
+from .forecasting import predict_yield_table
+from .parallel import imap_ordered
+
+try:
+    from tqdm import tqdm
+except ImportError:  # optional: pip install tqdm
+    tqdm = None
+
+DEFAULT_CHUNK_ROWS = 100000
+
+# Recommendation categories, written as one text column each
+RECOMMENDATION_CATEGORIES = ('critical', 'warnings', 'suggestions', 'maintenance')
+
+# =====================================
+# CHUNK TASKS (run in worker processes)
+# =====================================
+
+def _row_params(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Rows as parameter dicts, leaving out empty cells so defaults apply"""
+    return [
+        {key: value for key, value in row.items() if value == value}
+        for row in df.to_dict('records')
+    ]
+
+def grade_chunk(df: pd.DataFrame, offset: int, samples: bool = False, id_column: Optional[str] = None) -> pd.DataFrame:
+    """Input rows with the predict_grade (or predict_coffee_grade) outputs appended"""
+    columns = {name: df[name].to_numpy() for name in df.columns}
+    graded = predict_coffee_grade_batch(columns) if samples else predict_grade_batch(columns)
+    return df.assign(**graded)
+
+def forecast_chunk(df: pd.DataFrame, offset: int, samples: bool = False, id_column: Optional[str] = None) -> pd.DataFrame:
+    """One row per (input row, forecast year); row_index counts from the file start"""
+    table = predict_yield_table(_row_params(df))
+    result = pd.DataFrame(table)
+    positions = result.pop('request_index').to_numpy()
+    result.insert(0, 'row_index', positions + offset)
+    if id_column is not None:
+        result.insert(0, id_column, df[id_column].to_numpy()[positions])
+    return result
+
+def recommend_chunk(df: pd.DataFrame, offset: int, samples: bool = False, id_column: Optional[str] = None) -> pd.DataFrame:
+    """One row per input row with each recommendation category joined into text"""
+    records = [generate_recommendations(params) for params in _row_params(df)]
+    result = pd.DataFrame({
+        category: ["; ".join(rec.get(category, [])) for rec in records]
+        for category in RECOMMENDATION_CATEGORIES
+    })
+    result.insert(0, 'critical_count', [len(rec.get('critical', [])) for rec in records])
+    result.insert(0, 'row_index', np.arange(offset, offset + len(df)))
+    if id_column is not None:
+        result.insert(0, id_column, df[id_column].to_numpy())
+    return result
+
+TASKS: Dict[str, Callable[..., pd.DataFrame]] = {
+    'grade': grade_chunk,
+    'forecast': forecast_chunk,
+    'recommend': recommend_chunk
+}
+
+def score_chunk(task: Callable[..., pd.DataFrame], as_csv: bool, df: pd.DataFrame, offset: int) -> Tuple[int, Union[pd.DataFrame, bytes]]:
+    """
+    Run a chunk task, encoding the result as CSV in the worker when writing CSV
+
+    Float formatting dominates CSV output, so doing it here spreads it across
+    the workers instead of serialising it in the parent process.
+    """
+    result = task(df, offset)
+    if as_csv:
+        return len(df), result.to_csv(index=False, header=offset == 0).encode("utf-8")
+    return len(df), result
+
+# =====================================
+# FILE I/O
+# =====================================
+
+def _is_parquet(path: Path) -> bool:
+    return path.suffix.lower() in ('.parquet', '.pq')
+
+def _require_pyarrow():
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise SystemExit("Parquet files need pyarrow (pip install pyarrow)")
+    return pq
+
+def count_rows(path: Path) -> Optional[int]:
+    """Row count from Parquet metadata (None for CSV, which would need a full scan)"""
+    if _is_parquet(path):
+        return _require_pyarrow().ParquetFile(path).metadata.num_rows
+    return None
+
+def read_chunks(path: Path, chunk_rows: int, renames: Dict[str, str]) -> Iterator[pd.DataFrame]:
+    """Yield DataFrame chunks of a CSV or Parquet file"""
+    if _is_parquet(path):
+        parquet_file = _require_pyarrow().ParquetFile(path)
+        chunks = (batch.to_pandas() for batch in parquet_file.iter_batches(batch_size=chunk_rows))
+    else:
+        chunks = pd.read_csv(path, chunksize=chunk_rows)
+    for chunk in chunks:
+        yield chunk.rename(columns=renames) if renames else chunk
+
+class ChunkWriter:
+    """Appends result chunks to a Parquet file, or encoded CSV chunks to a CSV file"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.is_parquet = _is_parquet(path)
+        self._parquet_writer = None
+        self._csv_file = None if self.is_parquet else open(path, 'wb')
+
+    def write(self, chunk: Union[pd.DataFrame, bytes]) -> None:
+        if self._csv_file is not None:
+            self._csv_file.write(chunk)
+            return
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        if self._parquet_writer is None:
+            self._parquet_writer = pq.ParquetWriter(self.path, table.schema)
+        self._parquet_writer.write_table(table.cast(self._parquet_writer.schema))
+
+    def close(self) -> None:
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+        if self._csv_file is not None:
+            self._csv_file.close()
+
+# =====================================
+# EXECUTION
+# =====================================
+
+def _with_offsets(chunks: Iterator[pd.DataFrame]) -> Iterator[Tuple[pd.DataFrame, int]]:
+    offset = 0
+    for chunk in chunks:
+        yield chunk, offset
+        offset += len(chunk)
+
+def run_ordered(
+    task: Callable[[pd.DataFrame, int], Tuple[int, Any]],
+    chunks: Iterator[pd.DataFrame],
+    workers: int
+) -> Iterator[Tuple[int, Any]]:
+    """
+    Apply a task to each chunk, yielding (input rows, result) in input order
+
+    At most 2 x workers chunks are in flight, so memory stays bounded no
+    matter how large the input file is.
+    """
+    if workers <= 1:
+        for chunk, offset in _with_offsets(chunks):
+            yield task(chunk, offset)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from imap_ordered(pool, task, _with_offsets(chunks), window=2 * workers)
+
+class Progress:
+    """tqdm progress bar, or a plain counter on stderr without tqdm"""
+
+    def __init__(self, total: Optional[int], label: str):
+        self._bar = tqdm(total=total, unit='rows', desc=label, unit_scale=True) if tqdm else None
+        self._label = label
+        self._total = total
+        self._rows = 0
+        self._start = time.perf_counter()
+
+    def update(self, rows: int) -> None:
+        self._rows += rows
+        if self._bar is not None:
+            self._bar.update(rows)
+            return
+        if sys.stderr.isatty():
+            print("\r" + self._line(), end="", file=sys.stderr)
+
+    def _line(self) -> str:
+        rate = self._rows / max(time.perf_counter() - self._start, 1e-9)
+        of_total = f"/{self._total:,}" if self._total else ""
+        return f"{self._label}: {self._rows:,}{of_total} rows ({rate:,.0f} rows/s)"
+
+    def close(self) -> None:
+        if self._bar is not None:
+            self._bar.close()
+        elif sys.stderr.isatty():
+            print(file=sys.stderr)
+
+def run(
+    command: str,
+    in_path: Path,
+    out_path: Path,
+    workers: int = os.cpu_count() or 1,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    samples: bool = False,
+    id_column: Optional[str] = None,
+    renames: Optional[Dict[str, str]] = None,
+    show_progress: bool = True
+) -> Dict[str, Any]:
+    """
+    Score a whole file and write the results
+
+    Returns:
+        Summary with the number of input rows and elapsed seconds
+    """
+    if _is_parquet(in_path) or _is_parquet(out_path):
+        _require_pyarrow()
+    total = count_rows(in_path)
+    chunks = read_chunks(in_path, chunk_rows, renames or {})
+    writer = ChunkWriter(out_path)
+    task = partial(score_chunk, partial(TASKS[command], samples=samples, id_column=id_column), not writer.is_parquet)
+    progress = Progress(total, command) if show_progress else None
+    start = time.perf_counter()
+    rows_in = 0
+    try:
+        for rows, result in run_ordered(task, chunks, workers):
+            writer.write(result)
+            rows_in += rows
+            if progress is not None:
+                progress.update(rows)
+    finally:
+        writer.close()
+        if progress is not None:
+            progress.close()
+    return {
+        'rows': rows_in,
+        'seconds': round(time.perf_counter() - start, 2)
+    }
+
+def _parse_renames(pairs: List[str]) -> Dict[str, str]:
+    renames = {}
+    for pair in pairs:
+        source, sep, target = pair.partition('=')
+        if not sep or not source or not target:
+            raise argparse.ArgumentTypeError(f"--rename expects SOURCE=TARGET, got {pair!r}")
+        renames[source] = target
+    return renames
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m ml_backend.batch", description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("command", choices=sorted(TASKS), help="What to compute for each input row")
+    parser.add_argument("--in", dest="in_path", type=Path, required=True, help="Input .csv or .parquet file")
+    parser.add_argument("--out", dest="out_path", type=Path, required=True, help="Output .csv or .parquet file")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes (1 = no pool)")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS, help="Rows per chunk")
+    parser.add_argument("--samples", action="store_true",
+                        help="grade: input is a sample sheet with the Flask /predict columns")
+    parser.add_argument("--id-column", help="forecast/recommend: input column copied to every output row")
+    parser.add_argument("--rename", action="append", default=[], metavar="SOURCE=TARGET",
+                        help="Rename an input column to an API field name (repeatable)")
+    parser.add_argument("--quiet", action="store_true", help="No progress output")
+    args = parser.parse_args(argv)
+
+    try:
+        renames = _parse_renames(args.rename)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+    if not args.in_path.exists():
+        parser.error(f"Input file not found: {args.in_path}")
+
+    summary = run(
+        args.command, args.in_path, args.out_path,
+        workers=args.workers, chunk_rows=args.chunk_rows, samples=args.samples,
+        id_column=args.id_column, renames=renames, show_progress=not args.quiet
+    )
+    print(f"{args.command}: {summary['rows']:,} rows -> {args.out_path} ({summary['seconds']} s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Python Client Helpers for the Robusta Coffee ML API Bulk Endpoints
+Fetch /grade/batch and /forecast-yield/batch results straight into pandas,
+preferring the Arrow stream format when pyarrow is installed
+"""
+
+import gzip
+import json
+import urllib.request
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from .serialization import (
+    ARROW_STREAM_MEDIA_TYPE,
+    JSON_MEDIA_TYPE,
+    MSGPACK_MEDIA_TYPE,
+    available_table_formats,
+    brotli,
+    msgpack,
+    pa
+)
+
+DEFAULT_BASE_URL = "http://localhost:8000"
+
+def decode_body(body: bytes, content_encoding: Optional[str]) -> bytes:
+    """Undo gzip/br content encoding (urllib does not)"""
+    if content_encoding == "gzip":
+        return gzip.decompress(body)
+    if content_encoding == "br":
+        return brotli.decompress(body)
+    return body
+
+def read_table(body: bytes, content_type: str, content_encoding: Optional[str] = None) -> pd.DataFrame:
+    """
+    Load a bulk endpoint response body into a DataFrame
+
+    Arrow streams are converted column by column without going through
+    Python objects; JSON and MsgPack bodies may be records or columnar.
+
+    Args:
+        body: Raw response body
+        content_type: Response Content-Type
+        content_encoding: Response Content-Encoding, if any
+    """
+    body = decode_body(body, content_encoding)
+    media_type = content_type.split(";")[0].strip()
+
+    if media_type == ARROW_STREAM_MEDIA_TYPE:
+        return pa.ipc.open_stream(body).read_all().to_pandas(split_blocks=True)
+
+    if media_type == MSGPACK_MEDIA_TYPE:
+        payload = msgpack.unpackb(body, raw=False)
+    else:
+        payload = json.loads(body)
+    data = payload["data"]
+    if isinstance(data, dict):
+        return pd.DataFrame(data["data"], columns=data["columns"])
+    return pd.DataFrame.from_records(data)
+
+def fetch_table(
+    path: str,
+    rows: List[Dict[str, Any]],
+    base_url: str = DEFAULT_BASE_URL,
+    media_type: Optional[str] = None,
+    timeout: float = 60.0
+) -> pd.DataFrame:
+    """
+    POST rows to a bulk endpoint and return the result as a DataFrame
+
+    Args:
+        path: Endpoint path, e.g. '/grade/batch'
+        rows: Request rows (same fields as the single-row endpoint)
+        base_url: API base URL
+        media_type: Format to request (defaults to Arrow, then MsgPack,
+                    then JSON, depending on what is installed locally;
+                    the server answers 406 if it lacks the library)
+        timeout: Request timeout in seconds
+
+    Example:
+        df = fetch_table('/grade/batch', samples)
+    """
+    if media_type is None:
+        installed = available_table_formats()
+        media_type = next(
+            (f for f in (ARROW_STREAM_MEDIA_TYPE, MSGPACK_MEDIA_TYPE) if f in installed), JSON_MEDIA_TYPE
+        )
+    encodings = "br, gzip" if brotli is not None else "gzip"
+
+    request = urllib.request.Request(
+        base_url.rstrip("/") + path + "?shape=columnar",
+        data=json.dumps({"rows": rows}).encode("utf-8"),
+        headers={
+            "Content-Type": "application/json",
+            "Accept": media_type,
+            "Accept-Encoding": encodings
+        },
+        method="POST"
+    )
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return read_table(
+            response.read(),
+            response.headers.get("Content-Type", ""),
+            response.headers.get("Content-Encoding")
+        )
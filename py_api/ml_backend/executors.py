@@ -0,0 +1,148 @@
+"""
+Bounded Executors for the Robusta Coffee ML API
+Runs blocking work off the event loop with a hard cap on queued jobs, so a
+burst of heavy requests is rejected early instead of starving cheap ones
+"""
+
+import asyncio
+import contextvars
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+
+# Heavy pandas / scikit-learn work (model training) runs in processes
+HEAVY_WORKERS = int(os.environ.get('ML_HEAVY_WORKERS', min(2, os.cpu_count() or 1)))
+HEAVY_QUEUE = int(os.environ.get('ML_HEAVY_QUEUE', 4))
+
+# Served-model inference, reloads and /batch scoring run in threads (models live in this process)
+MODEL_WORKERS = int(os.environ.get('ML_MODEL_WORKERS', 4))
+MODEL_QUEUE = int(os.environ.get('ML_MODEL_QUEUE', 32))
+
+# Seconds clients are told to wait when an executor is saturated
+RETRY_AFTER = int(os.environ.get('ML_RETRY_AFTER', 5))
+
+class ExecutorSaturated(Exception):
+    """Raised when an executor already has its maximum number of jobs"""
+
+    def __init__(self, name: str, limit: int, retry_after: int):
+        super().__init__(f"{name} executor is busy ({limit} jobs running or queued), retry later")
+        self.name = name
+        self.limit = limit
+        self.retry_after = retry_after
+
+# =====================================
+# BOUNDED EXECUTOR
+# =====================================
+
+class BoundedExecutor:
+    """
+    Process or thread pool that admits at most ``workers + max_queue`` jobs.
+
+    A job counts against the limit until it actually finishes in the pool,
+    even if the awaiting request was cancelled, so the limit reflects real
+    load on the workers. The pool is created on first use.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        workers: int,
+        max_queue: int,
+        use_processes: bool = False,
+        retry_after: int = RETRY_AFTER
+    ):
+        """
+        Args:
+            name: Name used in errors and stats
+            workers: Number of worker processes or threads
+            max_queue: Jobs allowed to wait once every worker is busy
+            use_processes: Use a process pool instead of a thread pool
+            retry_after: Seconds suggested to clients when saturated
+        """
+        self.name = name
+        self.workers = max(1, workers)
+        self.max_queue = max(0, max_queue)
+        self.use_processes = use_processes
+        self.retry_after = retry_after
+        self._pool: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._rejected = 0
+
+    @property
+    def limit(self) -> int:
+        return self.workers + self.max_queue
+
+    def _get_pool(self) -> Executor:
+        if self._pool is None:
+            if self.use_processes:
+                # spawn: the server process runs threads (model watcher), which
+                # fork would copy in an undefined state
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context('spawn')
+                )
+            else:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=self.name)
+        return self._pool
+
+    def _release(self, _future: Any = None) -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run ``fn(*args)`` in the pool and await its result
+
+        Raises:
+            ExecutorSaturated: If the job limit is reached (nothing is queued)
+        """
+        with self._lock:
+            if self._in_flight >= self.limit:
+                self._rejected += 1
+                raise ExecutorSaturated(self.name, self.limit, self.retry_after)
+            self._in_flight += 1
+            try:
+                if not self.use_processes:
+                    # Threads see the caller's context (e.g. its active trace)
+                    fn, args = contextvars.copy_context().run, (fn, *args)
+                pool = self._get_pool()
+                future = pool.submit(fn, *args)
+            except BaseException:
+                self._in_flight -= 1
+                raise
+        future.add_done_callback(self._release)
+
+        try:
+            return await asyncio.wrap_future(future)
+        except BrokenProcessPool:
+            # A worker died (e.g. out of memory); start a fresh pool next time.
+            # Other jobs on the same pool fail too, and one of them may already
+            # have replaced it.
+            with self._lock:
+                if self._pool is pool:
+                    self._pool = None
+                else:
+                    pool = None
+            if pool is not None:
+                # Frees the broken pool's management thread and leftover workers
+                pool.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    def stats(self) -> Dict[str, Any]:
+        """Current load, for health checks"""
+        return {
+            'workers': self.workers,
+            'max_queue': self.max_queue,
+            'in_flight': self._in_flight,
+            'rejected': self._rejected
+        }
+
+    def shutdown(self) -> None:
+        """Stop the pool, letting running jobs finish"""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
@@ -1,39 +1,121 @@
 """
 FastAPI Server for Robusta Coffee ML API
 Exposes ML endpoints for grading, forecasting, and recommendations
+
+Execution model: cheap rule-based scoring and forecasting run inline on the
+event loop, training runs in a bounded process pool, and served-model
+inference runs in a bounded thread pool. When a pool is full the request is
+rejected with 503 and a Retry-After header instead of queueing indefinitely.
+
+Responses are rendered by ml_backend.serialization (orjson when installed);
+handlers return FastJSONResponse directly so FastAPI's generic encoder is
+skipped.
+
+Request counts, latency, batch sizes, model cache hits and inference time
+are exposed in the Prometheus text format at /metrics. Requests sending
+X-Trace: 1 (or all, with ML_TRACE=1) are traced stage by stage; see
+ml_backend.tracing.
 """
 
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, File, Header, HTTPException, Query, Request, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
-from typing import Optional, List, Dict, Any
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
+from typing import Optional, List, Dict, Any, Literal
 import uvicorn
 
+import os
 import sys
 from pathlib import Path
 
-# Add parent directory to path for imports
+# Add parent directory to path so the ml_backend package imports when run as a script
 sys.path.insert(0, str(Path(__file__).parent.parent))
-sys.path.insert(0, str(Path(__file__).parent))
 
-from robusta_ml_core import (
+from ml_backend.scoring import (
     predict_grade,
-    predict_yield,
     predict_quality_distribution,
-    generate_recommendations,
-    load_data,
-    engineer_features,
-    train_grade_classification_model,
-    train_defect_prediction_model,
-    save_model,
-    load_model
+    generate_recommendations
+)
+from ml_backend.scoring_batch import predict_grade_batch
+from ml_backend.forecasting import predict_yield, predict_yield_table
+from ml_backend.robusta_ml_core import load_model, MODEL_DIR
+from ml_backend.model_registry import ModelRegistry
+from ml_backend.executors import (
+    BoundedExecutor,
+    ExecutorSaturated,
+    HEAVY_WORKERS,
+    HEAVY_QUEUE,
+    MODEL_WORKERS,
+    MODEL_QUEUE
+)
+from ml_backend import jobs, tracing
+from ml_backend.repository import open_repository
+from ml_backend.serialization import (
+    FastJSONResponse,
+    NotAcceptable,
+    negotiate_table_format,
+    shape_records,
+    table_response,
+    RECORDS
+)
+
+from ml_backend.metrics import MetricsMiddleware, BATCH_ROWS, REGISTRY as METRICS, CONTENT_TYPE as METRICS_CONTENT_TYPE, total_requests
+from ml_backend.profiling import (
+    ADMIN_TOKEN,
+    PROFILE_INTERVAL_MS,
+    PROFILE_MAX_SECONDS,
+    ProfilerBusy,
+    check_admin_token,
+    sample_stacks
+)
+from starlette.concurrency import run_in_threadpool
+from ml_backend.streaming import (
+    iter_row_chunks,
+    negotiate_stream_format,
+    stream_scored_chunks,
+    check_sample_csv_header,
+    grade_sample_csv,
+    DuplexStreamingResponse,
+    CSV_MEDIA_TYPE,
+    NDJSON_MEDIA_TYPE
 )
 
+# Largest number of rows accepted by the /batch endpoints
+BATCH_MAX_ROWS = int(os.environ.get('ML_BATCH_MAX_ROWS', 50000))
+
+# Serving models, hot-swapped when a new artifact lands in MODEL_DIR
+registry = ModelRegistry(MODEL_DIR, loader=load_model)
+
+# Training (pandas / scikit-learn) in separate processes
+heavy_executor = BoundedExecutor("heavy", HEAVY_WORKERS, HEAVY_QUEUE, use_processes=True)
+# Served-model inference, reloads and /batch scoring (models live in this process)
+model_executor = BoundedExecutor("model", MODEL_WORKERS, MODEL_QUEUE)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    registry.start()
+    # Farm reads and ML result writes (None unless ML_DATABASE_URL or
+    # ML_FARM_DATABASE_URL is set)
+    app.state.repository = await open_repository()
+    yield
+    if app.state.repository is not None:
+        await app.state.repository.close()
+    registry.stop()
+    heavy_executor.shutdown()
+    model_executor.shutdown()
+
+def busy_error(e: ExecutorSaturated) -> HTTPException:
+    """503 response telling the client when to retry"""
+    return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Robusta Coffee ML API",
     description="API for coffee grading, yield forecasting, and decision support recommendations",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
 
 # Add CORS middleware
@@ -45,6 +127,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(tracing.TracingMiddleware)
+# Outermost, so latency includes CORS handling and tracing
+app.add_middleware(MetricsMiddleware)
+
 # =====================================
 # REQUEST MODELS
 # =====================================
@@ -100,21 +186,108 @@ class RecommendationRequest(BaseModel):
     quality_score: Optional[float] = Field(None, ge=0, le=100, description="Quality score")
     predicted_grade: Optional[str] = Field(None, description="Predicted grade (will be calculated if not provided)")
 
+class BatchGradeRequest(BaseModel):
+    """Request model for batch grade prediction"""
+    rows: List[GradeRequest] = Field(..., min_length=1, max_length=BATCH_MAX_ROWS, description="Samples to grade")
+
+class BatchYieldRequest(BaseModel):
+    """Request model for batch yield forecasting"""
+    rows: List[YieldRequest] = Field(..., min_length=1, max_length=BATCH_MAX_ROWS, description="Farms to forecast")
+
+class ModelPredictRequest(BaseModel):
+    """Request model for predictions with a saved model"""
+    rows: List[Dict[str, float]] = Field(..., min_length=1, description="Feature rows keyed by feature column name")
+
+# =====================================
+# BATCH HELPERS
+# =====================================
+
+# Request body accepted by the streaming endpoints (documented in OpenAPI)
+STREAM_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            NDJSON_MEDIA_TYPE: {"schema": {"type": "string", "description": "One JSON object per line"}},
+            CSV_MEDIA_TYPE: {"schema": {"type": "string", "description": "Header line, then one row per line"}}
+        }
+    }
+}
+
+def validate_rows(model: type, rows: List[Dict[str, Any]], offset: int = 0) -> List[BaseModel]:
+    """
+    Validate raw rows against a request model
+
+    Raises:
+        ValueError: Naming the first invalid row (counted from offset)
+    """
+    validated = []
+    for i, row in enumerate(rows):
+        try:
+            validated.append(model.model_validate(row))
+        except ValidationError as e:
+            error = e.errors()[0]
+            field = ".".join(str(part) for part in error['loc'])
+            raise ValueError(f"Row {offset + i}: {field}: {error['msg']}")
+    return validated
+
+def grade_table(samples: List[GradeRequest]) -> Dict[str, Any]:
+    """Vectorized grading of validated samples"""
+    columns = {field: [getattr(sample, field) for sample in samples] for field in GradeRequest.model_fields}
+    return predict_grade_batch(columns)
+
+def score_grade_chunk(rows: List[Dict[str, Any]], offset: int) -> Dict[str, Any]:
+    return grade_table(validate_rows(GradeRequest, rows, offset))
+
+def batch_size_recorder(endpoint: str):
+    """Callback recording the row count of a streamed batch"""
+    return BATCH_ROWS.labels(endpoint).observe
+
+def score_yield_chunk(rows: List[Dict[str, Any]], offset: int) -> Dict[str, Any]:
+    table = predict_yield_table([farm.dict() for farm in validate_rows(YieldRequest, rows, offset)])
+    table['request_index'] = [index + offset for index in table['request_index']]
+    return table
+
+def grade_batch_job(
+    samples: List[GradeRequest], media_type: str, accept_encoding: Optional[str], shape: str
+) -> Response:
+    """Score, encode and compress a /grade/batch response (runs in model_executor)"""
+    return table_response(grade_table(samples), media_type, accept_encoding, shape, {"row_count": len(samples)})
+
+def forecast_batch_job(
+    farms: List[YieldRequest], media_type: str, accept_encoding: Optional[str], shape: str
+) -> Response:
+    """Forecast, encode and compress a /forecast-yield/batch response (runs in model_executor)"""
+    table = predict_yield_table([farm.dict() for farm in farms])
+    return table_response(table, media_type, accept_encoding, shape, {"row_count": len(table['request_index'])})
+
 # =====================================
 # HEALTH CHECK
 # =====================================
 
 @app.get("/health")
-def health():
+async def health():
     """Health check endpoint"""
-    return {"status": "ok", "service": "Robusta Coffee ML API", "version": "1.0.0"}
+    return {
+        "status": "ok",
+        "service": "Robusta Coffee ML API",
+        "version": "1.0.0",
+        "executors": {
+            "heavy": heavy_executor.stats(),
+            "model": model_executor.stats()
+        }
+    }
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics for this process"""
+    return Response(METRICS.render(), media_type=METRICS_CONTENT_TYPE)
 
 # =====================================
 # GRADE PREDICTION ENDPOINT
 # =====================================
 
 @app.post("/grade")
-def grade(req: GradeRequest):
+async def grade(req: GradeRequest):
     """
     Predict coffee grade based on input parameters
     
@@ -129,22 +302,95 @@ def grade(req: GradeRequest):
     try:
         params = req.dict()
         result = predict_grade(params)
-        return {
+        return FastJSONResponse({
             "success": True,
             "data": result
-        }
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error predicting grade: {str(e)}")
 
+@app.post("/grade/batch")
+async def grade_batch(req: BatchGradeRequest, request: Request, shape: Literal["records", "columnar"] = RECORDS):
+    """
+    Predict coffee grades for many samples with the vectorized engine
+    
+    The response format follows the Accept header: application/json
+    (default), application/vnd.apache.arrow.stream or application/msgpack.
+    Large bodies are compressed per Accept-Encoding (br or gzip).
+    
+    Returns:
+        One row per sample with the same fields as /grade
+    """
+    try:
+        media_type = negotiate_table_format(request.headers.get("accept"))
+        BATCH_ROWS.labels("/grade/batch").observe(len(req.rows))
+        # Off the event loop: a full batch takes seconds to score and encode
+        return await model_executor.run(
+            grade_batch_job, req.rows, media_type, request.headers.get("accept-encoding"), shape
+        )
+    except NotAcceptable as e:
+        raise HTTPException(status_code=406, detail=str(e))
+    except ExecutorSaturated as e:
+        raise busy_error(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error predicting grades: {str(e)}")
+
+@app.post("/grade/batch/stream", openapi_extra=STREAM_REQUEST_BODY)
+async def grade_batch_stream(request: Request):
+    """
+    Grade an arbitrarily large set of samples, streaming the results
+    
+    The body is NDJSON (one GradeRequest object per line) or CSV with a
+    header (Content-Type: text/csv). Rows are validated and scored in chunks
+    of ML_STREAM_CHUNK_ROWS as they arrive, and each scored chunk is sent
+    immediately as NDJSON, or as CSV when Accept is text/csv. An invalid row
+    ends the stream with an error line.
+    """
+    media_type = negotiate_stream_format(request.headers.get("accept"))
+    return DuplexStreamingResponse(
+        stream_scored_chunks(
+            iter_row_chunks(request), score_grade_chunk, media_type, on_done=batch_size_recorder("/grade/batch/stream")
+        ),
+        media_type=media_type
+    )
+
+@app.post("/grade/upload")
+async def grade_upload(file: UploadFile = File(..., description="CSV sample sheet")):
+    """
+    Grade a CSV sample sheet and return it annotated
+    
+    The sheet uses the Flask /predict parameters as columns: altitude,
+    processing_method, colors, moisture, category_one_defects and
+    category_two_defects (the first three are required). Other columns are
+    passed through. The file is parsed in typed chunks and graded with the
+    vectorized engine; the response streams the sheet back with the
+    /predict outputs appended as columns.
+    """
+    try:
+        check_sample_csv_header(file.file)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid CSV: {str(e)}")
+    
+    stem = Path(file.filename or "samples").stem
+    return StreamingResponse(
+        grade_sample_csv(file.file, on_done=batch_size_recorder("/grade/upload")),
+        media_type=CSV_MEDIA_TYPE,
+        headers={"Content-Disposition": f'attachment; filename="{stem}_graded.csv"'}
+    )
+
 # =====================================
 # YIELD FORECASTING ENDPOINT
 # =====================================
 
 @app.post("/forecast-yield")
-def forecast_yield(req: YieldRequest):
+async def forecast_yield(req: YieldRequest, shape: Literal["records", "columnar"] = RECORDS):
     """
     Forecast coffee yield and grade distribution over specified years
     
+    Args:
+        shape: 'records' (list of objects) or 'columnar'
+               ({"columns": [...], "data": [[...], ...]}) for forecast_data
+    
     Returns:
         - forecast_data: Yearly forecast data
         - summary: Summary metrics
@@ -153,19 +399,63 @@ def forecast_yield(req: YieldRequest):
     try:
         params = req.dict()
         result = predict_yield(params)
-        return {
-            "success": True,
-            "data": result
-        }
+        with tracing.span("serialize"):
+            result['forecast_data'] = shape_records(result['forecast_data'], shape)
+            return FastJSONResponse({
+                "success": True,
+                "data": result
+            })
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error forecasting yield: {str(e)}")
+
+@app.post("/forecast-yield/batch")
+async def forecast_yield_batch(req: BatchYieldRequest, request: Request, shape: Literal["records", "columnar"] = RECORDS):
+    """
+    Forecast yield for many farms as one long table
+    
+    Content negotiation and compression work as for /grade/batch.
+    
+    Returns:
+        One row per (farm, year); 'request_index' is the farm's position
+        in the request
+    """
+    try:
+        media_type = negotiate_table_format(request.headers.get("accept"))
+        BATCH_ROWS.labels("/forecast-yield/batch").observe(len(req.rows))
+        return await model_executor.run(
+            forecast_batch_job, req.rows, media_type, request.headers.get("accept-encoding"), shape
+        )
+    except NotAcceptable as e:
+        raise HTTPException(status_code=406, detail=str(e))
+    except ExecutorSaturated as e:
+        raise busy_error(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error forecasting yield: {str(e)}")
 
+@app.post("/forecast-yield/batch/stream", openapi_extra=STREAM_REQUEST_BODY)
+async def forecast_yield_batch_stream(request: Request):
+    """
+    Forecast yield for an arbitrarily large set of farms, streaming the table
+    
+    Input and output formats work as for /grade/batch/stream; each output
+    row is one (farm, year) with 'request_index' counted over the whole
+    stream.
+    """
+    media_type = negotiate_stream_format(request.headers.get("accept"))
+    return DuplexStreamingResponse(
+        stream_scored_chunks(
+            iter_row_chunks(request), score_yield_chunk, media_type,
+            on_done=batch_size_recorder("/forecast-yield/batch/stream")
+        ),
+        media_type=media_type
+    )
+
 # =====================================
 # QUALITY DISTRIBUTION ENDPOINT
 # =====================================
 
 @app.post("/predict-quality")
-def predict_quality(req: QualityRequest):
+async def predict_quality(req: QualityRequest):
     """
     Predict quality grade distribution probabilities
     
@@ -178,10 +468,10 @@ def predict_quality(req: QualityRequest):
     try:
         params = req.dict()
         result = predict_quality_distribution(params)
-        return {
+        return FastJSONResponse({
             "success": True,
             "data": result
-        }
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error predicting quality: {str(e)}")
 
@@ -190,7 +480,7 @@ def predict_quality(req: QualityRequest):
 # =====================================
 
 @app.post("/recommendations")
-def recommendations(req: RecommendationRequest):
+async def recommendations(req: RecommendationRequest):
     """
     Generate personalized recommendations based on input parameters
     
@@ -200,10 +490,10 @@ def recommendations(req: RecommendationRequest):
     try:
         params = req.dict()
         result = generate_recommendations(params)
-        return {
+        return FastJSONResponse({
             "success": True,
             "data": result
-        }
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating recommendations: {str(e)}")
 
@@ -212,7 +502,7 @@ def recommendations(req: RecommendationRequest):
 # =====================================
 
 @app.post("/train/grade-classification")
-def train_grade_model(csv_path: str = "robusta_coffee_dataset.csv"):
+async def train_grade_model(csv_path: str = "robusta_coffee_dataset.csv"):
     """
     Train grade classification models
     
@@ -220,47 +510,26 @@ def train_grade_model(csv_path: str = "robusta_coffee_dataset.csv"):
         csv_path: Path to the dataset CSV file
         
     Returns:
-        Training results and model metrics
+        Training results, model metrics and per-stage timings (ms)
     """
     try:
-        # Load and engineer data
-        df = load_data(csv_path)
-        df_engineered = engineer_features(df)
-        
-        # Train models
-        results = train_grade_classification_model(df_engineered)
-        
-        # Save best model
-        best_model_name = results['best_model']
-        best_result = results[best_model_name]
-        save_model(
-            best_result['model'],
-            best_result['scaler'],
-            'grade_classification_best',
-            best_result['feature_columns']
-        )
+        # Load, engineer, train and save the best model in a worker process
+        with tracing.span("heavy_executor"):
+            results = await heavy_executor.run(jobs.train_grade_classification_job, csv_path)
+        tracing.merge(results.pop("trace_events"))
+        registry.reload_in_background('grade_classification_best')
         
-        # Prepare response
-        response = {
+        return FastJSONResponse({
             "success": True,
-            "best_model": best_model_name,
-            "accuracy": best_result['accuracy'],
-            "models": {
-                name: {
-                    "accuracy": result['accuracy'],
-                    "feature_columns": result['feature_columns']
-                }
-                for name, result in results.items()
-                if name != 'best_model'
-            }
-        }
-        
-        return response
+            **results
+        })
+    except ExecutorSaturated as e:
+        raise busy_error(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error training model: {str(e)}")
 
 @app.post("/train/defect-prediction")
-def train_defect_model(csv_path: str = "robusta_coffee_dataset.csv"):
+async def train_defect_model(csv_path: str = "robusta_coffee_dataset.csv"):
     """
     Train defect prediction regression models
     
@@ -268,46 +537,21 @@ def train_defect_model(csv_path: str = "robusta_coffee_dataset.csv"):
         csv_path: Path to the dataset CSV file
         
     Returns:
-        Training results and model metrics
+        Training results, model metrics and per-stage timings (ms)
     """
     try:
-        # Load and engineer data
-        df = load_data(csv_path)
-        df_engineered = engineer_features(df)
-        
-        # Train models
-        results = train_defect_prediction_model(df_engineered)
-        
-        # Save best model
-        best_model_name = results['best_model']
-        best_result = results[best_model_name]
-        save_model(
-            best_result['model'],
-            best_result['scaler'],
-            'defect_prediction_best',
-            best_result['feature_columns']
-        )
+        # Load, engineer, train and save the best model in a worker process
+        with tracing.span("heavy_executor"):
+            results = await heavy_executor.run(jobs.train_defect_prediction_job, csv_path)
+        tracing.merge(results.pop("trace_events"))
+        registry.reload_in_background('defect_prediction_best')
         
-        # Prepare response
-        response = {
+        return FastJSONResponse({
             "success": True,
-            "best_model": best_model_name,
-            "r2": best_result['r2'],
-            "rmse": best_result['rmse'],
-            "mae": best_result['mae'],
-            "models": {
-                name: {
-                    "r2": result['r2'],
-                    "rmse": result['rmse'],
-                    "mae": result['mae'],
-                    "feature_columns": result['feature_columns']
-                }
-                for name, result in results.items()
-                if name != 'best_model'
-            }
-        }
-        
-        return response
+            **results
+        })
+    except ExecutorSaturated as e:
+        raise busy_error(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error training model: {str(e)}")
 
@@ -316,9 +560,9 @@ def train_defect_model(csv_path: str = "robusta_coffee_dataset.csv"):
 # =====================================
 
 @app.get("/models/{model_name}")
-def get_model_info(model_name: str):
+async def get_model_info(model_name: str):
     """
-    Get information about a saved model
+    Get information about the served version of a saved model
     
     Args:
         model_name: Name of the model to load
@@ -327,25 +571,114 @@ def get_model_info(model_name: str):
         Model metadata
     """
     try:
-        model_data = load_model(model_name)
-        return {
+        served = await model_executor.run(registry.get, model_name)
+        return FastJSONResponse({
             "success": True,
-            "model_name": model_name,
-            "feature_columns": model_data['feature_columns'],
-            "has_model": model_data['model'] is not None,
-            "has_scaler": model_data['scaler'] is not None
-        }
+            **served.info()
+        })
+    except ExecutorSaturated as e:
+        raise busy_error(e)
     except FileNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error loading model: {str(e)}")
 
+@app.post("/models/{model_name}/predict")
+async def model_predict(model_name: str, req: ModelPredictRequest):
+    """
+    Predict with the currently served version of a saved model
+    
+    Args:
+        model_name: Name of the model to use
+        
+    Returns:
+        Predictions and the model version that produced them
+    """
+    try:
+        # Hold one snapshot for the whole request; a concurrent reload
+        # swaps the registry entry but not this reference
+        served = await model_executor.run(registry.get, model_name)
+        predictions = await model_executor.run(served.predict, req.rows)
+        return FastJSONResponse({
+            "success": True,
+            "model_version": served.version,
+            "predictions": predictions
+        })
+    except ExecutorSaturated as e:
+        raise busy_error(e)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error predicting with model: {str(e)}")
+
+@app.post("/models/{model_name}/reload")
+async def reload_model(model_name: str):
+    """
+    Load, warm up and swap in the latest artifact for a model (admin)
+    
+    Args:
+        model_name: Name of the model to reload
+        
+    Returns:
+        Metadata of the newly served version
+    """
+    try:
+        served = await model_executor.run(registry.reload, model_name)
+        return FastJSONResponse({
+            "success": True,
+            **served.info()
+        })
+    except ExecutorSaturated as e:
+        raise busy_error(e)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error reloading model: {str(e)}")
+
+# =====================================
+# PROFILING ENDPOINT (ADMIN)
+# =====================================
+
+@app.post("/admin/profile")
+async def admin_profile(
+    seconds: float = Query(10, gt=0, le=PROFILE_MAX_SECONDS, description="Capture window in seconds"),
+    requests: int = Query(0, ge=0, description="Stop after this many requests complete (0: whole window)"),
+    interval_ms: float = Query(PROFILE_INTERVAL_MS, ge=1, le=1000, description="Milliseconds between samples"),
+    idle: bool = Query(False, description="Keep stacks of threads waiting for work"),
+    x_admin_token: Optional[str] = Header(None)
+):
+    """
+    Sample the server's Python stacks and return a flame graph profile (admin)
+    
+    Requires ML_ADMIN_TOKEN to be set on the server and sent in the
+    X-Admin-Token header. Only one capture runs at a time, and it stops at
+    the window end (at most ML_PROFILE_MAX_SECONDS) whatever the client does.
+    
+    Returns:
+        Collapsed stacks ("frame;frame;frame count" per line) for
+        flamegraph.pl, speedscope or inferno; sample and request counts are
+        in X-Profile-* headers
+    """
+    if ADMIN_TOKEN is None:
+        raise HTTPException(status_code=404, detail="Profiling is disabled (set ML_ADMIN_TOKEN)")
+    if not check_admin_token(x_admin_token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+    try:
+        profile = await run_in_threadpool(sample_stacks, seconds, interval_ms, requests, total_requests, idle)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error profiling: {str(e)}")
+    
+    headers = {f"X-Profile-{key.replace('_', '-').title()}": str(value) for key, value in profile.summary().items()}
+    return Response(profile.collapsed(), media_type="text/plain", headers=headers)
+
 # =====================================
 # ROOT ENDPOINT
 # =====================================
 
 @app.get("/")
-def root():
+async def root():
     """Root endpoint with API information"""
     return {
         "service": "Robusta Coffee ML API",
@@ -353,13 +686,22 @@ def root():
         "description": "API for coffee grading, yield forecasting, and decision support",
         "endpoints": {
             "health": "/health",
+            "metrics": "/metrics (Prometheus)",
             "grade": "/grade (POST)",
+            "grade_batch": "/grade/batch (POST)",
+            "grade_batch_stream": "/grade/batch/stream (POST)",
+            "grade_upload": "/grade/upload (POST, multipart CSV)",
             "forecast_yield": "/forecast-yield (POST)",
+            "forecast_yield_batch": "/forecast-yield/batch (POST)",
+            "forecast_yield_batch_stream": "/forecast-yield/batch/stream (POST)",
             "predict_quality": "/predict-quality (POST)",
             "recommendations": "/recommendations (POST)",
             "train_grade": "/train/grade-classification (POST)",
             "train_defect": "/train/defect-prediction (POST)",
-            "model_info": "/models/{model_name} (GET)"
+            "model_info": "/models/{model_name} (GET)",
+            "model_predict": "/models/{model_name}/predict (POST)",
+            "model_reload": "/models/{model_name}/reload (POST)",
+            "profile": "/admin/profile (POST, admin token)"
         },
         "docs": "/docs"
     }
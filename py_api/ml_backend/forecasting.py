@@ -0,0 +1,302 @@
+"""
+Robusta Coffee Forecasting Module
+Multi-year yield and grade distribution forecasts
+
+Side-effect free: safe to import from the Streamlit apps and the API without
+loading the dashboard or scikit-learn. The forecast core works on plain
+tuples; pandas is only imported by calculate_yield_forecast, the DataFrame
+API used by the dashboards.
+"""
+
+from typing import TYPE_CHECKING, Dict, Any, List, Tuple
+
+from .tracing import span, traced
+from .scoring import (
+    calculate_suitability_scores,
+    calculate_management_quality_score,
+    calculate_grade_distribution
+)
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# =====================================
+# YIELD FORECASTING FUNCTIONS
+# =====================================
+
+def get_age_factor(plant_age_months: int) -> float:
+    """
+    Get age factor for yield calculation based on Robusta production curve
+    
+    Args:
+        plant_age_months: Plant age in months
+        
+    Returns:
+        Age factor (0-1)
+    """
+    if plant_age_months < 36:
+        return 0  # Not yet producing
+    elif plant_age_months < 48:
+        return 0.5  # Young production
+    elif plant_age_months < 72:
+        return 0.8  # Growing production
+    elif plant_age_months < 120:
+        return 1.0  # Prime production
+    elif plant_age_months < 180:
+        return 0.9  # Mature production
+    elif plant_age_months < 240:
+        return 0.7  # Declining production
+    else:
+        return 0.5  # Old trees
+
+# Column names of a forecast row, in tuple order
+FORECAST_COLUMNS = (
+    'Year',
+    'Age (months)',
+    'Yield (kg/ha)',
+    'Total Yield (kg)',
+    'Fine Probability',
+    'Premium Probability',
+    'Commercial Probability',
+    'Fine Yield (kg/ha)',
+    'Premium Yield (kg/ha)',
+    'Commercial Yield (kg/ha)'
+)
+
+def forecast_rows(
+    plant_age_months: int,
+    farm_area_ha: float,
+    climate_suitability: float,
+    soil_suitability: float,
+    fertilization_type: str,
+    fertilization_frequency: int,
+    pest_management_frequency: int,
+    overall_quality_index: float,
+    forecast_years: int = 5
+) -> List[Tuple]:
+    """
+    Yearly Robusta yield forecast as plain tuples (see FORECAST_COLUMNS)
+
+    Same arguments as calculate_yield_forecast, without the unused bean
+    screen size. Cheap enough to call on every API request.
+
+    Returns:
+        One tuple per forecast year
+    """
+    # Base yield parameters for Robusta (kg/ha/year)
+    base_yield_per_ha = 1200  # Average Robusta yield
+    max_yield_per_ha = 2500   # Maximum achievable yield
+    
+    # Fertilization factor
+    if fertilization_type == "Organic":
+        fert_base = 0.85
+    else:  # Non-organic
+        fert_base = 1.0
+    
+    # Frequency multiplier (1=Never to 5=Always)
+    fert_freq_multiplier = 0.7 + (fertilization_frequency * 0.075)  # 0.7 to 1.075
+    fertilization_factor = fert_base * fert_freq_multiplier
+    
+    # Pest management factor (1=Never to 5=Always)
+    pest_factor = 0.6 + (pest_management_frequency * 0.1)  # 0.6 to 1.0
+    
+    # Environmental factors
+    climate_factor = climate_suitability
+    soil_factor = soil_suitability
+    quality_factor = overall_quality_index
+    
+    # Grade probabilities depend only on management and conditions, not on age
+    quality_score = calculate_management_quality_score(
+        fertilization_factor, pest_factor, climate_factor, soil_factor
+    )
+    fine_prob, premium_prob, commercial_prob = calculate_grade_distribution(quality_score)
+    
+    # Calculate yearly yields
+    rows = []
+    for year in range(1, forecast_years + 1):
+        # Age progression
+        future_age_months = plant_age_months + (year * 12)
+        future_age_factor = get_age_factor(future_age_months)
+        
+        # Calculate yield for this year
+        year_yield = (base_yield_per_ha * 
+                     future_age_factor * 
+                     fertilization_factor * 
+                     pest_factor * 
+                     climate_factor * 
+                     soil_factor * 
+                     quality_factor)
+        
+        # Cap at maximum
+        year_yield = min(year_yield, max_yield_per_ha)
+        
+        rows.append((
+            year,
+            future_age_months,
+            round(year_yield, 2),
+            round(year_yield * farm_area_ha, 2),
+            fine_prob,
+            premium_prob,
+            commercial_prob,
+            round(year_yield * fine_prob, 2),
+            round(year_yield * premium_prob, 2),
+            round(year_yield * commercial_prob, 2)
+        ))
+    
+    return rows
+
+def calculate_yield_forecast(
+    plant_age_months: int,
+    farm_area_ha: float,
+    climate_suitability: float,
+    soil_suitability: float,
+    fertilization_type: str,
+    fertilization_frequency: int,
+    pest_management_frequency: int,
+    bean_screen_size: float,
+    overall_quality_index: float,
+    forecast_years: int = 5
+) -> "pd.DataFrame":
+    """
+    Calculate yield forecast for Robusta coffee per hectare over specified years
+    Returns yield per year and grade distribution probabilities
+    
+    Args:
+        plant_age_months: Current plant age in months
+        farm_area_ha: Farm area in hectares
+        climate_suitability: Climate suitability score (0-1)
+        soil_suitability: Soil suitability score (0-1)
+        fertilization_type: 'Organic' or 'Non-Organic'
+        fertilization_frequency: Frequency scale 1-5 (1=Never, 5=Always)
+        pest_management_frequency: Frequency scale 1-5 (1=Never, 5=Always)
+        bean_screen_size: Bean screen size in mm
+        overall_quality_index: Overall quality index (0-1)
+        forecast_years: Number of years to forecast
+        
+    Returns:
+        DataFrame with yearly forecast data
+    """
+    import pandas as pd
+
+    rows = forecast_rows(
+        plant_age_months,
+        farm_area_ha,
+        climate_suitability,
+        soil_suitability,
+        fertilization_type,
+        fertilization_frequency,
+        pest_management_frequency,
+        overall_quality_index,
+        forecast_years
+    )
+    return pd.DataFrame.from_records(rows, columns=list(FORECAST_COLUMNS))
+
+# =====================================
+# PREDICTION FUNCTIONS (API-READY)
+# =====================================
+
+def _forecast_from_params(params: Dict[str, Any]) -> Tuple[List[Tuple], Dict[str, float]]:
+    """Forecast rows and suitability scores for one set of API parameters"""
+    # Extract parameters
+    plant_age = params.get('plant_age_months', 48)
+    farm_area = params.get('farm_area_ha', 1.0)
+    elevation = params.get('elevation_masl', 900)
+    temp_avg = params.get('monthly_temp_avg_c', 19.5)
+    rainfall = params.get('monthly_rainfall_mm', 200)
+    soil_ph = params.get('soil_pH', 6.0)
+    soil_moisture = params.get('soil_moisture_pct', 25)
+    fert_type = params.get('fertilization_type', 'Non-Organic')
+    fert_freq = params.get('fertilization_frequency', 3)
+    pest_freq = params.get('pest_management_frequency', 3)
+    forecast_years = params.get('forecast_years', 5)
+    
+    # Calculate suitability scores
+    scores = calculate_suitability_scores(elevation, temp_avg, rainfall, soil_ph, soil_moisture)
+    
+    # Calculate forecast
+    rows = forecast_rows(
+        plant_age_months=plant_age,
+        farm_area_ha=farm_area,
+        climate_suitability=scores['climate_suitability'],
+        soil_suitability=scores['soil_suitability'],
+        fertilization_type=fert_type,
+        fertilization_frequency=fert_freq,
+        pest_management_frequency=pest_freq,
+        overall_quality_index=scores['overall_quality_index'],
+        forecast_years=forecast_years
+    )
+    return rows, scores
+
+def predict_yield(params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Predict yield forecast from input parameters
+    
+    Args:
+        params: Dictionary with input parameters:
+            - plant_age_months: int
+            - farm_area_ha: float
+            - elevation_masl: float
+            - monthly_temp_avg_c: float
+            - monthly_rainfall_mm: float
+            - soil_pH: float
+            - soil_moisture_pct: float
+            - fertilization_type: str ('Organic' or 'Non-Organic')
+            - fertilization_frequency: int (1-5)
+            - pest_management_frequency: int (1-5)
+            - forecast_years: int (default 5)
+    
+    Returns:
+        Dictionary with forecast data and summary metrics
+    """
+    with span("forecast"):
+        rows, scores = _forecast_from_params(params)
+    climate_suitability = scores['climate_suitability']
+    soil_suitability = scores['soil_suitability']
+    overall_quality = scores['overall_quality_index']
+    
+    # Calculate summary metrics (grade probabilities are the same every year)
+    n_years = len(rows)
+    total_yield_period = sum(row[3] for row in rows)
+    avg_yield_per_year = sum(row[2] for row in rows) / n_years if n_years else float('nan')
+    avg_fine_prob = rows[0][4] if n_years else float('nan')
+    avg_premium_prob = rows[0][5] if n_years else float('nan')
+    
+    return {
+        'forecast_data': [dict(zip(FORECAST_COLUMNS, row)) for row in rows],
+        'summary': {
+            'total_yield_kg': round(total_yield_period, 2),
+            'avg_yield_kg_per_ha': round(avg_yield_per_year, 2),
+            'avg_fine_probability': round(avg_fine_prob, 3),
+            'avg_premium_probability': round(avg_premium_prob, 3),
+            'forecast_years': params.get('forecast_years', 5)
+        },
+        'suitability_scores': {
+            'climate_suitability': round(climate_suitability, 3),
+            'soil_suitability': round(soil_suitability, 3),
+            'overall_quality_index': round(overall_quality, 3)
+        }
+    }
+
+@traced()
+def predict_yield_table(params_list: List[Dict[str, Any]]) -> Dict[str, List[Any]]:
+    """
+    Forecasts for many parameter sets as one long table (for bulk endpoints)
+    
+    Args:
+        params_list: Parameter dictionaries, as accepted by predict_yield
+    
+    Returns:
+        Column name -> values, with one row per (request, year). The
+        'request_index' column gives the position in params_list.
+    """
+    request_index = []
+    table_rows = []
+    for index, params in enumerate(params_list):
+        rows, _ = _forecast_from_params(params)
+        request_index.extend([index] * len(rows))
+        table_rows.extend(rows)
+    
+    table = {'request_index': request_index}
+    for position, column in enumerate(FORECAST_COLUMNS):
+        table[column] = [row[position] for row in table_rows]
+    return table
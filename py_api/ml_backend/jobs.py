@@ -0,0 +1,94 @@
+"""
+Worker Jobs for the Robusta Coffee ML API
+Top-level (picklable) functions run in the heavy process pool. Each returns
+plain data only: trained models are saved to disk inside the worker and
+picked up by the model registry, never sent back to the server process.
+
+Jobs always trace their stages: the result carries a 'timings' breakdown and
+the raw 'trace_events', which the API merges into the request's trace.
+"""
+
+from typing import Any, Dict
+
+from . import tracing
+from .robusta_ml_core import (
+    load_data,
+    engineer_features,
+    train_grade_classification_model,
+    train_defect_prediction_model,
+    save_model
+)
+
+def train_grade_classification_job(csv_path: str) -> Dict[str, Any]:
+    """
+    Train grade classification models and save the best one
+
+    Returns:
+        Best model name, accuracy, per-model metrics and stage timings
+    """
+    with tracing.trace("train_grade_classification_job") as trace:
+        df_engineered = engineer_features(load_data(csv_path))
+        results = train_grade_classification_model(df_engineered)
+
+        best_model_name = results['best_model']
+        best_result = results[best_model_name]
+        save_model(
+            best_result['model'],
+            best_result['scaler'],
+            'grade_classification_best',
+            best_result['feature_columns']
+        )
+
+    return {
+        "best_model": best_model_name,
+        "accuracy": float(best_result['accuracy']),
+        "models": {
+            name: {
+                "accuracy": float(result['accuracy']),
+                "feature_columns": result['feature_columns']
+            }
+            for name, result in results.items()
+            if name != 'best_model'
+        },
+        "timings": trace.timings(),
+        "trace_events": trace.events
+    }
+
+def train_defect_prediction_job(csv_path: str) -> Dict[str, Any]:
+    """
+    Train defect prediction models and save the best one
+
+    Returns:
+        Best model name, regression metrics, per-model metrics and stage timings
+    """
+    with tracing.trace("train_defect_prediction_job") as trace:
+        df_engineered = engineer_features(load_data(csv_path))
+        results = train_defect_prediction_model(df_engineered)
+
+        best_model_name = results['best_model']
+        best_result = results[best_model_name]
+        save_model(
+            best_result['model'],
+            best_result['scaler'],
+            'defect_prediction_best',
+            best_result['feature_columns']
+        )
+
+    return {
+        "best_model": best_model_name,
+        "r2": float(best_result['r2']),
+        "rmse": float(best_result['rmse']),
+        "mae": float(best_result['mae']),
+        "models": {
+            name: {
+                "r2": float(result['r2']),
+                "rmse": float(result['rmse']),
+                "mae": float(result['mae']),
+                "feature_columns": result['feature_columns']
+            }
+            for name, result in results.items()
+            if name != 'best_model'
+        },
+        "timings": trace.timings(),
+        "trace_events": trace.events
+    }
@@ -0,0 +1,363 @@
+"""
+Request Metrics and Sampled Logging for the Robusta Coffee APIs
+Counters, gauges and histograms rendered in the Prometheus text format at
+/metrics, with request instrumentation for the FastAPI app (ASGI middleware)
+and the Flask grading API (request hooks). Pure Python with no third-party
+dependencies, so the Flask server can use it as well.
+
+Hot paths log through SampledLogger: one structured (JSON) event per sampled
+call, formatted only if a handler actually emits it.
+
+Metrics are kept per process; with several workers, scrape each one or put
+them behind a per-worker port.
+"""
+
+import bisect
+import json
+import logging
+import os
+import random
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Prometheus text exposition format, version 0.0.4
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Share of hot-path events that are logged (1.0 logs every event)
+LOG_SAMPLE_RATE = float(os.environ.get('ML_LOG_SAMPLE_RATE', 0.01))
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+ROW_BUCKETS = (1, 10, 100, 1000, 10000, 50000, 100000, 1000000, 10000000)
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+def _label_text(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+# =====================================
+# METRIC TYPES
+# =====================================
+
+class _Metric:
+    """A named metric family; labels(...) returns the child for one label set"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: Any) -> Any:
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {key}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _new_child(self) -> Any:
+        raise NotImplementedError
+
+    def _samples(self) -> Iterable[str]:
+        for key, child in sorted(self._children.items()):
+            yield from child.samples(self.name, self.labelnames, key)
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+class _Value:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def samples(self, name: str, labelnames: Sequence[str], key: Sequence[str]) -> Iterable[str]:
+        yield f"{name}{_label_text(labelnames, key)} {_format_value(self.value)}"
+
+class Counter(_Metric):
+    """Monotonically increasing count (name should end in _total)"""
+
+    kind = "counter"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+class Gauge(_Metric):
+    """Value that goes up and down (e.g. requests in flight)"""
+
+    kind = "gauge"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+class _HistogramValue:
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def time(self) -> "_Timer":
+        """Context manager observing the elapsed seconds"""
+        return _Timer(self)
+
+    def samples(self, name: str, labelnames: Sequence[str], key: Sequence[str]) -> Iterable[str]:
+        with self._lock:
+            counts, total = list(self.counts), self.sum
+        cumulative = 0
+        for bound, count in zip(list(self.buckets) + [float("inf")], counts):
+            cumulative += count
+            le = 'le="' + _format_value(bound) + '"'
+            yield f"{name}_bucket{_label_text(labelnames, key, le)} {cumulative}"
+        yield f"{name}_sum{_label_text(labelnames, key)} {_format_value(total)}"
+        yield f"{name}_count{_label_text(labelnames, key)} {cumulative}"
+
+class _Timer:
+    def __init__(self, histogram: _HistogramValue):
+        self._histogram = histogram
+
+    def __enter__(self) -> "_Timer":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._histogram.observe(time.perf_counter() - self._start)
+
+class Histogram(_Metric):
+    """Distribution of observed values over fixed upper bounds"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramValue:
+        return _HistogramValue(self.buckets)
+
+class MetricsRegistry:
+    """Collection of metric families rendered together"""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if any(m.name == metric.name for m in self._metrics):
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text format"""
+        return "\n".join(metric.render() for metric in self._metrics) + "\n"
+
+# =====================================
+# STANDARD METRICS
+# =====================================
+
+REGISTRY = MetricsRegistry()
+
+REQUESTS = REGISTRY.counter(
+    "ml_http_requests_total", "HTTP requests by route template and status", ("method", "endpoint", "status")
+)
+REQUEST_LATENCY = REGISTRY.histogram(
+    "ml_http_request_duration_seconds", "HTTP request latency until the last body byte", ("method", "endpoint")
+)
+IN_FLIGHT = REGISTRY.gauge("ml_http_requests_in_flight", "HTTP requests currently being served")
+BATCH_ROWS = REGISTRY.histogram(
+    "ml_batch_rows", "Rows per batch, streaming or upload request", ("endpoint",), buckets=ROW_BUCKETS
+)
+CACHE_REQUESTS = REGISTRY.counter(
+    "ml_cache_requests_total", "Cache lookups by cache and result (hit or miss)", ("cache", "result")
+)
+MODEL_INFERENCE = REGISTRY.histogram(
+    "ml_model_inference_seconds", "Time spent in served-model predict calls", ("model",)
+)
+DB_QUERY_LATENCY = REGISTRY.histogram(
+    "ml_db_query_seconds", "Database query time including pool checkout", ("query",)
+)
+
+def total_requests() -> float:
+    """Requests completed by this process so far (all endpoints)"""
+    return sum(child.value for child in list(REQUESTS._children.values()))
+
+def record_cache(cache: str, hit: bool) -> None:
+    """Count a cache hit or miss"""
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+def _record_request(method: str, endpoint: str, status: int, seconds: float) -> None:
+    REQUESTS.labels(method, endpoint, status).inc()
+    REQUEST_LATENCY.labels(method, endpoint).observe(seconds)
+
+# =====================================
+# SAMPLED STRUCTURED LOGGING
+# =====================================
+
+class _Event:
+    """Log message rendered to JSON only when a handler formats it"""
+
+    __slots__ = ("event", "fields")
+
+    def __init__(self, event: str, fields: Dict[str, Any]):
+        self.event = event
+        self.fields = fields
+
+    def __str__(self) -> str:
+        return json.dumps({"event": self.event, **self.fields}, default=str)
+
+class SampledLogger:
+    """
+    Structured event logging for hot paths
+
+    Only a ``rate`` share of events is logged (each tagged with the rate, so
+    counts can be scaled back up), and nothing is formatted unless the
+    logger is enabled for the level. Errors should go through the plain
+    logger so none are dropped.
+    """
+
+    def __init__(self, logger: logging.Logger, rate: float = LOG_SAMPLE_RATE):
+        self.logger = logger
+        self.rate = rate
+
+    def event(self, event: str, level: int = logging.INFO, **fields: Any) -> None:
+        if self.rate < 1.0 and random.random() >= self.rate:
+            return
+        if not self.logger.isEnabledFor(level):
+            return
+        if self.rate < 1.0:
+            fields["sample_rate"] = self.rate
+        self.logger.log(level, "%s", _Event(event, fields))
+
+access_log = SampledLogger(logging.getLogger("ml_backend.access"))
+
+# =====================================
+# FASTAPI (ASGI) INSTRUMENTATION
+# =====================================
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording request count, latency and in-flight
+    requests per route template (so path parameters do not multiply series).
+    Latency runs until the last body chunk, which covers streaming responses.
+    Requests that match no route are counted under 'unmatched'.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        IN_FLIGHT.labels().inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            IN_FLIGHT.labels().dec()
+            seconds = time.perf_counter() - start
+            route = scope.get("route")
+            endpoint = getattr(route, "path", "unmatched")
+            _record_request(scope["method"], endpoint, status, seconds)
+            access_log.event(
+                "request", method=scope["method"], endpoint=endpoint, status=status, ms=round(seconds * 1000, 2)
+            )
+
+# =====================================
+# FLASK INSTRUMENTATION
+# =====================================
+
+def instrument_flask(app, metrics_path: str = "/metrics") -> None:
+    """
+    Record request metrics for a Flask app and serve them at ``metrics_path``
+
+    Args:
+        app: Flask application
+        metrics_path: URL of the Prometheus endpoint
+    """
+    from flask import Response, g, request
+
+    @app.before_request
+    def _start_timer():
+        g.metrics_start = time.perf_counter()
+        g.metrics_status = 500
+        IN_FLIGHT.labels().inc()
+
+    @app.after_request
+    def _remember_status(response):
+        g.metrics_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def _record(exc: Optional[BaseException]) -> None:
+        start = g.pop("metrics_start", None)
+        if start is None:
+            return
+        IN_FLIGHT.labels().dec()
+        seconds = time.perf_counter() - start
+        endpoint = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        status = g.pop("metrics_status", 500)
+        _record_request(request.method, endpoint, status, seconds)
+        access_log.event(
+            "request", method=request.method, endpoint=endpoint, status=status, ms=round(seconds * 1000, 2)
+        )
+
+    @app.route(metrics_path, methods=["GET"])
+    def metrics():
+        """Prometheus metrics"""
+        return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
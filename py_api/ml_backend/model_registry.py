@@ -0,0 +1,212 @@
+"""
+Model Registry for the Robusta Coffee ML API
+Serves saved models from the models/ directory and hot-swaps them when a
+newly trained artifact appears, without interrupting in-flight requests
+"""
+
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from .metrics import MODEL_INFERENCE, record_cache
+
+logger = logging.getLogger(__name__)
+
+# Seconds between directory scans (0 disables the watcher)
+DEFAULT_POLL_INTERVAL = float(os.environ.get('ML_MODEL_RELOAD_INTERVAL', 2.0))
+
+# =====================================
+# SERVING SNAPSHOT
+# =====================================
+
+class ServingModel:
+    """
+    Immutable snapshot of a loaded model, its scaler and feature metadata.
+
+    Request handlers take one reference to a snapshot and use it for the whole
+    request, so a reload that happens mid-request never changes the model
+    underneath them.
+    """
+
+    __slots__ = ('name', 'model', 'scaler', 'feature_columns', 'version', 'loaded_at')
+
+    def __init__(self, name: str, model_data: Dict[str, Any], version: str):
+        self.name = name
+        self.model = model_data['model']
+        self.scaler = model_data['scaler']
+        self.feature_columns = list(model_data['feature_columns'])
+        self.version = version
+        self.loaded_at = time.time()
+
+    def predict(self, rows: List[Dict[str, float]]) -> List[Any]:
+        """
+        Run the model on feature rows
+
+        Args:
+            rows: List of dictionaries keyed by feature column name.
+                  Missing features default to 0.
+
+        Returns:
+            List of predictions (one per row)
+        """
+        with MODEL_INFERENCE.labels(self.name).time():
+            return self._predict(rows)
+
+    def _predict(self, rows: List[Dict[str, float]]) -> List[Any]:
+        import pandas as pd
+
+        X = pd.DataFrame(
+            [[row.get(col, 0.0) for col in self.feature_columns] for row in rows],
+            columns=self.feature_columns
+        )
+        if self.scaler is not None:
+            X = self.scaler.transform(X)
+        return self.model.predict(X).tolist()
+
+    def warm_up(self) -> None:
+        """Run one prediction so lazy initialisation happens off the request path"""
+        means = getattr(self.scaler, 'mean_', None)
+        if means is not None and len(means) == len(self.feature_columns):
+            row = dict(zip(self.feature_columns, (float(m) for m in means)))
+        else:
+            row = {}
+        self._predict([row])
+
+    def info(self) -> Dict[str, Any]:
+        """Metadata describing this snapshot"""
+        return {
+            'model_name': self.name,
+            'version': self.version,
+            'loaded_at': self.loaded_at,
+            'feature_columns': self.feature_columns,
+            'has_model': self.model is not None,
+            'has_scaler': self.scaler is not None
+        }
+
+# =====================================
+# REGISTRY
+# =====================================
+
+class ModelRegistry:
+    """
+    Holds the currently served snapshot for each model name.
+
+    Readers never take a lock: the name -> snapshot mapping is replaced as a
+    whole (copy-on-write), so a lookup always sees either the old or the new
+    mapping. Loading, warm-up and the swap happen on a background thread.
+    """
+
+    def __init__(
+        self,
+        model_dir: Path,
+        loader: Callable[[str], Dict[str, Any]],
+        poll_interval: float = DEFAULT_POLL_INTERVAL
+    ):
+        """
+        Args:
+            model_dir: Directory containing saved ``<name>.pkl`` artifacts
+            loader: Function that loads a model by name (``load_model``)
+            poll_interval: Seconds between directory scans
+        """
+        self.model_dir = Path(model_dir)
+        self.loader = loader
+        self.poll_interval = poll_interval
+        self._models: Dict[str, ServingModel] = {}
+        self._write_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _artifact_version(self, name: str) -> Optional[str]:
+        """Version string for an artifact on disk, or None if missing"""
+        try:
+            stat = (self.model_dir / f"{name}.pkl").stat()
+        except FileNotFoundError:
+            return None
+        return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+    def get(self, name: str) -> ServingModel:
+        """
+        Get the served snapshot for a model, loading it on first use
+
+        Raises:
+            FileNotFoundError: If no artifact exists for the model
+        """
+        served = self._models.get(name)
+        record_cache("model_registry", served is not None)
+        if served is not None:
+            return served
+        return self.reload(name)
+
+    def reload(self, name: str) -> ServingModel:
+        """
+        Load, warm up and swap in the current artifact for a model.
+
+        If loading or warm-up fails the previously served snapshot (if any)
+        stays in place and the error is raised to the caller.
+        """
+        with self._write_lock:
+            version = self._artifact_version(name)
+            current = self._models.get(name)
+            if current is not None and current.version == version:
+                return current
+            if version is None:
+                raise FileNotFoundError(f"Model '{name}' not found in {self.model_dir}")
+
+            snapshot = ServingModel(name, self.loader(name), version)
+            snapshot.warm_up()
+
+            models = dict(self._models)
+            models[name] = snapshot
+            self._models = models
+
+        logger.info("Serving model '%s' version %s", name, version)
+        return snapshot
+
+    def reload_in_background(self, name: str) -> None:
+        """Reload a model on a daemon thread (e.g. right after training)"""
+        threading.Thread(
+            target=self._safe_reload, args=(name,), name=f"model-reload-{name}", daemon=True
+        ).start()
+
+    def _safe_reload(self, name: str) -> None:
+        try:
+            self.reload(name)
+        except Exception:
+            logger.exception("Failed to reload model '%s'; keeping previous version", name)
+
+    def scan(self) -> None:
+        """Reload every served model whose artifact changed on disk"""
+        for name, served in list(self._models.items()):
+            version = self._artifact_version(name)
+            if version is not None and version != served.version:
+                self._safe_reload(name)
+
+    def loaded(self) -> Dict[str, ServingModel]:
+        """Current name -> snapshot mapping"""
+        return self._models
+
+    # -------------------------------------
+    # Watcher thread
+    # -------------------------------------
+
+    def start(self) -> None:
+        """Start polling the model directory for new artifacts"""
+        if self.poll_interval <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name="model-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the watcher thread"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_interval + 1)
+            self._thread = None
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.poll_interval):
+            self.scan()
@@ -0,0 +1,239 @@
+"""
+Process-Parallel Chunk Execution for the Robusta Coffee Scoring Engine
+Splits column tables into row ranges and scores them across a process pool.
+Numeric input columns are copied once into a shared memory block that the
+workers map directly, so only the block name and a row range are pickled per
+chunk; results come back per chunk and are reassembled in input order.
+
+Example:
+    from ml_backend.parallel import score_parallel
+    graded = score_parallel('grade', columns, workers=8)
+"""
+
+import math
+import os
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from .scoring_batch import predict_grade_batch, predict_coffee_grade_batch
+from .forecasting import predict_yield_table
+
+# Smallest chunk worth a round trip to a worker
+MIN_CHUNK_ROWS = 10000
+
+# Chunks per worker when the chunk size is not given, so a slow chunk does
+# not leave the other workers idle at the end
+CHUNKS_PER_WORKER = 4
+
+# func(columns, offset) -> column table; offset is the chunk's first row
+ChunkFunction = Callable[[Mapping[str, Any], int], Mapping[str, Any]]
+
+# =====================================
+# CHUNK FUNCTIONS (run in worker processes)
+# =====================================
+
+def _grade(columns: Mapping[str, Any], offset: int) -> Dict[str, np.ndarray]:
+    return predict_grade_batch(columns)
+
+def _coffee_grade(columns: Mapping[str, Any], offset: int) -> Dict[str, np.ndarray]:
+    return predict_coffee_grade_batch(columns)
+
+def _forecast(columns: Mapping[str, Any], offset: int) -> Dict[str, Any]:
+    names = list(columns)
+    lists = [np.asarray(columns[name]).tolist() for name in names]
+    params_list = [
+        {name: value for name, value in zip(names, values) if value == value}
+        for values in zip(*lists)
+    ]
+    table = predict_yield_table(params_list)
+    table['request_index'] = np.asarray(table['request_index']) + offset
+    return table
+
+SCORERS: Dict[str, ChunkFunction] = {
+    'grade': _grade,
+    'coffee_grade': _coffee_grade,
+    'forecast': _forecast
+}
+
+# =====================================
+# ORDERED DISPATCH
+# =====================================
+
+def imap_ordered(executor: Executor, func: Callable[..., Any], tasks: Iterable[Tuple], window: int) -> Iterator[Any]:
+    """
+    Submit ``func(*args)`` for each task and yield results in task order
+
+    At most ``window`` tasks are in flight, so a lazy task iterator (e.g.
+    chunks read from a file) is never consumed far ahead of the results.
+    """
+    pending = deque()
+    for args in tasks:
+        pending.append(executor.submit(func, *args))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+# =====================================
+# SHARED MEMORY COLUMNS
+# =====================================
+
+# (column name, dtype string, byte offset in the block)
+Layout = List[Tuple[str, str, int]]
+
+def _share_columns(columns: Mapping[str, np.ndarray], n: int) -> Tuple[shared_memory.SharedMemory, Layout]:
+    """Copy numeric columns into one shared memory block"""
+    layout: Layout = []
+    size = 0
+    for name, values in columns.items():
+        size = -(-size // 8) * 8  # keep every column 8-byte aligned
+        layout.append((name, values.dtype.str, size))
+        size += values.nbytes
+    block = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    for (name, dtype, byte_offset), values in zip(layout, columns.values()):
+        np.ndarray((n,), dtype=dtype, buffer=block.buf, offset=byte_offset)[:] = values
+    return block, layout
+
+class _Labels:
+    """Object column sent back as integer codes into its distinct values"""
+
+    def __init__(self, values: np.ndarray):
+        import pandas as pd
+        codes, uniques = pd.factorize(values, use_na_sentinel=False)
+        self.codes = codes.astype(np.int32)
+        self.labels = np.asarray(uniques, dtype=object)
+
+    def decode(self) -> np.ndarray:
+        return self.labels[self.codes]
+
+def _pack(values: Any) -> Any:
+    """
+    Prepare a result column for the trip back to the parent
+
+    Label columns (grades, classes) hold a handful of distinct strings, and
+    pickling them element by element costs more than scoring, so they travel
+    as codes. Arrays that may be views into shared memory are copied before
+    it is closed.
+    """
+    if isinstance(values, np.ndarray):
+        if values.dtype == object:
+            return _Labels(values)
+        if not values.flags.owndata:
+            return values.copy()
+    return values
+
+def _unpack(values: Any) -> Any:
+    return values.decode() if isinstance(values, _Labels) else values
+
+def _run_shared_chunk(
+    func: ChunkFunction,
+    block_name: str,
+    layout: Layout,
+    n: int,
+    start: int,
+    stop: int,
+    other_columns: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Worker side: map the shared block, score rows [start, stop) and detach"""
+    block = shared_memory.SharedMemory(name=block_name)
+    try:
+        columns = {
+            name: np.ndarray((n,), dtype=dtype, buffer=block.buf, offset=byte_offset)[start:stop]
+            for name, dtype, byte_offset in layout
+        }
+        columns.update(other_columns)
+        result = {name: _pack(values) for name, values in func(columns, start).items()}
+        del columns
+    finally:
+        block.close()
+    return result
+
+def _concat(parts: List[Mapping[str, Any]]) -> Dict[str, np.ndarray]:
+    if not parts:
+        return {}
+    return {name: np.concatenate([np.asarray(_unpack(part[name])) for part in parts]) for name in parts[0]}
+
+def map_columns(
+    func: ChunkFunction,
+    columns: Mapping[str, Any],
+    workers: Optional[int] = None,
+    chunk_rows: Optional[int] = None,
+    executor: Optional[Executor] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Apply a chunk function over row ranges of a column table in parallel
+
+    Numeric columns are shared with the workers through one shared memory
+    block; other columns (e.g. strings) are pickled per chunk. Results are
+    concatenated in row order.
+
+    Args:
+        func: Top-level (picklable) function ``func(columns, offset)``
+              returning a column table for the chunk
+        columns: Column name -> values, all of the same length
+        workers: Worker processes (default: all cores); 1 runs in-process
+        chunk_rows: Rows per chunk (default: about CHUNKS_PER_WORKER chunks
+                    per worker, at least MIN_CHUNK_ROWS)
+        executor: Process pool to reuse across calls (one is created
+                  and shut down per call otherwise)
+
+    Returns:
+        Column name -> NumPy array over all rows
+    """
+    arrays = {name: np.asarray(values) for name, values in columns.items()}
+    n = len(next(iter(arrays.values()))) if arrays else 0
+    if any(len(values) != n for values in arrays.values()):
+        raise ValueError("All columns must have the same length")
+
+    workers = workers or os.cpu_count() or 1
+    if executor is None and (workers <= 1 or n <= MIN_CHUNK_ROWS):
+        return _concat([func(arrays, 0)]) if n else {}
+    if chunk_rows is None:
+        chunk_rows = max(MIN_CHUNK_ROWS, math.ceil(n / (workers * CHUNKS_PER_WORKER)))
+
+    numeric = {name: values for name, values in arrays.items() if values.dtype.kind in 'biuf'}
+    other = {name: values for name, values in arrays.items() if name not in numeric}
+    block, layout = _share_columns(numeric, n)
+    pool = executor or ProcessPoolExecutor(max_workers=workers)
+    try:
+        tasks = (
+            (func, block.name, layout, n, start, min(start + chunk_rows, n),
+             {name: values[start:start + chunk_rows] for name, values in other.items()})
+            for start in range(0, n, chunk_rows)
+        )
+        # The inputs already sit in shared memory, so every chunk can be queued
+        parts = list(imap_ordered(pool, _run_shared_chunk, tasks, window=math.ceil(n / chunk_rows)))
+    finally:
+        if executor is None:
+            pool.shutdown()
+        block.close()
+        block.unlink()
+    return _concat(parts)
+
+def score_parallel(
+    kind: str,
+    columns: Mapping[str, Any],
+    workers: Optional[int] = None,
+    chunk_rows: Optional[int] = None,
+    executor: Optional[Executor] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Run the batch scoring engine across processes
+
+    Args:
+        kind: 'grade' (predict_grade_batch), 'coffee_grade'
+              (predict_coffee_grade_batch) or 'forecast' (predict_yield_table;
+              request_index counts rows of the whole input)
+        columns: Input columns, as for the matching batch function
+        workers, chunk_rows, executor: See map_columns
+
+    Returns:
+        The same columns the single-process function returns, in input order
+    """
+    if kind not in SCORERS:
+        raise ValueError(f"Unknown scorer '{kind}'. Use one of: {', '.join(SCORERS)}")
+    return map_columns(SCORERS[kind], columns, workers=workers, chunk_rows=chunk_rows, executor=executor)
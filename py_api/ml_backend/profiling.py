@@ -0,0 +1,131 @@
+"""
+On-Demand Sampling Profiler for the Robusta Coffee ML API
+Samples the Python stacks of every thread in the running server for a
+bounded window (or until N requests complete) and returns them in the
+collapsed-stack format read by flamegraph.pl, speedscope and inferno.
+
+Nothing runs when no profile is being taken: sampling happens on a worker
+thread only for the duration of one capture, and it always stops at the
+deadline (at most ML_PROFILE_MAX_SECONDS), even if the client goes away.
+Only one capture runs at a time.
+"""
+
+import hmac
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, Optional
+
+# Hard cap on a capture's length
+PROFILE_MAX_SECONDS = float(os.environ.get('ML_PROFILE_MAX_SECONDS', 30))
+
+# Default and smallest time between samples
+PROFILE_INTERVAL_MS = 5.0
+PROFILE_MIN_INTERVAL_MS = 1.0
+
+# Token required by the admin endpoints (unset: they are disabled)
+ADMIN_TOKEN = os.environ.get('ML_ADMIN_TOKEN') or None
+
+# Innermost frames of threads that are waiting for work, left out by default
+IDLE_FUNCTIONS = frozenset({'select', 'poll', 'wait', 'acquire', 'sleep', 'accept', '_worker'})
+
+class ProfilerBusy(Exception):
+    """Raised when a capture is already running"""
+
+_capture_lock = threading.Lock()
+
+def check_admin_token(token: Optional[str], expected: Optional[str] = ADMIN_TOKEN) -> bool:
+    """Constant-time comparison of a presented admin token"""
+    if not expected or not token:
+        return False
+    return hmac.compare_digest(token.encode(), expected.encode())
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+class SamplingProfile:
+    """Result of one capture: collapsed stacks with sample counts"""
+
+    def __init__(self, stacks: Counter, samples: int, seconds: float, requests: int, interval_ms: float):
+        self.stacks = stacks
+        self.samples = samples
+        self.seconds = seconds
+        self.requests = requests
+        self.interval_ms = interval_ms
+
+    def collapsed(self) -> str:
+        """One 'frame;frame;frame count' line per distinct stack, root first"""
+        lines = [f"{stack} {count}" for stack, count in self.stacks.most_common()]
+        return "\n".join(lines) + ("\n" if lines else "")
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "samples": self.samples,
+            "seconds": round(self.seconds, 3),
+            "requests": self.requests,
+            "interval_ms": self.interval_ms
+        }
+
+def sample_stacks(
+    seconds: float,
+    interval_ms: float = PROFILE_INTERVAL_MS,
+    stop_after_requests: int = 0,
+    request_count: Optional[Callable[[], float]] = None,
+    include_idle: bool = False
+) -> SamplingProfile:
+    """
+    Sample all threads' stacks until the window ends (blocking)
+
+    Args:
+        seconds: Capture length, capped at PROFILE_MAX_SECONDS
+        interval_ms: Time between samples (at least PROFILE_MIN_INTERVAL_MS)
+        stop_after_requests: Stop early once this many requests have
+                             completed (0: run for the whole window)
+        request_count: Returns the number of completed requests so far
+        include_idle: Keep stacks of threads waiting for work
+
+    Raises:
+        ProfilerBusy: If another capture is running
+    """
+    if not _capture_lock.acquire(blocking=False):
+        raise ProfilerBusy("A profile is already being captured")
+    try:
+        seconds = min(max(seconds, 0.0), PROFILE_MAX_SECONDS)
+        interval = max(interval_ms, PROFILE_MIN_INTERVAL_MS) / 1000
+        me = threading.get_ident()
+        names = {}
+        stacks: Counter = Counter()
+        samples = 0
+        baseline = request_count() if request_count else 0
+        completed = 0
+
+        start = time.perf_counter()
+        deadline = start + seconds
+        while time.perf_counter() < deadline:
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == me:
+                    continue
+                if not include_idle and frame.f_code.co_name in IDLE_FUNCTIONS:
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                if thread_id not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                labels.append(f"thread:{names.get(thread_id, thread_id)}")
+                stacks[";".join(reversed(labels))] += 1
+            samples += 1
+            if stop_after_requests and request_count is not None:
+                completed = int(request_count() - baseline)
+                if completed >= stop_after_requests:
+                    break
+            time.sleep(interval)
+        elapsed = time.perf_counter() - start
+        if request_count is not None:
+            completed = int(request_count() - baseline)
+        return SamplingProfile(stacks, samples, elapsed, completed, interval * 1000)
+    finally:
+        _capture_lock.release()
@@ -0,0 +1,449 @@
+"""
+Async Data Access for the Robusta Coffee ML API
+Reads farm, lot and environmental data and writes ML results without
+blocking the event loop. The psycopg2 functions in
+"py try/database_integration_example.py" would stall every request while
+they wait on the database.
+
+Repository is the interface handlers use. Two implementations:
+    PostgresRepository  asyncpg connection pool (pip install asyncpg)
+    InMemoryRepository  dict-backed stand-in with the same behaviour, for
+                        tests and local runs without a database
+
+Hot reads (get_user_farms, get_farm_lots, get_farm_environmental_data) are
+prepared once per pooled connection when it opens: asyncpg keeps them in the
+connection's statement cache, so requests skip the parse and plan step.
+NUMERIC columns are decoded to float, so rows go straight into scoring and
+JSON responses. soil_pH keeps its case (PostgreSQL would fold it to soil_ph),
+matching the scoring parameters.
+
+Two databases: the reads use the dashboard schema ("py try/database_schema.sql":
+farms, coffee_lots, environmental_data, integer user ids). The writes use the
+ML tables from migrations/ml_integration (quality_predictions, yield_forecasts,
+keyed by the UUID users(id) of the app's Supabase database). No database has
+both, so each side gets its own DSN and pool, and a method whose side is not
+configured raises RepositoryUnavailable.
+
+Environment variables:
+    ML_DATABASE_URL       postgresql://... DSN of the ML tables (writes), or
+                          'memory' for the stand-in (both sides)
+    ML_FARM_DATABASE_URL  postgresql://... DSN of the dashboard tables (reads)
+                          (both unset: no repository, the API runs stateless)
+    ML_DB_POOL_MIN        Connections opened at startup (default 1)
+    ML_DB_POOL_MAX        Most connections open at once (default 10)
+    ML_DB_TIMEOUT         Seconds before a query is cancelled (default 10)
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+import os
+import time
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from datetime import date
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+try:
+    import asyncpg
+except ImportError:  # optional: pip install asyncpg
+    asyncpg = None
+
+from .metrics import DB_QUERY_LATENCY
+from .serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+DATABASE_URL = os.environ.get('ML_DATABASE_URL', '')
+FARM_DATABASE_URL = os.environ.get('ML_FARM_DATABASE_URL', '')
+POOL_MIN = int(os.environ.get('ML_DB_POOL_MIN', 1))
+POOL_MAX = int(os.environ.get('ML_DB_POOL_MAX', 10))
+QUERY_TIMEOUT = float(os.environ.get('ML_DB_TIMEOUT', 10))
+
+# =====================================
+# QUERIES
+# =====================================
+
+USER_FARMS_SQL = """
+    SELECT farm_id, farm_name, total_area_hectares, elevation_masl,
+           location_province, location_municipality, location_barangay
+    FROM farms
+    WHERE user_id = $1 AND is_active = TRUE
+    ORDER BY farm_name
+"""
+
+FARM_LOTS_SQL = """
+    SELECT lot_id, lot_name, area_hectares, planting_date, variety, total_plants
+    FROM coffee_lots
+    WHERE farm_id = $1 AND is_active = TRUE
+    ORDER BY lot_name
+"""
+
+FARM_ENVIRONMENT_SQL = """
+    SELECT record_date, monthly_temp_avg_c, monthly_rainfall_mm,
+           soil_pH AS "soil_pH", soil_moisture_pct, relative_humidity_pct
+    FROM environmental_data
+    WHERE farm_id = $1
+    ORDER BY record_date DESC
+    LIMIT $2
+"""
+
+# Prepared on every new farm-pool connection: query -> arguments matching no rows
+HOT_QUERIES = {
+    USER_FARMS_SQL: (0,),
+    FARM_LOTS_SQL: (0,),
+    FARM_ENVIRONMENT_SQL: (0, 0),
+}
+
+INSERT_QUALITY_PREDICTION_SQL = """
+    INSERT INTO quality_predictions (
+        farmer_id, plant_id, harvest_id, quality_score,
+        climate_suitability, soil_suitability, fertilization_factor, pest_factor,
+        fine_probability, premium_probability, commercial_probability, created_by
+    ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $1)
+    RETURNING prediction_id
+"""
+
+INSERT_YIELD_FORECAST_SQL = """
+    INSERT INTO yield_forecasts (
+        farmer_id, plant_id, forecast_years, plant_age_months, farm_area_ha,
+        elevation_masl, monthly_temp_avg_c, monthly_rainfall_mm, soil_pH,
+        soil_moisture_pct, fertilization_type, fertilization_frequency,
+        pest_management_frequency, forecast_data, summary_metrics,
+        suitability_scores, created_by
+    ) VALUES (
+        $1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13,
+        $14::jsonb, $15::jsonb, $16::jsonb, $1
+    )
+    RETURNING forecast_id
+"""
+
+# yield_forecasts input columns, taken from the predict_yield parameters
+FORECAST_PARAM_COLUMNS = (
+    'plant_age_months', 'farm_area_ha', 'elevation_masl', 'monthly_temp_avg_c',
+    'monthly_rainfall_mm', 'soil_pH', 'soil_moisture_pct', 'fertilization_type',
+    'fertilization_frequency', 'pest_management_frequency'
+)
+
+QUALITY_RESULT_COLUMNS = (
+    'quality_score', 'climate_suitability', 'soil_suitability', 'fertilization_factor',
+    'pest_factor', 'fine_probability', 'premium_probability', 'commercial_probability'
+)
+
+def _json(value: Any) -> str:
+    return dumps(value).decode('utf-8')
+
+class RepositoryUnavailable(RuntimeError):
+    """Raised when a method needs a database that is not configured"""
+
+# =====================================
+# INTERFACE
+# =====================================
+
+class Repository(ABC):
+    """Data access used by the API handlers"""
+
+    @abstractmethod
+    async def get_user_farms(self, user_id: int) -> List[Dict[str, Any]]:
+        """Active farms of a user, by name"""
+
+    @abstractmethod
+    async def get_farm_lots(self, farm_id: int) -> List[Dict[str, Any]]:
+        """Active coffee lots of a farm, by name"""
+
+    @abstractmethod
+    async def get_farm_environmental_data(self, farm_id: int, months: int = 12) -> List[Dict[str, Any]]:
+        """Latest monthly environmental records of a farm, newest first"""
+
+    @abstractmethod
+    async def save_quality_prediction(self, farmer_id: str, result: Dict[str, Any],
+                                      plant_id: Optional[int] = None,
+                                      harvest_id: Optional[int] = None) -> int:
+        """
+        Store a predict_quality_distribution result
+
+        Returns:
+            The new prediction_id
+        """
+
+    @abstractmethod
+    async def save_yield_forecast(self, farmer_id: str, params: Dict[str, Any],
+                                  forecast: Dict[str, Any],
+                                  plant_id: Optional[int] = None) -> int:
+        """
+        Store a predict_yield result with the parameters it was made from
+
+        Returns:
+            The new forecast_id
+        """
+
+    async def close(self) -> None:
+        """Release connections"""
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool size figures"""
+        return {}
+
+# =====================================
+# POSTGRESQL
+# =====================================
+
+class PostgresRepository(Repository):
+    """
+    Repository on asyncpg connection pools, one per schema
+
+    Create it with PostgresRepository.connect(); each method checks a
+    connection out of its schema's pool for the one query and returns it.
+    """
+
+    def __init__(self, farm_pool: Optional["asyncpg.Pool"], results_pool: Optional["asyncpg.Pool"]):
+        self._farm_pool = farm_pool
+        self._results_pool = results_pool
+
+    @classmethod
+    async def connect(cls, farm_dsn: Optional[str] = None, results_dsn: Optional[str] = None,
+                      min_size: int = POOL_MIN, max_size: int = POOL_MAX,
+                      timeout: float = QUERY_TIMEOUT) -> "PostgresRepository":
+        """
+        Open a pool for each configured database
+
+        Args:
+            farm_dsn: Dashboard database (reads); None disables the reads
+            results_dsn: ML database (writes); None disables the writes
+
+        Raises:
+            ImportError: asyncpg is not installed
+        """
+        if asyncpg is None:
+            raise ImportError("PostgresRepository requires asyncpg: pip install asyncpg")
+        options = dict(min_size=min_size, max_size=max_size, command_timeout=timeout)
+        farm_pool = results_pool = None
+        try:
+            if farm_dsn:
+                farm_pool = await asyncpg.create_pool(farm_dsn, init=cls._init_farm_connection, **options)
+            if results_dsn:
+                results_pool = await asyncpg.create_pool(results_dsn, init=cls._init_connection, **options)
+        except BaseException:
+            if farm_pool is not None:
+                await farm_pool.close()
+            raise
+        return cls(farm_pool, results_pool)
+
+    @staticmethod
+    async def _init_connection(conn: "asyncpg.Connection") -> None:
+        """Per-connection setup: NUMERIC as float"""
+        await conn.set_type_codec(
+            'numeric', schema='pg_catalog', encoder=str, decoder=float, format='text'
+        )
+
+    @classmethod
+    async def _init_farm_connection(cls, conn: "asyncpg.Connection") -> None:
+        """Per-connection setup for the reads: also prepares the hot statements"""
+        await cls._init_connection(conn)
+        # A zero-row run puts each statement in the connection's statement
+        # cache (prepare() alone does not), so later calls reuse the plan.
+        # Warming is an optimisation: a failure (e.g. a missing table) is
+        # logged and left to surface on the request that runs the query.
+        for sql, args in HOT_QUERIES.items():
+            try:
+                await conn.fetch(sql, *args)
+            except asyncpg.PostgresError as e:
+                logger.warning("Could not prepare hot query (%s): %s", e.__class__.__name__, e)
+
+    @staticmethod
+    def _require(pool: Optional["asyncpg.Pool"], setting: str) -> "asyncpg.Pool":
+        if pool is None:
+            raise RepositoryUnavailable(f"No database configured for this query (set {setting})")
+        return pool
+
+    @asynccontextmanager
+    async def _timed(self, query: str, pool: "asyncpg.Pool") -> AsyncIterator["asyncpg.Connection"]:
+        started = time.perf_counter()
+        try:
+            async with pool.acquire() as conn:
+                yield conn
+        finally:
+            DB_QUERY_LATENCY.labels(query).observe(time.perf_counter() - started)
+
+    async def _fetch(self, query: str, sql: str, *args: Any) -> List[Dict[str, Any]]:
+        pool = self._require(self._farm_pool, 'ML_FARM_DATABASE_URL')
+        async with self._timed(query, pool) as conn:
+            rows = await conn.fetch(sql, *args)
+        return [dict(row) for row in rows]
+
+    async def get_user_farms(self, user_id: int) -> List[Dict[str, Any]]:
+        return await self._fetch('user_farms', USER_FARMS_SQL, user_id)
+
+    async def get_farm_lots(self, farm_id: int) -> List[Dict[str, Any]]:
+        return await self._fetch('farm_lots', FARM_LOTS_SQL, farm_id)
+
+    async def get_farm_environmental_data(self, farm_id: int, months: int = 12) -> List[Dict[str, Any]]:
+        return await self._fetch('farm_environment', FARM_ENVIRONMENT_SQL, farm_id, months)
+
+    async def save_quality_prediction(self, farmer_id: str, result: Dict[str, Any],
+                                      plant_id: Optional[int] = None,
+                                      harvest_id: Optional[int] = None) -> int:
+        pool = self._require(self._results_pool, 'ML_DATABASE_URL')
+        async with self._timed('save_quality_prediction', pool) as conn:
+            return await conn.fetchval(
+                INSERT_QUALITY_PREDICTION_SQL, farmer_id, plant_id, harvest_id,
+                *(result.get(column) for column in QUALITY_RESULT_COLUMNS)
+            )
+
+    async def save_yield_forecast(self, farmer_id: str, params: Dict[str, Any],
+                                  forecast: Dict[str, Any],
+                                  plant_id: Optional[int] = None) -> int:
+        pool = self._require(self._results_pool, 'ML_DATABASE_URL')
+        async with self._timed('save_yield_forecast', pool) as conn:
+            return await conn.fetchval(
+                INSERT_YIELD_FORECAST_SQL, farmer_id, plant_id,
+                params.get('forecast_years', 5),
+                *(params.get(column) for column in FORECAST_PARAM_COLUMNS),
+                _json(forecast['forecast_data']),
+                _json(forecast['summary']),
+                _json(forecast.get('suitability_scores')),
+            )
+
+    async def close(self) -> None:
+        for pool in (self._farm_pool, self._results_pool):
+            if pool is not None:
+                await pool.close()
+
+    @staticmethod
+    def _pool_stats(pool: "asyncpg.Pool") -> Dict[str, Any]:
+        size = pool.get_size()
+        idle = pool.get_idle_size()
+        return {
+            'open': size,
+            'in_use': size - idle,
+            'idle': idle,
+            'max': pool.get_max_size(),
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {name: self._pool_stats(pool)
+                for name, pool in (('farm', self._farm_pool), ('results', self._results_pool))
+                if pool is not None}
+
+# =====================================
+# IN-MEMORY STAND-IN
+# =====================================
+
+class InMemoryRepository(Repository):
+    """
+    Dict-backed Repository for tests and local runs
+
+    Seed it with add_farm/add_lot/add_environmental_record; rows come back
+    with the same keys, filters and order as the SQL queries.
+    """
+
+    def __init__(self):
+        self.farms: Dict[int, Dict[str, Any]] = {}
+        self.lots: Dict[int, Dict[str, Any]] = {}
+        # (farm_id, record_date) -> record, as the table's unique key
+        self.environment: Dict[Any, Dict[str, Any]] = {}
+        self.quality_predictions: Dict[int, Dict[str, Any]] = {}
+        self.yield_forecasts: Dict[int, Dict[str, Any]] = {}
+        self._ids = itertools.count(1)
+        self._lock = asyncio.Lock()
+
+    # ----- seeding -----
+
+    def add_farm(self, user_id: int, farm_name: str, total_area_hectares: float,
+                 is_active: bool = True, **fields: Any) -> int:
+        farm_id = next(self._ids)
+        self.farms[farm_id] = dict(fields, farm_id=farm_id, user_id=user_id, farm_name=farm_name,
+                                   total_area_hectares=total_area_hectares, is_active=is_active)
+        return farm_id
+
+    def add_lot(self, farm_id: int, lot_name: str, area_hectares: float,
+                is_active: bool = True, **fields: Any) -> int:
+        lot_id = next(self._ids)
+        self.lots[lot_id] = dict(fields, lot_id=lot_id, farm_id=farm_id, lot_name=lot_name,
+                                 area_hectares=area_hectares, is_active=is_active)
+        return lot_id
+
+    def add_environmental_record(self, farm_id: int, record_date: date, **fields: Any) -> None:
+        self.environment[(farm_id, record_date)] = dict(fields, farm_id=farm_id, record_date=record_date)
+
+    # ----- Repository -----
+
+    @staticmethod
+    def _select(rows, columns) -> List[Dict[str, Any]]:
+        return [{column: row.get(column) for column in columns} for row in rows]
+
+    async def get_user_farms(self, user_id: int) -> List[Dict[str, Any]]:
+        rows = sorted((f for f in self.farms.values() if f['user_id'] == user_id and f['is_active']),
+                      key=lambda f: f['farm_name'])
+        return self._select(rows, (
+            'farm_id', 'farm_name', 'total_area_hectares', 'elevation_masl',
+            'location_province', 'location_municipality', 'location_barangay'
+        ))
+
+    async def get_farm_lots(self, farm_id: int) -> List[Dict[str, Any]]:
+        rows = sorted((lot for lot in self.lots.values() if lot['farm_id'] == farm_id and lot['is_active']),
+                      key=lambda lot: lot['lot_name'])
+        return self._select(rows, (
+            'lot_id', 'lot_name', 'area_hectares', 'planting_date', 'variety', 'total_plants'
+        ))
+
+    async def get_farm_environmental_data(self, farm_id: int, months: int = 12) -> List[Dict[str, Any]]:
+        rows = sorted((r for r in self.environment.values() if r['farm_id'] == farm_id),
+                      key=lambda r: r['record_date'], reverse=True)[:months]
+        return self._select(rows, (
+            'record_date', 'monthly_temp_avg_c', 'monthly_rainfall_mm',
+            'soil_pH', 'soil_moisture_pct', 'relative_humidity_pct'
+        ))
+
+    async def save_quality_prediction(self, farmer_id: str, result: Dict[str, Any],
+                                      plant_id: Optional[int] = None,
+                                      harvest_id: Optional[int] = None) -> int:
+        async with self._lock:
+            prediction_id = next(self._ids)
+            self.quality_predictions[prediction_id] = dict(
+                {column: result.get(column) for column in QUALITY_RESULT_COLUMNS},
+                prediction_id=prediction_id, farmer_id=farmer_id, plant_id=plant_id,
+                harvest_id=harvest_id, created_by=farmer_id
+            )
+        return prediction_id
+
+    async def save_yield_forecast(self, farmer_id: str, params: Dict[str, Any],
+                                  forecast: Dict[str, Any],
+                                  plant_id: Optional[int] = None) -> int:
+        async with self._lock:
+            forecast_id = next(self._ids)
+            self.yield_forecasts[forecast_id] = dict(
+                {column: params.get(column) for column in FORECAST_PARAM_COLUMNS},
+                forecast_id=forecast_id, farmer_id=farmer_id, plant_id=plant_id,
+                forecast_years=params.get('forecast_years', 5),
+                # Round-tripped through JSON, as JSONB would store it
+                forecast_data=json.loads(_json(forecast['forecast_data'])),
+                summary_metrics=json.loads(_json(forecast['summary'])),
+                suitability_scores=json.loads(_json(forecast.get('suitability_scores'))),
+                created_by=farmer_id
+            )
+        return forecast_id
+
+    def stats(self) -> Dict[str, Any]:
+        return {'farms': len(self.farms), 'lots': len(self.lots),
+                'environmental_records': len(self.environment)}
+
+# =====================================
+# CONFIGURATION
+# =====================================
+
+async def open_repository(url: str = DATABASE_URL,
+                          farm_url: str = FARM_DATABASE_URL) -> Optional[Repository]:
+    """
+    Repository for ML_DATABASE_URL and ML_FARM_DATABASE_URL
+
+    Returns:
+        InMemoryRepository when url is 'memory', PostgresRepository when
+        either DSN is set, None when no database is configured
+    """
+    if url == 'memory':
+        return InMemoryRepository()
+    if not url and not farm_url:
+        return None
+    return await PostgresRepository.connect(farm_dsn=farm_url or None, results_dsn=url or None)
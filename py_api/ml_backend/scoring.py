@@ -0,0 +1,891 @@
+"""
+Robusta Coffee Scoring Module
+Canonical rule-based scoring engine: grading, suitability scores, quality
+distribution and recommendations
+
+Every service scores through this module - the FastAPI ML API, the Flask
+/predict API (api/grading_logic.py) and the Streamlit dashboard - so the
+parameters below are the single source of truth. scoring_batch.py provides the
+vectorized (NumPy) versions of the same functions for batch workloads.
+
+Pure Python with no third-party imports, so grading-only workers can import it
+without paying for pandas or scikit-learn
+"""
+
+from typing import Dict, List, Any, Optional, Tuple
+
+# =====================================
+# CANONICAL SCORING PARAMETERS
+# =====================================
+
+# PNS grade upper bounds on total defect % (grades 1-4; above the last is grade 5)
+PNS_GRADE_LIMITS = (10, 15, 25, 40)
+
+# CQI/UCDA Fine/Premium thresholds
+FINE_MAX_SECONDARY_DEFECTS = 5
+PREMIUM_MAX_TOTAL_DEFECTS = 12
+SPECIALTY_MIN_CUPPING_SCORE = 80
+
+# Bean size classes: (minimum screen size in mm, class), largest first
+BEAN_SIZE_CLASSES = ((7.5, 'Large'), (6.5, 'Medium'), (5.5, 'Small'))
+BEAN_SIZE_BELOW_STANDARD = 'Below Standard'
+
+# Optimal growing conditions for Robusta
+ELEVATION_OPTIMAL_CENTER = 900  # midpoint of 600-1200 masl
+ELEVATION_OPTIMAL_RANGE = 300  # half of the range
+ELEVATION_OPTIMAL_BOUNDS = (600, 1200)
+TEMP_OPTIMAL_C = 19.5  # midpoint of 13-26°C
+TEMP_TOLERANCE_C = 13
+RAINFALL_OPTIMAL_MM = 200
+RAINFALL_SCORE_CAP = 1.5
+SOIL_PH_OPTIMAL = 6.0  # pH 5.6-6.5
+SOIL_PH_TOLERANCE = 1.5
+SOIL_MOISTURE_SATURATION_PCT = 35
+
+# Climate suitability weights: temperature, rainfall, elevation
+CLIMATE_WEIGHTS = (0.3, 0.3, 0.4)
+
+# Overall quality index weights: climate, soil, moisture, (1 - environmental stress)
+QUALITY_INDEX_WEIGHTS = (0.3, 0.3, 0.2, 0.2)
+
+# Cupping score estimated from the overall quality index
+CUPPING_BASE_SCORE = 75
+CUPPING_QUALITY_SCALE = 20
+
+# Defect % reference: 350g sample, average bean weight ~0.15g per bean
+SAMPLE_BEAN_COUNT = 350 / 0.15  # approximately 2333 beans
+
+# Grade distribution by management/conditions quality score:
+# (minimum score, fine, premium, commercial), highest band first
+GRADE_DISTRIBUTION_BANDS = (
+    (0.85, 0.6, 0.35, 0.05),
+    (0.75, 0.4, 0.45, 0.15),
+    (0.65, 0.2, 0.5, 0.3)
+)
+GRADE_DISTRIBUTION_FLOOR = (0.1, 0.3, 0.6)
+
+# Management quality score weights: fertilization, pest management, climate, soil
+MANAGEMENT_QUALITY_WEIGHTS = (0.3, 0.3, 0.2, 0.2)
+
+# Green-bean sample grading (Flask /predict)
+SAMPLE_ELEVATION_DEFAULT_SCORE = 0.8  # when altitude is not provided
+SAMPLE_PROCESSING_SCORES = {0: 0.95, 1: 0.85}  # 0=Washed/Wet, 1=Natural/Dry
+SAMPLE_COLOR_SCORES = {0: 0.80, 1: 0.90, 2: 0.95}  # 0=Green, 1=Bluish-Green, 2=Blue-Green
+SAMPLE_COLOR_DEFAULT_SCORE = 0.85
+# Bean moisture bands: (score, ((low, high), ...)); anything else scores SAMPLE_MOISTURE_FLOOR
+SAMPLE_MOISTURE_BANDS = (
+    (1.0, ((12, 14),)),
+    (0.95, ((10, 12), (14, 15))),
+    (0.90, ((8, 10), (15, 16)))
+)
+SAMPLE_MOISTURE_FLOOR = 0.80
+# Defect penalty by total defect count: none for exactly zero defects, then
+# (maximum count, penalty) bands and the floor. Only zero is penalty-free:
+# negative counts (accepted by older clients) fall in the first band.
+SAMPLE_DEFECT_PENALTIES = ((5, -2), (12, -5))
+SAMPLE_DEFECT_PENALTY_FLOOR = -10
+SAMPLE_PRIMARY_DEFECT_PENALTY = 3
+# Sample quality index weights: elevation, processing, color, moisture (+ base)
+SAMPLE_QUALITY_WEIGHTS = (0.25, 0.20, 0.20, 0.15)
+SAMPLE_QUALITY_BASE = 0.20
+SAMPLE_CUPPING_RANGE = (60, 95)
+
+# =====================================
+# GRADING FUNCTIONS
+# =====================================
+
+def calculate_pns_grade(total_defect_pct: float) -> int:
+    """
+    Calculate PNS grade based on total defect percentage for Robusta
+    Grade 1: max 10%
+    Grade 2: max 15%
+    Grade 3: max 25%
+    Grade 4: max 40%
+    Grade 5: >40% (Below standard)
+    
+    Args:
+        total_defect_pct: Total defect percentage
+        
+    Returns:
+        PNS grade (1-5)
+    """
+    for grade, limit in enumerate(PNS_GRADE_LIMITS, start=1):
+        if total_defect_pct <= limit:
+            return grade
+    return len(PNS_GRADE_LIMITS) + 1  # Below standard
+
+def calculate_fine_premium_grade(primary_defects: int, secondary_defects: int, cupping_score: float = 82.0) -> str:
+    """
+    Calculate Fine/Premium Robusta grade based on CQI/UCDA standards
+    Fine Robusta: 0 primary defects, max 5 secondary defects, score >= 80
+    Premium Robusta: max 12 combined defects, score >= 80
+    Commercial: otherwise
+    
+    Args:
+        primary_defects: Number of primary (Category 1) defects
+        secondary_defects: Number of secondary (Category 2) defects
+        cupping_score: Cupping score (default 82)
+        
+    Returns:
+        Grade classification: 'Fine', 'Premium', or 'Commercial'
+    """
+    specialty_score = cupping_score >= SPECIALTY_MIN_CUPPING_SCORE
+    if primary_defects == 0 and secondary_defects <= FINE_MAX_SECONDARY_DEFECTS and specialty_score:
+        return 'Fine'
+    elif (primary_defects + secondary_defects) <= PREMIUM_MAX_TOTAL_DEFECTS and specialty_score:
+        return 'Premium'
+    else:
+        return 'Commercial'
+
+def classify_bean_size(screen_size_mm: float) -> str:
+    """
+    Classify bean size for Robusta based on screen size
+    Large: retained by 5.6mm screen (dry processed) or 7.5mm (wet processed)
+    Small: passes through but retained by smaller screens
+    
+    Args:
+        screen_size_mm: Bean screen size in millimeters
+        
+    Returns:
+        Size classification: 'Large', 'Medium', 'Small', or 'Below Standard'
+    """
+    for min_size, size_class in BEAN_SIZE_CLASSES:
+        if screen_size_mm >= min_size:
+            return size_class
+    return BEAN_SIZE_BELOW_STANDARD
+
+def calculate_defect_pct(primary_defects: int, secondary_defects: int) -> float:
+    """
+    Calculate total defect percentage of a standard 350g sample
+    
+    Args:
+        primary_defects: Number of primary (Category 1) defects
+        secondary_defects: Number of secondary (Category 2) defects
+        
+    Returns:
+        Total defect percentage
+    """
+    return ((primary_defects + secondary_defects) / SAMPLE_BEAN_COUNT) * 100
+
+def estimate_cupping_score(overall_quality_index: float) -> float:
+    """
+    Estimate a cupping score from the overall quality index
+    
+    Args:
+        overall_quality_index: Overall quality index (0-1)
+        
+    Returns:
+        Estimated cupping score
+    """
+    return CUPPING_BASE_SCORE + (overall_quality_index * CUPPING_QUALITY_SCALE)
+
+# =====================================
+# SUITABILITY SCORES
+# =====================================
+
+def calculate_elevation_score(elevation_masl: float) -> float:
+    """
+    Calculate elevation suitability score for Robusta (600-1200 masl optimal)
+    
+    Args:
+        elevation_masl: Elevation in meters above sea level
+        
+    Returns:
+        Elevation score (0-1)
+    """
+    elevation_score = 1 - abs(elevation_masl - ELEVATION_OPTIMAL_CENTER) / ELEVATION_OPTIMAL_RANGE
+    return max(0, min(1, elevation_score))
+
+def calculate_temperature_score(temp_avg_c: float) -> float:
+    """
+    Calculate temperature suitability score for Robusta (13-26°C optimal)
+    
+    Args:
+        temp_avg_c: Average temperature in Celsius
+        
+    Returns:
+        Temperature score (0-1)
+    """
+    temp_score = 1 - abs(temp_avg_c - TEMP_OPTIMAL_C) / TEMP_TOLERANCE_C
+    return max(0, min(1, temp_score))
+
+def calculate_rainfall_score(rainfall_mm: float) -> float:
+    """
+    Calculate rainfall suitability score for Robusta (200mm optimal)
+    
+    Args:
+        rainfall_mm: Monthly rainfall in millimeters
+        
+    Returns:
+        Rainfall score (0-1)
+    """
+    rainfall_score = min(rainfall_mm / RAINFALL_OPTIMAL_MM, RAINFALL_SCORE_CAP)
+    return max(0, min(1, rainfall_score))
+
+def calculate_climate_suitability(
+    temp_avg_c: float,
+    rainfall_mm: float,
+    elevation_masl: float
+) -> float:
+    """
+    Calculate overall climate suitability for Robusta
+    
+    Args:
+        temp_avg_c: Average temperature in Celsius
+        rainfall_mm: Monthly rainfall in millimeters
+        elevation_masl: Elevation in meters above sea level
+        
+    Returns:
+        Climate suitability score (0-1)
+    """
+    return combine_climate_scores(
+        calculate_temperature_score(temp_avg_c),
+        calculate_rainfall_score(rainfall_mm),
+        calculate_elevation_score(elevation_masl)
+    )
+
+def combine_climate_scores(temp_score: float, rainfall_score: float, elevation_score: float) -> float:
+    """
+    Weight temperature, rainfall and elevation scores into climate suitability
+    
+    Args:
+        temp_score: Temperature score (0-1)
+        rainfall_score: Rainfall score (0-1)
+        elevation_score: Elevation score (0-1)
+        
+    Returns:
+        Climate suitability score (0-1)
+    """
+    temp_weight, rainfall_weight, elevation_weight = CLIMATE_WEIGHTS
+    return (
+        temp_score * temp_weight + 
+        rainfall_score * rainfall_weight + 
+        elevation_score * elevation_weight
+    )
+
+def calculate_soil_suitability(soil_pH: float) -> float:
+    """
+    Calculate soil suitability for Robusta (pH 5.6-6.5 optimal)
+    
+    Args:
+        soil_pH: Soil pH value
+        
+    Returns:
+        Soil suitability score (0-1)
+    """
+    soil_suitability = 1 - (abs(soil_pH - SOIL_PH_OPTIMAL) / SOIL_PH_TOLERANCE)
+    return max(0, min(1, soil_suitability))
+
+def calculate_moisture_suitability(soil_moisture_pct: float) -> float:
+    """
+    Calculate moisture suitability
+    
+    Args:
+        soil_moisture_pct: Soil moisture percentage
+        
+    Returns:
+        Moisture suitability score (0-1)
+    """
+    moisture_suitability = soil_moisture_pct / SOIL_MOISTURE_SATURATION_PCT
+    return max(0, min(1, moisture_suitability))
+
+def calculate_environmental_stress(
+    temp_avg_c: float,
+    rainfall_mm: float,
+    soil_pH: float,
+    elevation_masl: float
+) -> float:
+    """
+    Calculate environmental stress index
+    
+    Args:
+        temp_avg_c: Average temperature in Celsius
+        rainfall_mm: Monthly rainfall in millimeters
+        soil_pH: Soil pH value
+        elevation_masl: Elevation in meters above sea level
+        
+    Returns:
+        Environmental stress index (0-1)
+    """
+    temp_stress = abs(temp_avg_c - TEMP_OPTIMAL_C) / TEMP_TOLERANCE_C
+    rainfall_stress = abs(rainfall_mm - RAINFALL_OPTIMAL_MM) / RAINFALL_OPTIMAL_MM
+    ph_stress = abs(soil_pH - SOIL_PH_OPTIMAL) / SOIL_PH_TOLERANCE
+    elevation_stress = abs(elevation_masl - ELEVATION_OPTIMAL_CENTER) / ELEVATION_OPTIMAL_RANGE
+    env_stress = (temp_stress + rainfall_stress + ph_stress + elevation_stress) / 4
+    return max(0, min(1, env_stress))
+
+def calculate_overall_quality_index(
+    climate_suitability: float,
+    soil_suitability: float,
+    moisture_suitability: float,
+    environmental_stress_index: float
+) -> float:
+    """
+    Calculate overall quality index
+    
+    Args:
+        climate_suitability: Climate suitability score
+        soil_suitability: Soil suitability score
+        moisture_suitability: Moisture suitability score
+        environmental_stress_index: Environmental stress index
+        
+    Returns:
+        Overall quality index (0-1)
+    """
+    climate_weight, soil_weight, moisture_weight, stress_weight = QUALITY_INDEX_WEIGHTS
+    overall_quality_index = (
+        climate_suitability * climate_weight +
+        soil_suitability * soil_weight +
+        moisture_suitability * moisture_weight +
+        (1 - environmental_stress_index) * stress_weight
+    )
+    return overall_quality_index
+
+def calculate_suitability_scores(
+    elevation_masl: float,
+    temp_avg_c: float,
+    rainfall_mm: float,
+    soil_pH: float,
+    soil_moisture_pct: float,
+    environmental_stress_index: Optional[float] = None
+) -> Dict[str, float]:
+    """
+    Calculate every site suitability score in one pass
+    
+    Args:
+        elevation_masl: Elevation in meters above sea level
+        temp_avg_c: Average monthly temperature in Celsius
+        rainfall_mm: Monthly rainfall in millimeters
+        soil_pH: Soil pH value
+        soil_moisture_pct: Soil moisture percentage
+        environmental_stress_index: Known stress index (calculated if None)
+        
+    Returns:
+        Dictionary with elevation_score, temp_score, rainfall_score,
+        climate_suitability, soil_suitability, moisture_suitability,
+        environmental_stress_index and overall_quality_index
+    """
+    elevation_score = calculate_elevation_score(elevation_masl)
+    temp_score = calculate_temperature_score(temp_avg_c)
+    rainfall_score = calculate_rainfall_score(rainfall_mm)
+    climate_suitability = combine_climate_scores(temp_score, rainfall_score, elevation_score)
+    soil_suitability = calculate_soil_suitability(soil_pH)
+    moisture_suitability = calculate_moisture_suitability(soil_moisture_pct)
+    
+    if environmental_stress_index is None:
+        environmental_stress_index = calculate_environmental_stress(
+            temp_avg_c, rainfall_mm, soil_pH, elevation_masl
+        )
+    
+    return {
+        'elevation_score': elevation_score,
+        'temp_score': temp_score,
+        'rainfall_score': rainfall_score,
+        'climate_suitability': climate_suitability,
+        'soil_suitability': soil_suitability,
+        'moisture_suitability': moisture_suitability,
+        'environmental_stress_index': environmental_stress_index,
+        'overall_quality_index': calculate_overall_quality_index(
+            climate_suitability, soil_suitability, moisture_suitability, environmental_stress_index
+        )
+    }
+
+def is_optimal_elevation(elevation_masl: float) -> bool:
+    """Whether an elevation lies in the optimal 600-1200 masl band"""
+    low, high = ELEVATION_OPTIMAL_BOUNDS
+    return low <= elevation_masl <= high
+
+# =====================================
+# GRADE DISTRIBUTION
+# =====================================
+
+def calculate_management_quality_score(
+    fertilization_factor: float,
+    pest_factor: float,
+    climate_suitability: float,
+    soil_suitability: float
+) -> float:
+    """
+    Combine management practices and site conditions into a quality score
+    
+    Args:
+        fertilization_factor: Fertilization factor
+        pest_factor: Pest management factor
+        climate_suitability: Climate suitability score (0-1)
+        soil_suitability: Soil suitability score (0-1)
+        
+    Returns:
+        Quality score used to pick a grade distribution band
+    """
+    fert_weight, pest_weight, climate_weight, soil_weight = MANAGEMENT_QUALITY_WEIGHTS
+    return (fertilization_factor * fert_weight + 
+            pest_factor * pest_weight + 
+            climate_suitability * climate_weight + 
+            soil_suitability * soil_weight)
+
+def calculate_grade_distribution(quality_score: float) -> Tuple[float, float, float]:
+    """
+    Grade distribution probabilities for a management quality score
+    
+    Args:
+        quality_score: Quality score from calculate_management_quality_score
+        
+    Returns:
+        (fine_probability, premium_probability, commercial_probability)
+    """
+    for min_score, fine_prob, premium_prob, commercial_prob in GRADE_DISTRIBUTION_BANDS:
+        if quality_score >= min_score:
+            return fine_prob, premium_prob, commercial_prob
+    return GRADE_DISTRIBUTION_FLOOR
+
+# =====================================
+# GREEN-BEAN SAMPLE GRADING
+# =====================================
+
+def calculate_sample_moisture_score(moisture: float) -> float:
+    """
+    Score bean moisture (optimal: 12-14%, penalize if too high or too low)
+    
+    Args:
+        moisture: Bean moisture percentage
+        
+    Returns:
+        Moisture score (0.8-1.0)
+    """
+    for score, ranges in SAMPLE_MOISTURE_BANDS:
+        for low, high in ranges:
+            if low <= moisture <= high:
+                return score
+    return SAMPLE_MOISTURE_FLOOR
+
+def calculate_sample_defect_penalty(primary_defects: int, secondary_defects: int) -> float:
+    """
+    Cupping score penalty for defects (more defects = lower score,
+    primary defects are more severe)
+    
+    Args:
+        primary_defects: Number of primary (Category 1) defects
+        secondary_defects: Number of secondary (Category 2) defects
+        
+    Returns:
+        Penalty (zero or negative)
+    """
+    total_defects = primary_defects + secondary_defects
+    defect_penalty = SAMPLE_DEFECT_PENALTY_FLOOR
+    if total_defects == 0:
+        defect_penalty = 0
+    else:
+        for max_count, penalty in SAMPLE_DEFECT_PENALTIES:
+            if total_defects <= max_count:
+                defect_penalty = penalty
+                break
+    
+    if primary_defects > 0:
+        defect_penalty -= (primary_defects * SAMPLE_PRIMARY_DEFECT_PENALTY)
+    return defect_penalty
+
+def calculate_cupping_score(altitude: float, processing_method: int, colors: int, moisture: float,
+                            primary_defects: int, secondary_defects: int) -> float:
+    """
+    Calculate estimated cupping score of a green-bean sample
+    Base score: 75, adjusted by quality factors (clamped to 60-95)
+    
+    Args:
+        altitude: Elevation in meters (0 or None if unknown)
+        processing_method: 0=Washed/Wet, 1=Natural/Dry
+        colors: 0=Green, 1=Bluish-Green, 2=Blue-Green
+        moisture: Bean moisture percentage
+        primary_defects: Number of primary (Category 1) defects
+        secondary_defects: Number of secondary (Category 2) defects
+        
+    Returns:
+        Cupping score rounded to one decimal
+    """
+    elevation_score = calculate_elevation_score(altitude) if altitude else SAMPLE_ELEVATION_DEFAULT_SCORE
+    processing_score = SAMPLE_PROCESSING_SCORES[0] if processing_method == 0 else SAMPLE_PROCESSING_SCORES[1]
+    color_score = SAMPLE_COLOR_SCORES.get(colors, SAMPLE_COLOR_DEFAULT_SCORE)
+    moisture_score = calculate_sample_moisture_score(moisture)
+    defect_penalty = calculate_sample_defect_penalty(primary_defects, secondary_defects)
+    
+    elevation_weight, processing_weight, color_weight, moisture_weight = SAMPLE_QUALITY_WEIGHTS
+    quality_index = (
+        elevation_score * elevation_weight +
+        processing_score * processing_weight +
+        color_score * color_weight +
+        moisture_score * moisture_weight +
+        SAMPLE_QUALITY_BASE
+    )
+    
+    cupping_score = CUPPING_BASE_SCORE + (quality_index * CUPPING_QUALITY_SCALE) + defect_penalty
+    
+    low, high = SAMPLE_CUPPING_RANGE
+    cupping_score = max(low, min(high, cupping_score))
+    return round(cupping_score, 1)
+
+def predict_coffee_grade(altitude, bag_weight, processing_method, colors,
+                         moisture, category_one_defects, category_two_defects) -> Dict[str, Any]:
+    """
+    Grade a green-bean sample (the Flask /predict interface, compatible with the R API)
+    
+    Args:
+        altitude: Elevation in meters above sea level
+        bag_weight: Bag weight in kg (not used in calculation but kept for compatibility)
+        processing_method: 0=Washed/Wet, 1=Natural/Dry
+        colors: 0=Green, 1=Bluish-Green, 2=Blue-Green
+        moisture: Moisture percentage (0-20)
+        category_one_defects: Primary defects count
+        category_two_defects: Secondary defects count
+        
+    Returns:
+        Dictionary with predicted_quality_grade and additional metadata
+        
+    Raises:
+        ValueError: If a parameter cannot be converted to a number
+    """
+    # Convert inputs to appropriate types
+    try:
+        altitude = float(altitude) if altitude else 0
+        processing_method = int(processing_method) if processing_method is not None else 0
+        colors = int(colors) if colors is not None else 0
+        moisture = float(moisture) if moisture else 0
+        primary_defects = int(category_one_defects) if category_one_defects is not None else 0
+        secondary_defects = int(category_two_defects) if category_two_defects is not None else 0
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid input parameter: {e}")
+    
+    return grade_sample(altitude, processing_method, colors, moisture, primary_defects, secondary_defects)
+
+def grade_sample(altitude: float, processing_method: int, colors: int, moisture: float,
+                 primary_defects: int, secondary_defects: int) -> Dict[str, Any]:
+    """
+    predict_coffee_grade for already-converted inputs (no parsing)
+    
+    Args:
+        altitude: Elevation in meters (0 if unknown)
+        processing_method: 0=Washed/Wet, 1=Natural/Dry
+        colors: 0=Green, 1=Bluish-Green, 2=Blue-Green
+        moisture: Bean moisture percentage
+        primary_defects: Number of primary (Category 1) defects
+        secondary_defects: Number of secondary (Category 2) defects
+        
+    Returns:
+        Dictionary with predicted_quality_grade and additional metadata
+    """
+    cupping_score = calculate_cupping_score(
+        altitude, processing_method, colors, moisture,
+        primary_defects, secondary_defects
+    )
+    predicted_grade = calculate_fine_premium_grade(
+        primary_defects, secondary_defects, cupping_score
+    )
+    total_defect_pct = calculate_defect_pct(primary_defects, secondary_defects)
+    
+    return {
+        'predicted_quality_grade': predicted_grade,
+        'cupping_score': cupping_score,
+        'pns_grade': calculate_pns_grade(total_defect_pct),
+        'total_defect_pct': round(total_defect_pct, 2),
+        'primary_defects': primary_defects,
+        'secondary_defects': secondary_defects,
+        'total_defects': primary_defects + secondary_defects
+    }
+
+# =====================================
+# PREDICTION FUNCTIONS (API-READY)
+# =====================================
+
+def predict_grade(params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Predict coffee grade from input parameters
+    
+    Args:
+        params: Dictionary with input parameters:
+            - plant_age_months: int
+            - bean_screen_size_mm: float
+            - primary_defects: int
+            - secondary_defects: int
+            - elevation_masl: float
+            - monthly_temp_avg_c: float
+            - monthly_rainfall_mm: float
+            - soil_pH: float
+            - soil_moisture_pct: float
+            - environmental_stress_index: float (optional)
+            - quality_score: float (optional, will be calculated if not provided)
+    
+    Returns:
+        Dictionary with predictions and calculated metrics
+    """
+    # Extract parameters
+    plant_age = params.get('plant_age_months', 48)
+    bean_screen = params.get('bean_screen_size_mm', 6.5)
+    primary_defects = params.get('primary_defects', 0)
+    secondary_defects = params.get('secondary_defects', 3)
+    elevation = params.get('elevation_masl', 900)
+    temp_avg = params.get('monthly_temp_avg_c', 19.5)
+    rainfall = params.get('monthly_rainfall_mm', 200)
+    soil_ph = params.get('soil_pH', 6.0)
+    soil_moisture = params.get('soil_moisture_pct', 25)
+    env_stress = params.get('environmental_stress_index')
+    quality_score = params.get('quality_score')
+    
+    # Calculate total defects percentage
+    total_defect_count = primary_defects + secondary_defects
+    total_defect_pct = calculate_defect_pct(primary_defects, secondary_defects)
+    
+    # Calculate suitability scores (environmental stress calculated if not provided)
+    scores = calculate_suitability_scores(
+        elevation, temp_avg, rainfall, soil_ph, soil_moisture, env_stress
+    )
+    climate_suitability = scores['climate_suitability']
+    soil_suitability = scores['soil_suitability']
+    elevation_score = scores['elevation_score']
+    overall_quality = scores['overall_quality_index']
+    
+    # Calculate cupping score if not provided
+    if quality_score is None:
+        cupping_score = estimate_cupping_score(overall_quality)
+    else:
+        cupping_score = quality_score
+    
+    # Predict grade
+    predicted_grade = calculate_fine_premium_grade(primary_defects, secondary_defects, cupping_score)
+    pns_grade = calculate_pns_grade(total_defect_pct)
+    bean_size_class = classify_bean_size(bean_screen)
+    
+    return {
+        'predicted_grade': predicted_grade,
+        'pns_grade': pns_grade,
+        'bean_size_class': bean_size_class,
+        'cupping_score': round(cupping_score, 2),
+        'total_defect_pct': round(total_defect_pct, 2),
+        'total_defect_count': total_defect_count,
+        'primary_defects': primary_defects,
+        'secondary_defects': secondary_defects,
+        'climate_suitability': round(climate_suitability, 3),
+        'soil_suitability': round(soil_suitability, 3),
+        'elevation_score': round(elevation_score, 3),
+        'overall_quality_index': round(overall_quality, 3),
+        'elevation_category': 'Optimal' if is_optimal_elevation(elevation) else 'Sub-optimal'
+    }
+
+def predict_quality_distribution(params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Predict quality grade distribution probabilities
+    
+    Args:
+        params: Dictionary with input parameters:
+            - quality_score: float (or will be calculated)
+            - climate_suitability: float (or will be calculated)
+            - soil_suitability: float (or will be calculated)
+            - fertilization_factor: float (optional)
+            - pest_factor: float (optional)
+    
+    Returns:
+        Dictionary with quality distribution probabilities
+    """
+    quality_score = params.get('quality_score')
+    climate_suitability = params.get('climate_suitability')
+    soil_suitability = params.get('soil_suitability')
+    fertilization_factor = params.get('fertilization_factor')
+    pest_factor = params.get('pest_factor')
+    
+    # Optional fields may be present but None (e.g. from a request model)
+    if fertilization_factor is None:
+        fertilization_factor = 0.85
+    if pest_factor is None:
+        pest_factor = 0.8
+    
+    # Calculate quality score if not provided
+    if quality_score is None:
+        if climate_suitability is None or soil_suitability is None:
+            # Use default values
+            climate_suitability = 0.8
+            soil_suitability = 0.8
+        quality_score = calculate_management_quality_score(
+            fertilization_factor, pest_factor, climate_suitability, soil_suitability
+        )
+    
+    # Grade distribution probabilities based on quality score
+    fine_prob, premium_prob, commercial_prob = calculate_grade_distribution(quality_score)
+    
+    return {
+        'fine_probability': round(fine_prob, 3),
+        'premium_probability': round(premium_prob, 3),
+        'commercial_probability': round(commercial_prob, 3),
+        'quality_score': round(quality_score, 3)
+    }
+
+# =====================================
+# RECOMMENDATION ENGINE
+# =====================================
+
+def generate_recommendations(params: Dict[str, Any]) -> Dict[str, List[str]]:
+    """
+    Generate personalized recommendations based on input parameters
+    
+    Args:
+        params: Dictionary with input parameters:
+            - plant_age_months: int
+            - soil_pH: float
+            - soil_moisture_pct: float
+            - quality_score: float (optional)
+            - bean_screen_size_mm: float
+            - elevation_masl: float
+            - environmental_stress_index: float (optional)
+            - monthly_temp_avg_c: float
+            - monthly_rainfall_mm: float
+            - primary_defects: int
+            - secondary_defects: int
+            - predicted_grade: str (optional)
+    
+    Returns:
+        Dictionary with recommendation categories and messages
+    """
+    recommendations = {
+        'critical': [],
+        'warnings': [],
+        'suggestions': [],
+        'maintenance': []
+    }
+    
+    # Extract parameters
+    plant_age = params.get('plant_age_months', 48)
+    soil_ph = params.get('soil_pH', 6.0)
+    soil_moisture = params.get('soil_moisture_pct', 25)
+    bean_screen = params.get('bean_screen_size_mm', 6.5)
+    elevation = params.get('elevation_masl', 900)
+    temp_avg = params.get('monthly_temp_avg_c', 19.5)
+    rainfall = params.get('monthly_rainfall_mm', 200)
+    primary_defects = params.get('primary_defects', 0)
+    secondary_defects = params.get('secondary_defects', 3)
+    predicted_grade = params.get('predicted_grade')
+    
+    # Calculate grade if not provided
+    if predicted_grade is None:
+        # Calculate cupping score
+        scores = calculate_suitability_scores(elevation, temp_avg, rainfall, soil_ph, soil_moisture)
+        cupping_score = estimate_cupping_score(scores['overall_quality_index'])
+        predicted_grade = calculate_fine_premium_grade(primary_defects, secondary_defects, cupping_score)
+    
+    # Grade-based recommendations
+    if predicted_grade == 'Commercial':
+        recommendations['critical'].append(
+            "Coffee graded as Commercial - Below Fine/Premium standards"
+        )
+        recommendations['critical'].extend([
+            "Reduce defects through better harvesting (selective picking only)",
+            "Improve processing: Proper fermentation (18-24hrs), clean water, timely drying",
+            "Better sorting: Remove all defective beans before final processing",
+            "Quality control: Regular inspection and grading throughout process"
+        ])
+    
+    # Primary defects
+    if primary_defects > 0:
+        recommendations['critical'].append("Primary defects detected! These are critical quality issues.")
+        recommendations['critical'].extend([
+            "Check for mold during storage (control humidity <60%)",
+            "Prevent over-fermentation (max 24 hours)",
+            "Avoid harvesting overripe or ground cherries",
+            "Implement pest control for coffee berry borer"
+        ])
+    
+    # Secondary defects
+    if secondary_defects > 5:
+        recommendations['warnings'].append("High secondary defects - Exceeds Fine Robusta standards")
+        recommendations['warnings'].extend([
+            "Harvest only ripe cherries (avoid immature/green)",
+            "Careful handling to prevent breakage",
+            "Proper drying (avoid over/under drying)",
+            "Improve soil fertility and plant nutrition"
+        ])
+    
+    # Temperature
+    if temp_avg < 13 or temp_avg > 26:
+        recommendations['warnings'].append(
+            f"Temperature ({temp_avg}°C) outside optimal range (13-26°C)"
+        )
+        recommendations['suggestions'].extend([
+            "Implement shade management (30-40% coverage)",
+            "Consider windbreaks for temperature moderation"
+        ])
+    
+    # Elevation
+    if elevation < 600:
+        recommendations['warnings'].append(
+            f"Elevation ({elevation}m) below optimal range (600-1,200 masl)"
+        )
+        recommendations['suggestions'].extend([
+            "Robusta performs best at 600-1,200 masl",
+            "Lower elevations may result in lower quality beans",
+            "Consider improved agronomic practices to compensate"
+        ])
+    elif elevation > 1200:
+        recommendations['warnings'].append(
+            f"Elevation ({elevation}m) above optimal range (600-1,200 masl)"
+        )
+        recommendations['suggestions'].extend([
+            "Robusta may experience stress at higher elevations",
+            "Consider switching to Arabica for elevations >900 masl",
+            "Implement cold protection measures if needed"
+        ])
+    
+    # Rainfall
+    if rainfall < 150:
+        recommendations['warnings'].append(
+            f"Low rainfall ({rainfall}mm) - Below optimal 200mm"
+        )
+        recommendations['suggestions'].extend([
+            "Implement drip irrigation during dry periods",
+            "Apply mulching to retain soil moisture"
+        ])
+    
+    # Soil pH
+    if soil_ph < 5.6:
+        recommendations['warnings'].append(f"Soil pH ({soil_ph}) too acidic")
+        recommendations['suggestions'].append(
+            "Apply agricultural lime to increase pH to 5.6-6.5 range"
+        )
+    elif soil_ph > 6.5:
+        recommendations['warnings'].append(f"Soil pH ({soil_ph}) too alkaline")
+        recommendations['suggestions'].append(
+            "Apply sulfur or organic matter to decrease pH"
+        )
+    
+    # Bean size
+    if bean_screen < 6.5:
+        recommendations['suggestions'].append("Bean size below optimal - Focus on:")
+        recommendations['suggestions'].extend([
+            "Improve plant nutrition (complete fertilizer 14-14-14)",
+            "Ensure adequate water during cherry development",
+            "Proper spacing (3m x 2m) for better growth"
+        ])
+    
+    # Plant age
+    if plant_age < 36:
+        recommendations['suggestions'].append(
+            "Plant not yet mature - Robusta production starts at 36 months"
+        )
+        recommendations['suggestions'].extend([
+            "Continue vegetative growth management",
+            "Focus on pruning and desuckering"
+        ])
+    
+    # Positive feedback
+    if predicted_grade in ['Fine', 'Premium']:
+        recommendations['maintenance'].append(
+            f"Excellent! Meets {predicted_grade} Robusta standards"
+        )
+        recommendations['maintenance'].extend([
+            "Continue current best practices",
+            "Regular monitoring of all parameters",
+            "Consistent quality control procedures",
+            "Proper post-harvest handling and storage"
+        ])
+        
+        if predicted_grade == 'Fine':
+            recommendations['maintenance'].append(
+                "Premium Market Ready! Your coffee qualifies for specialty markets."
+            )
+    
+    # Remove empty categories
+    return {k: v for k, v in recommendations.items() if v}
@@ -0,0 +1,444 @@
+"""
+Robusta Coffee Batch Scoring Module
+Vectorized (NumPy) versions of the scoring engine in scoring.py
+
+Every function takes array-likes and returns NumPy arrays, using the same
+canonical parameters as the scalar API. Use these for DataFrames, bulk
+endpoints and offline jobs; use scoring.py for single requests.
+"""
+
+import numpy as np
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from .scoring import (
+    PNS_GRADE_LIMITS,
+    FINE_MAX_SECONDARY_DEFECTS,
+    PREMIUM_MAX_TOTAL_DEFECTS,
+    SPECIALTY_MIN_CUPPING_SCORE,
+    BEAN_SIZE_CLASSES,
+    BEAN_SIZE_BELOW_STANDARD,
+    ELEVATION_OPTIMAL_CENTER,
+    ELEVATION_OPTIMAL_RANGE,
+    ELEVATION_OPTIMAL_BOUNDS,
+    TEMP_OPTIMAL_C,
+    TEMP_TOLERANCE_C,
+    RAINFALL_OPTIMAL_MM,
+    RAINFALL_SCORE_CAP,
+    SOIL_PH_OPTIMAL,
+    SOIL_PH_TOLERANCE,
+    SOIL_MOISTURE_SATURATION_PCT,
+    CLIMATE_WEIGHTS,
+    QUALITY_INDEX_WEIGHTS,
+    CUPPING_BASE_SCORE,
+    CUPPING_QUALITY_SCALE,
+    SAMPLE_BEAN_COUNT,
+    GRADE_DISTRIBUTION_BANDS,
+    GRADE_DISTRIBUTION_FLOOR,
+    MANAGEMENT_QUALITY_WEIGHTS,
+    SAMPLE_ELEVATION_DEFAULT_SCORE,
+    SAMPLE_PROCESSING_SCORES,
+    SAMPLE_COLOR_SCORES,
+    SAMPLE_COLOR_DEFAULT_SCORE,
+    SAMPLE_MOISTURE_BANDS,
+    SAMPLE_MOISTURE_FLOOR,
+    SAMPLE_DEFECT_PENALTIES,
+    SAMPLE_DEFECT_PENALTY_FLOOR,
+    SAMPLE_PRIMARY_DEFECT_PENALTY,
+    SAMPLE_QUALITY_WEIGHTS,
+    SAMPLE_QUALITY_BASE,
+    SAMPLE_CUPPING_RANGE
+)
+
+GRADE_LABELS = np.array(['Fine', 'Premium', 'Commercial'], dtype=object)
+
+# Bean size classes in ascending order for searchsorted
+_BEAN_SIZE_BOUNDS = np.array([size for size, _ in reversed(BEAN_SIZE_CLASSES)])
+_BEAN_SIZE_LABELS = np.array(
+    [BEAN_SIZE_BELOW_STANDARD] + [label for _, label in reversed(BEAN_SIZE_CLASSES)],
+    dtype=object
+)
+_PNS_BOUNDS = np.array(PNS_GRADE_LIMITS, dtype=float)
+
+def _floats(values: Any) -> np.ndarray:
+    return np.asarray(values, dtype=float)
+
+def _column(columns: Mapping[str, Any], name: str, default: float, n: int) -> np.ndarray:
+    """Float column from a mapping, filled with the default where missing/NaN/None"""
+    values = columns.get(name)
+    if values is None:
+        return np.full(n, default, dtype=float)
+    values = np.asarray(values, dtype=float)
+    if values.ndim == 0:
+        return np.full(n, float(values))
+    return np.where(np.isnan(values), default, values)
+
+def _optional_column(columns: Mapping[str, Any], name: str, n: int) -> np.ndarray:
+    """Float column from a mapping where NaN/None marks 'not provided'"""
+    values = columns.get(name)
+    if values is None:
+        return np.full(n, np.nan)
+    values = np.asarray(values, dtype=float)
+    if values.ndim == 0:
+        return np.full(n, float(values))
+    return values
+
+def _round(values: Any, digits: int) -> np.ndarray:
+    """np.round that agrees with Python's round() on values that sit near a tie"""
+    values = _floats(values)
+    rounded = np.round(values, digits)
+    scaled = values * 10.0 ** digits
+    near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    if near_tie.any():
+        rounded[near_tie] = [round(v, digits) for v in values[near_tie].tolist()]
+    return rounded
+
+def _row_count(columns: Mapping[str, Any]) -> int:
+    for values in columns.values():
+        if values is not None and np.ndim(values) > 0:
+            return len(values)
+    return 1
+
+# =====================================
+# GRADING FUNCTIONS
+# =====================================
+
+def pns_grade_batch(total_defect_pct: Any) -> np.ndarray:
+    """
+    PNS grade (1-5) for each total defect percentage
+
+    Args:
+        total_defect_pct: Array of total defect percentages
+
+    Returns:
+        Integer array of PNS grades
+    """
+    return np.searchsorted(_PNS_BOUNDS, _floats(total_defect_pct), side='left') + 1
+
+def fine_premium_grade_batch(primary_defects: Any, secondary_defects: Any, cupping_score: Any = 82.0) -> np.ndarray:
+    """
+    Fine/Premium/Commercial classification for each sample
+
+    Args:
+        primary_defects: Array of primary (Category 1) defect counts
+        secondary_defects: Array of secondary (Category 2) defect counts
+        cupping_score: Array (or scalar) of cupping scores
+
+    Returns:
+        Object array of 'Fine', 'Premium' or 'Commercial'
+    """
+    primary = _floats(primary_defects)
+    secondary = _floats(secondary_defects)
+    specialty = _floats(cupping_score) >= SPECIALTY_MIN_CUPPING_SCORE
+    fine = (primary == 0) & (secondary <= FINE_MAX_SECONDARY_DEFECTS) & specialty
+    premium = ((primary + secondary) <= PREMIUM_MAX_TOTAL_DEFECTS) & specialty
+    return GRADE_LABELS[np.where(fine, 0, np.where(premium, 1, 2))]
+
+def bean_size_class_batch(screen_size_mm: Any) -> np.ndarray:
+    """
+    Bean size class for each screen size
+
+    Args:
+        screen_size_mm: Array of bean screen sizes in millimeters
+
+    Returns:
+        Object array of 'Large', 'Medium', 'Small' or 'Below Standard'
+    """
+    sizes = _floats(screen_size_mm)
+    index = np.searchsorted(_BEAN_SIZE_BOUNDS, sizes, side='right')
+    return _BEAN_SIZE_LABELS[np.where(np.isnan(sizes), 0, index)]
+
+def defect_pct_batch(primary_defects: Any, secondary_defects: Any) -> np.ndarray:
+    """Total defect percentage of a standard 350g sample"""
+    return ((_floats(primary_defects) + _floats(secondary_defects)) / SAMPLE_BEAN_COUNT) * 100
+
+def estimate_cupping_score_batch(overall_quality_index: Any) -> np.ndarray:
+    """Estimated cupping score from the overall quality index"""
+    return CUPPING_BASE_SCORE + (_floats(overall_quality_index) * CUPPING_QUALITY_SCALE)
+
+# =====================================
+# SUITABILITY SCORES
+# =====================================
+
+def elevation_score_batch(elevation_masl: Any) -> np.ndarray:
+    """Elevation suitability (0-1), optimal 600-1200 masl"""
+    score = 1 - np.abs(_floats(elevation_masl) - ELEVATION_OPTIMAL_CENTER) / ELEVATION_OPTIMAL_RANGE
+    return np.clip(score, 0, 1)
+
+def temperature_score_batch(temp_avg_c: Any) -> np.ndarray:
+    """Temperature suitability (0-1), optimal 13-26°C"""
+    return np.clip(1 - np.abs(_floats(temp_avg_c) - TEMP_OPTIMAL_C) / TEMP_TOLERANCE_C, 0, 1)
+
+def rainfall_score_batch(rainfall_mm: Any) -> np.ndarray:
+    """Rainfall suitability (0-1), optimal 200mm"""
+    return np.clip(np.minimum(_floats(rainfall_mm) / RAINFALL_OPTIMAL_MM, RAINFALL_SCORE_CAP), 0, 1)
+
+def combine_climate_scores_batch(temp_score: Any, rainfall_score: Any, elevation_score: Any) -> np.ndarray:
+    """Weighted climate suitability from component scores"""
+    temp_weight, rainfall_weight, elevation_weight = CLIMATE_WEIGHTS
+    return (
+        _floats(temp_score) * temp_weight +
+        _floats(rainfall_score) * rainfall_weight +
+        _floats(elevation_score) * elevation_weight
+    )
+
+def climate_suitability_batch(temp_avg_c: Any, rainfall_mm: Any, elevation_masl: Any) -> np.ndarray:
+    """Climate suitability (0-1)"""
+    return combine_climate_scores_batch(
+        temperature_score_batch(temp_avg_c),
+        rainfall_score_batch(rainfall_mm),
+        elevation_score_batch(elevation_masl)
+    )
+
+def soil_suitability_batch(soil_pH: Any) -> np.ndarray:
+    """Soil suitability (0-1), optimal pH 5.6-6.5"""
+    return np.clip(1 - (np.abs(_floats(soil_pH) - SOIL_PH_OPTIMAL) / SOIL_PH_TOLERANCE), 0, 1)
+
+def moisture_suitability_batch(soil_moisture_pct: Any) -> np.ndarray:
+    """Soil moisture suitability (0-1)"""
+    return np.clip(_floats(soil_moisture_pct) / SOIL_MOISTURE_SATURATION_PCT, 0, 1)
+
+def environmental_stress_batch(temp_avg_c: Any, rainfall_mm: Any, soil_pH: Any, elevation_masl: Any) -> np.ndarray:
+    """Environmental stress index (0-1)"""
+    temp_stress = np.abs(_floats(temp_avg_c) - TEMP_OPTIMAL_C) / TEMP_TOLERANCE_C
+    rainfall_stress = np.abs(_floats(rainfall_mm) - RAINFALL_OPTIMAL_MM) / RAINFALL_OPTIMAL_MM
+    ph_stress = np.abs(_floats(soil_pH) - SOIL_PH_OPTIMAL) / SOIL_PH_TOLERANCE
+    elevation_stress = np.abs(_floats(elevation_masl) - ELEVATION_OPTIMAL_CENTER) / ELEVATION_OPTIMAL_RANGE
+    return np.clip((temp_stress + rainfall_stress + ph_stress + elevation_stress) / 4, 0, 1)
+
+def overall_quality_index_batch(
+    climate_suitability: Any,
+    soil_suitability: Any,
+    moisture_suitability: Any,
+    environmental_stress_index: Any
+) -> np.ndarray:
+    """Overall quality index (0-1)"""
+    climate_weight, soil_weight, moisture_weight, stress_weight = QUALITY_INDEX_WEIGHTS
+    return (
+        _floats(climate_suitability) * climate_weight +
+        _floats(soil_suitability) * soil_weight +
+        _floats(moisture_suitability) * moisture_weight +
+        (1 - _floats(environmental_stress_index)) * stress_weight
+    )
+
+def suitability_scores_batch(
+    elevation_masl: Any,
+    temp_avg_c: Any,
+    rainfall_mm: Any,
+    soil_pH: Any,
+    soil_moisture_pct: Any,
+    environmental_stress_index: Optional[Any] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Every site suitability score for many sites at once
+
+    Args:
+        elevation_masl: Elevations in meters above sea level
+        temp_avg_c: Average monthly temperatures in Celsius
+        rainfall_mm: Monthly rainfall in millimeters
+        soil_pH: Soil pH values
+        soil_moisture_pct: Soil moisture percentages
+        environmental_stress_index: Known stress indices; NaN (or None for
+            the whole column) means calculate it
+
+    Returns:
+        Dictionary of arrays with the same keys as scoring.calculate_suitability_scores
+    """
+    elevation_score = elevation_score_batch(elevation_masl)
+    temp_score = temperature_score_batch(temp_avg_c)
+    rainfall_score = rainfall_score_batch(rainfall_mm)
+    climate_suitability = combine_climate_scores_batch(temp_score, rainfall_score, elevation_score)
+    soil_suitability = soil_suitability_batch(soil_pH)
+    moisture_suitability = moisture_suitability_batch(soil_moisture_pct)
+
+    env_stress = environmental_stress_batch(temp_avg_c, rainfall_mm, soil_pH, elevation_masl)
+    if environmental_stress_index is not None:
+        provided = _floats(environmental_stress_index)
+        env_stress = np.where(np.isnan(provided), env_stress, provided)
+
+    return {
+        'elevation_score': elevation_score,
+        'temp_score': temp_score,
+        'rainfall_score': rainfall_score,
+        'climate_suitability': climate_suitability,
+        'soil_suitability': soil_suitability,
+        'moisture_suitability': moisture_suitability,
+        'environmental_stress_index': env_stress,
+        'overall_quality_index': overall_quality_index_batch(
+            climate_suitability, soil_suitability, moisture_suitability, env_stress
+        )
+    }
+
+# =====================================
+# GRADE DISTRIBUTION
+# =====================================
+
+def management_quality_score_batch(
+    fertilization_factor: Any,
+    pest_factor: Any,
+    climate_suitability: Any,
+    soil_suitability: Any
+) -> np.ndarray:
+    """Management/conditions quality score used to pick a grade distribution band"""
+    fert_weight, pest_weight, climate_weight, soil_weight = MANAGEMENT_QUALITY_WEIGHTS
+    return (_floats(fertilization_factor) * fert_weight +
+            _floats(pest_factor) * pest_weight +
+            _floats(climate_suitability) * climate_weight +
+            _floats(soil_suitability) * soil_weight)
+
+def grade_distribution_batch(quality_score: Any) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Grade distribution probabilities for each quality score
+
+    Returns:
+        (fine_probability, premium_probability, commercial_probability) arrays
+    """
+    score = _floats(quality_score)
+    conditions = [score >= band[0] for band in GRADE_DISTRIBUTION_BANDS]
+    return tuple(
+        np.select(conditions, [band[i + 1] for band in GRADE_DISTRIBUTION_BANDS], default=GRADE_DISTRIBUTION_FLOOR[i])
+        for i in range(3)
+    )
+
+# =====================================
+# PREDICTION FUNCTIONS (BATCH)
+# =====================================
+
+def predict_grade_batch(columns: Mapping[str, Any]) -> Dict[str, np.ndarray]:
+    """
+    Vectorized predict_grade
+
+    Args:
+        columns: Mapping of predict_grade parameter names to arrays (e.g. a
+            DataFrame or dict of lists). Missing columns use the scalar
+            defaults; NaN in environmental_stress_index / quality_score means
+            'calculate it'.
+
+    Returns:
+        Dictionary of arrays with the same keys as scoring.predict_grade
+    """
+    n = _row_count(columns)
+    bean_screen = _column(columns, 'bean_screen_size_mm', 6.5, n)
+    primary_defects = _column(columns, 'primary_defects', 0, n).astype(np.int64)
+    secondary_defects = _column(columns, 'secondary_defects', 3, n).astype(np.int64)
+    elevation = _column(columns, 'elevation_masl', 900, n)
+    temp_avg = _column(columns, 'monthly_temp_avg_c', 19.5, n)
+    rainfall = _column(columns, 'monthly_rainfall_mm', 200, n)
+    soil_ph = _column(columns, 'soil_pH', 6.0, n)
+    soil_moisture = _column(columns, 'soil_moisture_pct', 25, n)
+    env_stress = _optional_column(columns, 'environmental_stress_index', n)
+    quality_score = _optional_column(columns, 'quality_score', n)
+
+    total_defect_count = primary_defects + secondary_defects
+    total_defect_pct = defect_pct_batch(primary_defects, secondary_defects)
+
+    scores = suitability_scores_batch(elevation, temp_avg, rainfall, soil_ph, soil_moisture, env_stress)
+    overall_quality = scores['overall_quality_index']
+    cupping_score = np.where(np.isnan(quality_score), estimate_cupping_score_batch(overall_quality), quality_score)
+
+    low, high = ELEVATION_OPTIMAL_BOUNDS
+    return {
+        'predicted_grade': fine_premium_grade_batch(primary_defects, secondary_defects, cupping_score),
+        'pns_grade': pns_grade_batch(total_defect_pct),
+        'bean_size_class': bean_size_class_batch(bean_screen),
+        'cupping_score': _round(cupping_score, 2),
+        'total_defect_pct': _round(total_defect_pct, 2),
+        'total_defect_count': total_defect_count,
+        'primary_defects': primary_defects,
+        'secondary_defects': secondary_defects,
+        'climate_suitability': _round(scores['climate_suitability'], 3),
+        'soil_suitability': _round(scores['soil_suitability'], 3),
+        'elevation_score': _round(scores['elevation_score'], 3),
+        'overall_quality_index': _round(overall_quality, 3),
+        'elevation_category': np.where(
+            (elevation >= low) & (elevation <= high), 'Optimal', 'Sub-optimal'
+        ).astype(object)
+    }
+
+def cupping_score_batch(
+    altitude: Any,
+    processing_method: Any,
+    colors: Any,
+    moisture: Any,
+    primary_defects: Any,
+    secondary_defects: Any
+) -> np.ndarray:
+    """Vectorized scoring.calculate_cupping_score (rounded to one decimal)"""
+    altitude = np.nan_to_num(_floats(altitude), nan=0.0)
+    processing = _floats(processing_method)
+    colors = _floats(colors)
+    moisture = _floats(moisture)
+    primary = _floats(primary_defects)
+    secondary = _floats(secondary_defects)
+
+    elevation_score = np.where(altitude != 0, elevation_score_batch(altitude), SAMPLE_ELEVATION_DEFAULT_SCORE)
+    processing_score = np.where(processing == 0, SAMPLE_PROCESSING_SCORES[0], SAMPLE_PROCESSING_SCORES[1])
+    color_score = np.select(
+        [colors == code for code in SAMPLE_COLOR_SCORES],
+        list(SAMPLE_COLOR_SCORES.values()),
+        default=SAMPLE_COLOR_DEFAULT_SCORE
+    )
+
+    moisture_conditions = []
+    moisture_scores = []
+    for score, ranges in SAMPLE_MOISTURE_BANDS:
+        in_band = np.zeros(moisture.shape, dtype=bool)
+        for band_low, band_high in ranges:
+            in_band |= (moisture >= band_low) & (moisture <= band_high)
+        moisture_conditions.append(in_band)
+        moisture_scores.append(score)
+    moisture_score = np.select(moisture_conditions, moisture_scores, default=SAMPLE_MOISTURE_FLOOR)
+
+    total_defects = primary + secondary
+    defect_penalty = np.select(
+        [total_defects == 0] + [total_defects <= max_count for max_count, _ in SAMPLE_DEFECT_PENALTIES],
+        [0] + [penalty for _, penalty in SAMPLE_DEFECT_PENALTIES],
+        default=SAMPLE_DEFECT_PENALTY_FLOOR
+    ) - np.where(primary > 0, primary * SAMPLE_PRIMARY_DEFECT_PENALTY, 0)
+
+    elevation_weight, processing_weight, color_weight, moisture_weight = SAMPLE_QUALITY_WEIGHTS
+    quality_index = (
+        elevation_score * elevation_weight +
+        processing_score * processing_weight +
+        color_score * color_weight +
+        moisture_score * moisture_weight +
+        SAMPLE_QUALITY_BASE
+    )
+
+    cupping_score = CUPPING_BASE_SCORE + (quality_index * CUPPING_QUALITY_SCALE) + defect_penalty
+    low, high = SAMPLE_CUPPING_RANGE
+    return _round(np.clip(cupping_score, low, high), 1)
+
+def predict_coffee_grade_batch(columns: Mapping[str, Any]) -> Dict[str, np.ndarray]:
+    """
+    Vectorized predict_coffee_grade (green-bean samples, Flask /predict schema)
+
+    Args:
+        columns: Mapping with altitude, processing_method, colors, moisture,
+            category_one_defects and category_two_defects arrays. Missing
+            columns and NaN values default to 0.
+
+    Returns:
+        Dictionary of arrays with the same keys as scoring.predict_coffee_grade
+    """
+    n = _row_count(columns)
+    altitude = _column(columns, 'altitude', 0, n)
+    processing_method = _column(columns, 'processing_method', 0, n).astype(np.int64)
+    colors = _column(columns, 'colors', 0, n).astype(np.int64)
+    moisture = _column(columns, 'moisture', 0, n)
+    primary_defects = _column(columns, 'category_one_defects', 0, n).astype(np.int64)
+    secondary_defects = _column(columns, 'category_two_defects', 0, n).astype(np.int64)
+
+    cupping_score = cupping_score_batch(
+        altitude, processing_method, colors, moisture, primary_defects, secondary_defects
+    )
+    total_defect_pct = defect_pct_batch(primary_defects, secondary_defects)
+
+    return {
+        'predicted_quality_grade': fine_premium_grade_batch(primary_defects, secondary_defects, cupping_score),
+        'cupping_score': cupping_score,
+        'pns_grade': pns_grade_batch(total_defect_pct),
+        'total_defect_pct': _round(total_defect_pct, 2),
+        'primary_defects': primary_defects,
+        'secondary_defects': secondary_defects,
+        'total_defects': primary_defects + secondary_defects
+    }
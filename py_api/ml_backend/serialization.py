@@ -0,0 +1,262 @@
+"""
+Response Serialization for the Robusta Coffee ML API
+Renders response bodies straight to JSON bytes with orjson when it is
+installed (stdlib json otherwise), understanding NumPy values natively.
+Handlers return FastJSONResponse themselves so FastAPI skips its generic
+jsonable_encoder pass.
+
+Bulk (table) responses are content-negotiated: JSON by default, Arrow IPC
+stream or MsgPack on request, compressed with brotli or gzip above a size
+threshold when the client accepts it.
+"""
+
+import gzip
+import io
+import json
+import math
+import os
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+from fastapi.responses import JSONResponse, Response
+
+try:
+    import orjson
+except ImportError:  # optional: pip install orjson
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # optional: pip install msgpack
+    msgpack = None
+
+try:
+    import pyarrow as pa
+except ImportError:  # optional: pip install pyarrow
+    pa = None
+
+try:
+    import brotli
+except ImportError:  # optional: pip install brotli
+    brotli = None
+
+# Response shapes for lists of records
+RECORDS = "records"
+COLUMNAR = "columnar"
+
+# Table formats for bulk endpoints
+JSON_MEDIA_TYPE = "application/json"
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+_MEDIA_TYPE_ALIASES = {
+    "application/x-msgpack": MSGPACK_MEDIA_TYPE,
+    "application/vnd.msgpack": MSGPACK_MEDIA_TYPE
+}
+
+# Bodies smaller than this are sent uncompressed
+COMPRESS_MIN_BYTES = int(os.environ.get('ML_COMPRESS_MIN_BYTES', 16 * 1024))
+
+def _default(obj: Any) -> Any:
+    """Encode NumPy scalars and arrays (and anything with .tolist())"""
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    if hasattr(obj, 'item'):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def _finite(value: Any) -> Any:
+    """Replace NaN/inf with None for the stdlib encoder, matching orjson"""
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {k: _finite(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_finite(v) for v in value]
+    return value
+
+def dumps(content: Any) -> bytes:
+    """
+    Serialize a response body to compact JSON bytes
+
+    NaN and infinity become null with either backend.
+    """
+    if orjson is not None:
+        return orjson.dumps(
+            content,
+            default=_default,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        )
+    try:
+        text = json.dumps(content, default=_default, separators=(",", ":"), allow_nan=False)
+    except ValueError:
+        text = json.dumps(_finite(json.loads(json.dumps(content, default=_default))), separators=(",", ":"))
+    return text.encode("utf-8")
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with dumps()"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+# =====================================
+# RESPONSE SHAPES
+# =====================================
+
+def to_columnar(records: Sequence[Dict[str, Any]], columns: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Convert a list of records to ``{"columns": [...], "data": [[...], ...]}``
+
+    Each key is sent once instead of once per row, which matters for the
+    forecast's long column names and for large batch results.
+
+    Args:
+        records: Rows as dictionaries sharing the same keys
+        columns: Column order (defaults to the keys of the first record)
+    """
+    if columns is None:
+        columns = list(records[0]) if records else []
+    return {
+        "columns": columns,
+        "data": [[record[column] for column in columns] for record in records]
+    }
+
+def shape_records(records: Sequence[Dict[str, Any]], shape: str) -> Any:
+    """Return records unchanged or in columnar form, per the ``shape`` query parameter"""
+    if shape == COLUMNAR:
+        return to_columnar(records)
+    return records
+
+# =====================================
+# BULK (TABLE) RESPONSES
+# =====================================
+
+class NotAcceptable(Exception):
+    """Raised when the client accepts none of the available table formats"""
+
+def available_table_formats() -> List[str]:
+    """Media types the installed libraries can produce"""
+    formats = [JSON_MEDIA_TYPE]
+    if pa is not None:
+        formats.append(ARROW_STREAM_MEDIA_TYPE)
+    if msgpack is not None:
+        formats.append(MSGPACK_MEDIA_TYPE)
+    return formats
+
+def _parse_header_list(header: Optional[str]) -> List[Tuple[str, float]]:
+    """Parse an Accept / Accept-Encoding header into (value, q) pairs"""
+    items = []
+    for part in (header or "").split(","):
+        value, *params = [p.strip() for p in part.split(";")]
+        if not value:
+            continue
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        items.append((value.lower(), q))
+    return items
+
+def negotiate_table_format(accept: Optional[str]) -> str:
+    """
+    Pick the response media type for a bulk endpoint from the Accept header
+
+    A missing header or a wildcard gets JSON.
+
+    Raises:
+        NotAcceptable: If the client only accepts formats that are unknown
+            or whose library is not installed
+    """
+    accepted = _parse_header_list(accept)
+    if not accepted:
+        return JSON_MEDIA_TYPE
+    available = available_table_formats()
+    best, best_q = None, 0.0
+    for media_type, q in accepted:
+        if media_type in ("*/*", "application/*"):
+            media_type = JSON_MEDIA_TYPE
+        media_type = _MEDIA_TYPE_ALIASES.get(media_type, media_type)
+        if media_type in available and q > best_q:
+            best, best_q = media_type, q
+    if best is None:
+        raise NotAcceptable(f"Acceptable formats: {', '.join(available)}")
+    return best
+
+def _table_records(table: Mapping[str, Any]) -> List[Dict[str, Any]]:
+    columns = list(table)
+    lists = [np.asarray(table[c]).tolist() for c in columns]
+    return [dict(zip(columns, values)) for values in zip(*lists)]
+
+def _arrow_column(values: Any) -> "pa.Array":
+    values = np.asarray(values)
+    # Object arrays (e.g. grade labels) go through a list so Arrow infers strings
+    return pa.array(values.tolist() if values.dtype == object else values)
+
+def encode_table(
+    table: Mapping[str, Any],
+    media_type: str,
+    shape: str = RECORDS,
+    meta: Optional[Dict[str, Any]] = None
+) -> bytes:
+    """
+    Encode a column-name -> values table in the negotiated format
+
+    Args:
+        table: Columns of equal length (lists or NumPy arrays)
+        media_type: One of available_table_formats()
+        shape: 'records' or 'columnar' (JSON only; MsgPack is always columnar)
+        meta: Extra envelope fields for JSON and MsgPack (Arrow carries
+              only the table)
+    """
+    if media_type == ARROW_STREAM_MEDIA_TYPE:
+        arrow_table = pa.table({name: _arrow_column(values) for name, values in table.items()})
+        sink = io.BytesIO()
+        with pa.ipc.new_stream(sink, arrow_table.schema) as writer:
+            writer.write_table(arrow_table)
+        return sink.getvalue()
+
+    columns = list(table)
+    if media_type == MSGPACK_MEDIA_TYPE or shape == COLUMNAR:
+        data: Any = {
+            "columns": columns,
+            "data": [list(row) for row in zip(*(np.asarray(table[c]).tolist() for c in columns))]
+        }
+    else:
+        data = _table_records(table)
+    body = {"success": True, **(meta or {}), "data": data}
+
+    if media_type == MSGPACK_MEDIA_TYPE:
+        return msgpack.packb(body, use_bin_type=True)
+    return dumps(body)
+
+def compress_body(body: bytes, accept_encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+    """
+    Compress a large body with the best encoding the client accepts
+
+    Prefers brotli (when installed) over gzip. Returns the body unchanged and
+    no encoding for small bodies or clients that accept neither.
+    """
+    if len(body) < COMPRESS_MIN_BYTES:
+        return body, None
+    accepted = {value: q for value, q in _parse_header_list(accept_encoding) if q > 0}
+    if brotli is not None and ("br" in accepted or "*" in accepted):
+        return brotli.compress(body, quality=4), "br"
+    if "gzip" in accepted or "*" in accepted:
+        return gzip.compress(body, compresslevel=5), "gzip"
+    return body, None
+
+def table_response(
+    table: Mapping[str, Any],
+    media_type: str,
+    accept_encoding: Optional[str] = None,
+    shape: str = RECORDS,
+    meta: Optional[Dict[str, Any]] = None
+) -> Response:
+    """Encode, optionally compress and wrap a table in a Response"""
+    body, encoding = compress_body(encode_table(table, media_type, shape, meta), accept_encoding)
+    headers = {"Vary": "Accept, Accept-Encoding"}
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type=media_type, headers=headers)
@@ -0,0 +1,327 @@
+"""
+Streaming Batch Scoring for the Robusta Coffee ML API
+Reads request rows incrementally (NDJSON or CSV), scores them chunk by chunk
+and streams each scored chunk back (NDJSON or CSV), so memory stays bounded
+by the chunk size and the first results arrive before the upload finishes
+
+Most HTTP/1.1 clients (curl, requests, httpx) send the whole body before
+reading the response. To avoid a deadlock once their receive buffer fills,
+the upload is always drained into a spooled temporary file (memory up to
+ML_STREAM_SPOOL_BYTES, then disk) while scoring reads from it.
+"""
+
+import asyncio
+import csv
+import io
+import itertools
+import json
+import logging
+import os
+import tempfile
+from typing import IO, Any, AsyncIterator, Callable, Dict, Iterator, List, Mapping, Optional
+
+import numpy as np
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import ClientDisconnect, Request
+from starlette.responses import StreamingResponse
+
+from .serialization import dumps
+from .scoring_batch import predict_coffee_grade_batch
+
+logger = logging.getLogger(__name__)
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+CSV_MEDIA_TYPE = "text/csv"
+
+# Rows validated and scored per chunk
+STREAM_CHUNK_ROWS = int(os.environ.get('ML_STREAM_CHUNK_ROWS', 5000))
+
+# Rows per chunk when grading an uploaded CSV file
+UPLOAD_CHUNK_ROWS = int(os.environ.get('ML_UPLOAD_CHUNK_ROWS', 100000))
+
+# Sample sheet columns (the Flask /predict parameters). All are parsed as
+# floats; the integer-coded ones must hold whole numbers. Empty cells default
+# to 0 when scored, as in predict_coffee_grade.
+SAMPLE_CSV_COLUMNS = (
+    'altitude',
+    'processing_method',
+    'colors',
+    'moisture',
+    'category_one_defects',
+    'category_two_defects'
+)
+SAMPLE_CSV_INTEGER_COLUMNS = ('processing_method', 'colors', 'category_one_defects', 'category_two_defects')
+SAMPLE_CSV_REQUIRED = ('processing_method', 'colors', 'moisture')
+
+# Request body kept in memory before spooling to disk
+STREAM_SPOOL_BYTES = int(os.environ.get('ML_STREAM_SPOOL_BYTES', 8 * 1024 * 1024))
+
+ChunkScorer = Callable[[List[Dict[str, Any]], int], Mapping[str, Any]]
+
+def negotiate_stream_format(accept: Optional[str]) -> str:
+    """CSV when the client asks for text/csv, NDJSON otherwise"""
+    return CSV_MEDIA_TYPE if accept and CSV_MEDIA_TYPE in accept.lower() else NDJSON_MEDIA_TYPE
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse whose body iterator may keep reading the request body.
+
+    The stock class listens for client disconnects on ASGI < 2.4 servers by
+    consuming receive() messages, which would swallow the request body still
+    being uploaded. Here a disconnect surfaces through request.stream()
+    instead.
+    """
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await self.stream_response(send)
+        except OSError:
+            raise ClientDisconnect()
+        if self.background is not None:
+            await self.background()
+
+# =====================================
+# INPUT
+# =====================================
+
+class SpooledBody:
+    """
+    Request body drained by a background task into a spooled temporary file,
+    read back concurrently. Everything runs on the event loop, so a seek and
+    the following read/write never interleave with another.
+    """
+
+    def __init__(self, request: Request, max_memory: int = STREAM_SPOOL_BYTES):
+        self._request = request
+        self._file = tempfile.SpooledTemporaryFile(max_size=max_memory)
+        self._written = 0
+        self._read = 0
+        self._done = False
+        self._error: Optional[BaseException] = None
+        self._arrived = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    async def _fill(self) -> None:
+        try:
+            async for chunk in self._request.stream():
+                self._file.seek(self._written)
+                self._file.write(chunk)
+                self._written += len(chunk)
+                self._arrived.set()
+        except BaseException as e:
+            self._error = e
+        finally:
+            self._done = True
+            self._arrived.set()
+
+    async def chunks(self, size: int = 1024 * 1024) -> AsyncIterator[bytes]:
+        """Yield body bytes as they are spooled"""
+        self._task = asyncio.ensure_future(self._fill())
+        try:
+            while True:
+                if self._read < self._written:
+                    self._file.seek(self._read)
+                    data = self._file.read(min(size, self._written - self._read))
+                    self._read += len(data)
+                    yield data
+                elif self._done:
+                    if self._error is not None:
+                        raise self._error
+                    return
+                else:
+                    self._arrived.clear()
+                    await self._arrived.wait()
+        finally:
+            self._task.cancel()
+            self._file.close()
+
+async def iter_lines(request: Request) -> AsyncIterator[bytes]:
+    """Yield the request body line by line as it arrives"""
+    pending = b""
+    async for chunk in SpooledBody(request).chunks():
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield line
+    if pending:
+        yield pending
+
+async def iter_row_chunks(request: Request, chunk_rows: int = STREAM_CHUNK_ROWS) -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    Yield lists of up to ``chunk_rows`` row dictionaries from the request body
+
+    The body is NDJSON (one JSON object per line) unless the Content-Type is
+    text/csv, in which case the first line is the header. Empty CSV cells are
+    left out so the field defaults apply. Quoted CSV fields must not span
+    lines.
+    """
+    is_csv = CSV_MEDIA_TYPE in request.headers.get("content-type", "").lower()
+    header: Optional[List[str]] = None
+    rows: List[Dict[str, Any]] = []
+
+    async for line in iter_lines(request):
+        line = line.strip()
+        if not line:
+            continue
+        if is_csv:
+            values = next(csv.reader([line.decode("utf-8-sig")]))
+            if header is None:
+                header = [name.strip() for name in values]
+                continue
+            rows.append({name: value for name, value in zip(header, values) if value != ""})
+        else:
+            rows.append(json.loads(line))
+        if len(rows) >= chunk_rows:
+            yield rows
+            rows = []
+    if rows:
+        yield rows
+
+# =====================================
+# OUTPUT
+# =====================================
+
+def encode_ndjson(table: Mapping[str, Any]) -> bytes:
+    """One JSON object per table row"""
+    columns = list(table)
+    lists = [np.asarray(table[c]).tolist() for c in columns]
+    return b"".join(dumps(dict(zip(columns, values))) + b"\n" for values in zip(*lists))
+
+def encode_csv(table: Mapping[str, Any], header: bool) -> bytes:
+    """Table rows as CSV, optionally preceded by the header line"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    if header:
+        writer.writerow(list(table))
+    writer.writerows(zip(*(np.asarray(values).tolist() for values in table.values())))
+    return buffer.getvalue().encode("utf-8")
+
+async def stream_scored_chunks(
+    chunks: AsyncIterator[List[Dict[str, Any]]],
+    score_chunk: ChunkScorer,
+    media_type: str,
+    on_done: Optional[Callable[[int], None]] = None
+) -> AsyncIterator[bytes]:
+    """
+    Score each chunk off the event loop and yield it encoded
+
+    ``score_chunk(rows, offset)`` returns a column table for the rows, where
+    offset is the index of the chunk's first row in the whole stream. The
+    status line has already been sent when a bad row is found, so the error
+    is reported as a final line instead: a JSON object with
+    ``"success": false`` for NDJSON, or a ``# error:`` line for CSV.
+    ``on_done`` is called with the number of rows scored when the stream ends.
+    """
+    offset = 0
+    try:
+        async for rows in chunks:
+            table = await run_in_threadpool(score_chunk, rows, offset)
+            if media_type == CSV_MEDIA_TYPE:
+                yield encode_csv(table, header=offset == 0)
+            else:
+                yield encode_ndjson(table)
+            offset += len(rows)
+    except ValueError as e:
+        logger.warning("Streaming batch stopped after %d rows: %s", offset, e)
+        if media_type == CSV_MEDIA_TYPE:
+            yield f"# error: {e}\n".encode("utf-8")
+        else:
+            yield dumps({"success": False, "error": str(e), "rows_processed": offset}) + b"\n"
+    finally:
+        if on_done is not None:
+            on_done(offset)
+
+# =====================================
+# CSV SAMPLE SHEETS
+# =====================================
+
+def check_sample_csv_header(file: IO[bytes]) -> List[str]:
+    """
+    Read the header of an uploaded sample sheet and rewind the file
+
+    Returns:
+        The column names
+
+    Raises:
+        ValueError: If a required column is missing
+    """
+    header = file.readline().decode("utf-8-sig")
+    file.seek(0)
+    columns = [name.strip() for name in next(csv.reader([header]), [])]
+    missing = [c for c in SAMPLE_CSV_REQUIRED if c not in columns]
+    if missing:
+        raise ValueError(f"Missing required column(s): {', '.join(missing)}")
+    return columns
+
+def _csv_cells(values: np.ndarray) -> np.ndarray:
+    """
+    CSV text for each value, as bytes
+
+    Graded columns have few distinct values (grades, scores to one decimal),
+    so each distinct value is formatted once.
+    """
+    unique, inverse = np.unique(values, return_inverse=True)
+    labels = np.array([str(v).encode("utf-8") for v in unique.tolist()], dtype=object)
+    return labels[inverse]
+
+def grade_sample_csv(
+    file: IO[bytes],
+    chunk_rows: int = UPLOAD_CHUNK_ROWS,
+    on_done: Optional[Callable[[int], None]] = None
+) -> Iterator[bytes]:
+    """
+    Grade a sample sheet chunk by chunk, yielding the annotated CSV
+
+    Input lines are passed through unchanged with the predict_coffee_grade
+    outputs appended as columns. Memory is bounded by ``chunk_rows``. Quoted
+    fields must not span lines. A value that is not a number (or not a whole
+    number in an integer-coded column) ends the output with a ``# error:``
+    line. ``on_done`` is called with the number of rows graded at the end.
+    """
+    import pandas as pd
+
+    header = file.readline().rstrip(b"\r\n")
+    columns = [name.strip() for name in next(csv.reader([header.decode("utf-8-sig")]))]
+    used = [c for c in SAMPLE_CSV_COLUMNS if c in columns]
+    graded_names = None
+    rows_done = 0
+    try:
+        while True:
+            lines = [line.rstrip(b"\r\n") for line in itertools.islice(file, chunk_rows)]
+            if not lines:
+                break
+            lines = [line for line in lines if line.strip()]
+            if not lines:
+                continue
+
+            chunk = pd.read_csv(
+                io.BytesIO(header + b"\n" + b"\n".join(lines)),
+                usecols=used,
+                dtype={c: 'float64' for c in used},
+                skipinitialspace=True,
+                skip_blank_lines=False
+            )
+            chunk.columns = [str(c).strip() for c in chunk.columns]
+            inputs = {c: chunk[c].to_numpy() for c in used}
+            for name in SAMPLE_CSV_INTEGER_COLUMNS:
+                values = inputs.get(name)
+                if values is None:
+                    continue
+                fractional = ~np.isnan(values) & (values != np.floor(values))
+                if fractional.any():
+                    row = rows_done + int(np.argmax(fractional)) + 1
+                    raise ValueError(f"Row {row}: {name} must be a whole number")
+
+            graded = predict_coffee_grade_batch(inputs)
+            if graded_names is None:
+                graded_names = list(graded)
+                yield header + b"," + ",".join(graded_names).encode("utf-8") + b"\n"
+            cells = [_csv_cells(graded[name]) for name in graded_names]
+            yield b"\n".join(map(b",".join, zip(lines, *cells))) + b"\n"
+            rows_done += len(lines)
+    except (ValueError, TypeError) as e:
+        logger.warning("CSV grading stopped after %d rows: %s", rows_done, e)
+        yield f"# error: {e}\n".encode("utf-8")
+    finally:
+        if on_done is not None:
+            on_done(rows_done)
@@ -0,0 +1,246 @@
+"""
+Synthetic Dataset Generator in the Robusta Schema
+Learns each column's marginal distribution and the correlations between
+columns from robusta_coffee_dataset.csv (a Gaussian copula), then draws any
+number of statistically similar rows. Output streams to CSV or Parquet one
+chunk at a time, so 100M rows need no more memory than one chunk.
+
+Usage (from py_api/):
+    python -m ml_backend.synthetic --rows 100000000 --out robusta_100m.parquet
+    python -m ml_backend.synthetic --rows 1500000 --out robusta_1_5m.csv --seed 7
+
+How it works: every column is mapped to normal scores through its ranks,
+and the correlation matrix of those scores is estimated. Sampling draws
+correlated normals and maps each one back through the column's empirical
+quantiles (numeric columns) or category frequencies (text columns). Integer
+columns stay integers; float columns keep their source precision. The same
+seed and chunk size always give the same rows, whatever --workers is.
+
+Chunks are generated (and, for CSV, formatted) in parallel across --workers
+processes; CSV float formatting is the slow part. Parquet needs pyarrow.
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from functools import partial
+from pathlib import Path
+from statistics import NormalDist
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from .batch import ChunkWriter, Progress, _is_parquet, _require_pyarrow
+from .parallel import imap_ordered
+
+try:
+    from scipy.special import ndtr as _ndtr, ndtri as _ndtri
+except ImportError:  # optional: pip install scipy
+    _ndtr = np.vectorize(NormalDist().cdf, otypes=[float])
+    _ndtri = np.vectorize(NormalDist().inv_cdf, otypes=[float])
+
+DATASET = Path(__file__).resolve().parent.parent / "robusta_coffee_dataset.csv"
+
+DEFAULT_CHUNK_ROWS = 1000000
+
+# Points of each numeric column's quantile function kept by the model,
+# evenly spaced in normal-score space
+QUANTILE_POINTS = 2049
+
+def _decimals(values: np.ndarray, max_decimals: int = 6) -> int:
+    """Fewest decimals that represent every value of a float column"""
+    for decimals in range(max_decimals + 1):
+        if np.allclose(values, np.round(values, decimals), rtol=0, atol=1e-9):
+            return decimals
+    return max_decimals
+
+class CopulaModel:
+    """
+    Gaussian copula over the columns of a DataFrame
+
+    Numeric columns keep their empirical quantile function, text columns
+    their category frequencies; dependence between all columns is captured
+    by the correlation of their normal scores.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        n = len(df)
+        if n < 2:
+            raise ValueError("Need at least 2 rows to fit the generator")
+        self.columns: List[str] = list(df.columns)
+        self.dtypes = df.dtypes
+        # Numeric columns: (quantiles on the normal-score grid, decimals or None for integers)
+        self._numeric: Dict[str, Tuple[np.ndarray, Optional[int]]] = {}
+        # Text columns: (normal-score cut points, categories)
+        self._categorical: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+        # An even grid lets sampling find the grid cell by arithmetic, not search
+        z_max = float(_ndtri(1 - 0.5 / n))
+        self._z_min = -z_max
+        self._z_step = 2 * z_max / (QUANTILE_POINTS - 1)
+        probs = _ndtr(np.linspace(-z_max, z_max, QUANTILE_POINTS))
+        scores = np.empty((n, len(self.columns)))
+        for j, column in enumerate(self.columns):
+            series = df[column]
+            if pd.api.types.is_numeric_dtype(series):
+                values = series.to_numpy(dtype=float)
+                integer = pd.api.types.is_integer_dtype(series)
+                decimals = None if integer else _decimals(values)
+                self._numeric[column] = (np.quantile(values, probs), decimals)
+                ranks = series.rank(method='average').to_numpy()
+            else:
+                # Ordered by frequency, so the most common category sits mid-range
+                frequencies = series.astype(str).value_counts(normalize=True)
+                cut_points = _ndtri(np.clip(frequencies.cumsum().to_numpy()[:-1], 1e-12, 1 - 1e-12))
+                self._categorical[column] = (cut_points, frequencies.index.to_numpy())
+                codes = series.astype(str).map({c: i for i, c in enumerate(frequencies.index)})
+                ranks = codes.rank(method='average').to_numpy()
+            scores[:, j] = _ndtri((ranks - 0.5) / n)
+
+        correlation = np.corrcoef(scores, rowvar=False)
+        correlation = np.nan_to_num(correlation, nan=0.0)
+        np.fill_diagonal(correlation, 1.0)
+        self.correlation = correlation
+        self._cholesky = self._factor(correlation)
+
+    @staticmethod
+    def _factor(correlation: np.ndarray) -> np.ndarray:
+        """Cholesky factor, nudging the matrix to positive definite if needed"""
+        eigenvalues, eigenvectors = np.linalg.eigh(correlation)
+        if eigenvalues.min() <= 1e-10:
+            fixed = eigenvectors @ np.diag(np.maximum(eigenvalues, 1e-10)) @ eigenvectors.T
+            scale = np.sqrt(np.diag(fixed))
+            correlation = fixed / np.outer(scale, scale)
+        return np.linalg.cholesky(correlation)
+
+    @classmethod
+    def from_csv(cls, path: Path = DATASET) -> "CopulaModel":
+        return cls(pd.read_csv(path))
+
+    def sample(self, rows: int, rng: np.random.Generator) -> pd.DataFrame:
+        """Draw rows with the source's columns, dtypes and dependence"""
+        # One contiguous row of normal scores per column
+        z = self._cholesky @ rng.standard_normal((len(self.columns), rows))
+        data = {}
+        for j, column in enumerate(self.columns):
+            if column in self._numeric:
+                quantiles, decimals = self._numeric[column]
+                values = self._interpolate(z[j], quantiles)
+                if decimals is None:
+                    data[column] = np.round(values).astype(self.dtypes[column])
+                else:
+                    data[column] = np.round(values, decimals)
+            else:
+                cut_points, categories = self._categorical[column]
+                data[column] = categories[np.searchsorted(cut_points, z[j])]
+        return pd.DataFrame(data, columns=self.columns)
+
+    def _interpolate(self, z: np.ndarray, quantiles: np.ndarray) -> np.ndarray:
+        """Linear interpolation of the quantile grid at normal scores z (clamped at the ends)"""
+        position = np.clip((z - self._z_min) / self._z_step, 0, QUANTILE_POINTS - 1)
+        index = np.minimum(position.astype(np.intp), QUANTILE_POINTS - 2)
+        low = quantiles[index]
+        return low + (quantiles[index + 1] - low) * (position - index)
+
+    def chunk(self, index: int, rows: int, seed: int = 0) -> pd.DataFrame:
+        """Chunk number `index` of a stream; each chunk has its own RNG stream"""
+        return self.sample(rows, np.random.default_rng([seed, index]))
+
+    def chunks(self, rows: int, chunk_rows: int = DEFAULT_CHUNK_ROWS, seed: int = 0) -> Iterator[pd.DataFrame]:
+        """Yield `rows` rows in chunks of at most `chunk_rows`"""
+        for index, (_, size) in enumerate(_chunk_sizes(rows, chunk_rows)):
+            yield self.chunk(index, size, seed)
+
+def _chunk_sizes(rows: int, chunk_rows: int) -> Iterator[Tuple[int, int]]:
+    for start in range(0, rows, chunk_rows):
+        yield start, min(chunk_rows, rows - start)
+
+def _generate_chunk(model: CopulaModel, as_csv: bool, seed: int, index: int, rows: int) -> Tuple[int, Union[pd.DataFrame, bytes]]:
+    """
+    Worker task: one chunk, CSV-encoded in the worker when writing CSV
+
+    Float formatting costs more than sampling, so it is spread across the
+    workers too.
+    """
+    df = model.chunk(index, rows, seed)
+    if as_csv:
+        return rows, df.to_csv(index=False, header=index == 0).encode()
+    return rows, df
+
+def generate(rows: int, seed: int = 0, source: Path = DATASET) -> pd.DataFrame:
+    """In-memory synthetic DataFrame (for fixtures; stream large outputs with write())"""
+    return CopulaModel.from_csv(source).sample(rows, np.random.default_rng(seed))
+
+def write(
+    out_path: Path,
+    rows: int,
+    seed: int = 0,
+    source: Path = DATASET,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    workers: int = os.cpu_count() or 1,
+    show_progress: bool = False
+) -> Dict[str, float]:
+    """
+    Stream synthetic rows to a CSV or Parquet file
+
+    Chunks are generated by up to `workers` processes and written in order;
+    the output depends only on the seed and chunk size, not on the number
+    of workers.
+
+    Returns:
+        Summary with the number of rows written and elapsed seconds
+    """
+    if _is_parquet(out_path):
+        _require_pyarrow()
+    model = CopulaModel.from_csv(source)
+    writer = ChunkWriter(out_path)
+    task = partial(_generate_chunk, model, not writer.is_parquet, seed)
+    tasks = ((index, size) for index, (_, size) in enumerate(_chunk_sizes(rows, chunk_rows)))
+    progress = Progress(rows, "synthetic") if show_progress else None
+    start = time.perf_counter()
+    written = 0
+    try:
+        with ExitStack() as stack:
+            if workers <= 1:
+                results = (task(*args) for args in tasks)
+            else:
+                pool = stack.enter_context(ProcessPoolExecutor(max_workers=workers))
+                results = imap_ordered(pool, task, tasks, window=2 * workers)
+            for size, chunk in results:
+                writer.write(chunk)
+                written += size
+                if progress is not None:
+                    progress.update(size)
+    finally:
+        writer.close()
+        if progress is not None:
+            progress.close()
+    return {
+        'rows': written,
+        'seconds': round(time.perf_counter() - start, 2)
+    }
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m ml_backend.synthetic", description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--rows", type=int, required=True, help="Rows to generate")
+    parser.add_argument("--out", dest="out_path", type=Path, required=True, help="Output .csv or .parquet file")
+    parser.add_argument("--seed", type=int, default=0, help="RNG seed")
+    parser.add_argument("--source", type=Path, default=DATASET, help="CSV to learn the distributions from")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS, help="Rows per chunk")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes (1 = no pool)")
+    parser.add_argument("--quiet", action="store_true", help="No progress output")
+    args = parser.parse_args(argv)
+
+    summary = write(
+        args.out_path, args.rows, seed=args.seed, source=args.source,
+        chunk_rows=args.chunk_rows, workers=args.workers, show_progress=not args.quiet
+    )
+    print(f"synthetic: {summary['rows']:,} rows -> {args.out_path} ({summary['seconds']} s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""
+Lightweight Tracing for the Robusta Coffee ML Pipeline
+Times the stages of a request or job (data loading, feature engineering,
+splitting, scaling, fitting, serialization, forecasting) as nested spans.
+
+Tracing is off unless a trace is active in the current context: span() and
+@traced then cost one ContextVar lookup. The API activates a trace per
+request (X-Trace header, or every request with ML_TRACE=1); training jobs
+always trace their own stages in the worker process and report them in the
+response.
+
+A trace exports to the Chrome trace event format (open it in
+chrome://tracing or https://ui.perfetto.dev); with ML_TRACE_DIR set, the API
+writes one file per traced request.
+
+Example:
+    with tracing.trace("nightly-retrain") as t:
+        df = engineer_features(load_data(path))
+    print(t.stages())
+    t.save("retrain.trace.json")
+"""
+
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+# Trace every request (otherwise only requests sending the trace header)
+TRACE_ALL = os.environ.get('ML_TRACE', '').lower() in ('1', 'true', 'yes')
+
+# Directory for Chrome trace files of traced requests (unset: not written)
+TRACE_DIR = os.environ.get('ML_TRACE_DIR') or None
+
+# Request header that turns tracing on for one request
+TRACE_HEADER = "x-trace"
+
+_current: contextvars.ContextVar[Optional["Trace"]] = contextvars.ContextVar("ml_trace", default=None)
+
+class Trace:
+    """Spans recorded for one request or job"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.pid = os.getpid()
+        self.start_ns = time.perf_counter_ns()
+        self.end_ns: Optional[int] = None
+        # Chrome trace "complete" events; ts/dur in microseconds
+        self.events: List[Dict[str, Any]] = []
+
+    def add(self, name: str, start_ns: int, end_ns: int, args: Optional[Dict[str, Any]] = None) -> None:
+        event = {
+            "name": name,
+            "ph": "X",
+            "ts": start_ns / 1000,
+            "dur": (end_ns - start_ns) / 1000,
+            "pid": self.pid,
+            "tid": threading.get_native_id()
+        }
+        if args:
+            event["args"] = args
+        self.events.append(event)
+
+    def merge(self, events: Iterable[Dict[str, Any]]) -> None:
+        """Add events recorded elsewhere (e.g. a worker process's trace)"""
+        self.events.extend(events)
+
+    @property
+    def total_ms(self) -> float:
+        end_ns = self.end_ns if self.end_ns is not None else time.perf_counter_ns()
+        return round((end_ns - self.start_ns) / 1e6, 3)
+
+    def stages(self) -> Dict[str, float]:
+        """Milliseconds per span name (repeated spans summed), in start order"""
+        totals: Dict[str, float] = {}
+        for event in sorted(self.events, key=lambda e: e["ts"]):
+            if event["name"] == self.name:
+                continue
+            totals[event["name"]] = totals.get(event["name"], 0.0) + event["dur"] / 1000
+        return {name: round(ms, 3) for name, ms in totals.items()}
+
+    def timings(self) -> Dict[str, Any]:
+        """Stage breakdown for API responses"""
+        return {"total_ms": self.total_ms, "stages_ms": self.stages()}
+
+    def to_chrome(self) -> Dict[str, Any]:
+        """The trace in the Chrome trace event format"""
+        return {"traceEvents": self.events, "displayTimeUnit": "ms", "otherData": {"name": self.name}}
+
+    def save(self, path: Any) -> Path:
+        """Write the Chrome trace JSON file"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_chrome()))
+        return path
+
+class _Span:
+    __slots__ = ("_trace", "_name", "_args", "_start")
+
+    def __init__(self, trace_: Trace, name: str, args: Optional[Dict[str, Any]]):
+        self._trace = trace_
+        self._name = name
+        self._args = args
+
+    def __enter__(self) -> "_Span":
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._trace.add(self._name, self._start, time.perf_counter_ns(), self._args)
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoSpan":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        pass
+
+_NO_SPAN = _NoSpan()
+
+def current() -> Optional[Trace]:
+    """The active trace, or None when tracing is off"""
+    return _current.get()
+
+def span(name: str, **args: Any):
+    """
+    Context manager timing a stage of the active trace (no-op without one)
+
+    Args:
+        name: Stage name, as shown in the breakdown and the Chrome trace
+        **args: Details attached to the Chrome trace event
+    """
+    active = _current.get()
+    if active is None:
+        return _NO_SPAN
+    return _Span(active, name, args)
+
+def traced(name: Optional[str] = None) -> Callable:
+    """Decorator timing every call of a function as a span"""
+    def decorate(fn: Callable) -> Callable:
+        label = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            active = _current.get()
+            if active is None:
+                return fn(*args, **kwargs)
+            with _Span(active, label, None):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+class trace:
+    """
+    Context manager activating a new trace for the enclosed code
+
+    The whole block is recorded as a root span named after the trace.
+    """
+
+    def __init__(self, name: str):
+        self.trace = Trace(name)
+
+    def __enter__(self) -> Trace:
+        self._token = _current.set(self.trace)
+        return self.trace
+
+    def __exit__(self, *exc) -> None:
+        _current.reset(self._token)
+        self.trace.end_ns = time.perf_counter_ns()
+        self.trace.add(self.trace.name, self.trace.start_ns, self.trace.end_ns)
+
+def merge(events: Iterable[Dict[str, Any]]) -> None:
+    """Add events (e.g. from a worker job) to the active trace, if any"""
+    active = _current.get()
+    if active is not None:
+        active.merge(events)
+
+# =====================================
+# ASGI MIDDLEWARE
+# =====================================
+
+def _server_timing(stages: Dict[str, float]) -> bytes:
+    """Server-Timing header value (shown in the browser's network panel)"""
+    entries = []
+    for name, ms in stages.items():
+        token = "".join(c if c.isalnum() or c in "-_." else "_" for c in name)
+        entries.append(f"{token};dur={ms}")
+    return ", ".join(entries).encode("latin-1")
+
+class TracingMiddleware:
+    """
+    Pure ASGI middleware tracing requests that send ``X-Trace: 1`` (or all
+    requests with ML_TRACE=1)
+
+    Traced responses carry a Server-Timing header with the stages recorded
+    before the response started; with ML_TRACE_DIR set, the full trace is
+    written there as a Chrome trace file when the response completes.
+    """
+
+    def __init__(self, app, trace_all: bool = TRACE_ALL, trace_dir: Optional[str] = TRACE_DIR):
+        self.app = app
+        self.trace_all = trace_all
+        self.trace_dir = trace_dir
+
+    def _wanted(self, scope) -> bool:
+        if self.trace_all:
+            return True
+        for key, value in scope.get("headers", ()):
+            if key == TRACE_HEADER.encode():
+                return value.strip().lower() in (b"1", b"true", b"yes")
+        return False
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or not self._wanted(scope):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_timing(message) -> None:
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", _server_timing(
+                    {**active.stages(), "total": active.total_ms}
+                )))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        with trace(f"{scope['method']} {scope['path']}") as active:
+            await self.app(scope, receive, send_with_timing)
+        if self.trace_dir:
+            stamp = time.strftime("%Y%m%d-%H%M%S")
+            label = "".join(c if c.isalnum() else "_" for c in active.name).strip("_")
+            active.save(Path(self.trace_dir) / f"{stamp}-{label}-{active.start_ns}.trace.json")
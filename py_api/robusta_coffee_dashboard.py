@@ -27,6 +27,19 @@ from sklearn.tree import DecisionTreeClassifier
 import pickle
 import io
 
+# Shared, side-effect-free helpers (also used by app.py and the ML API)
+from ml_backend.scoring import (
+    calculate_pns_grade,
+    calculate_fine_premium_grade,
+    classify_bean_size,
+    calculate_defect_pct,
+    calculate_suitability_scores,
+    estimate_cupping_score,
+    is_optimal_elevation
+)
+from ml_backend.forecasting import calculate_yield_forecast
+from ml_backend.robusta_ml_core import engineer_features as engineer_robusta_features
+
 # Page configuration
 st.set_page_config(
     page_title="Robusta Coffee Grading Dashboard - PNS",
@@ -186,137 +199,10 @@ def load_data():
         st.error("❌ Dataset file 'robusta_coffee_dataset.csv' not found. Please ensure the file is in the same directory.")
         st.stop()
 
-def calculate_pns_grade(total_defect_pct):
-    """
-    Calculate PNS grade based on total defect percentage for Robusta
-    Grade 1: max 10%
-    Grade 2: max 15%
-    Grade 3: max 25%
-    Grade 4: max 40%
-    """
-    if total_defect_pct <= 10:
-        return 1
-    elif total_defect_pct <= 15:
-        return 2
-    elif total_defect_pct <= 25:
-        return 3
-    elif total_defect_pct <= 40:
-        return 4
-    else:
-        return 5  # Below standard
-
-def calculate_fine_premium_grade(primary_defects, secondary_defects, cupping_score=82):
-    """
-    Calculate Fine/Premium Robusta grade based on CQI/UCDA standards
-    Fine Robusta: 0 primary defects, max 5 secondary defects, score >= 80
-    Premium Robusta: max 12 combined defects, score >= 80
-    Commercial: otherwise
-    """
-    if primary_defects == 0 and secondary_defects <= 5 and cupping_score >= 80:
-        return 'Fine'
-    elif (primary_defects + secondary_defects) <= 12 and cupping_score >= 80:
-        return 'Premium'
-    else:
-        return 'Commercial'
-
-def classify_bean_size(screen_size_mm):
-    """
-    Classify bean size for Robusta based on screen size
-    Large: retained by 5.6mm screen (dry processed) or 7.5mm (wet processed)
-    Small: passes through but retained by smaller screens
-    """
-    if screen_size_mm >= 7.5:
-        return 'Large'
-    elif screen_size_mm >= 6.5:
-        return 'Medium'
-    elif screen_size_mm >= 5.5:
-        return 'Small'
-    else:
-        return 'Below Standard'
-
 @st.cache_data
 def engineer_features(df):
-    """Create engineered features for Robusta grading"""
-    df_eng = df.copy()
-    
-    # Ensure we're only working with Robusta variety
-    if 'variety' in df_eng.columns:
-        df_eng = df_eng[df_eng['variety'].str.lower().str.contains('robusta')].copy()
-    
-    # Age categories
-    df_eng['age_category'] = pd.cut(
-        df_eng['plant_age_months'],
-        bins=[0, 24, 48, 72, 100],
-        labels=['Young', 'Mature', 'Prime', 'Old']
-    )
-    
-    # Calculate total defect percentage (simulated from quality score)
-    # Higher quality score = lower defects
-    df_eng['total_defect_pct'] = 50 - (df_eng['quality_score'] / 2)
-    df_eng['total_defect_pct'] = df_eng['total_defect_pct'].clip(0, 50)
-    
-    # Simulate primary and secondary defects based on quality
-    df_eng['primary_defects'] = (df_eng['total_defect_pct'] * 0.3).round().astype(int)
-    df_eng['secondary_defects'] = (df_eng['total_defect_pct'] * 0.7).round().astype(int)
-    
-    # PNS Grade (1-4)
-    df_eng['pns_grade'] = df_eng['total_defect_pct'].apply(calculate_pns_grade)
-    
-    # Fine/Premium/Commercial classification
-    df_eng['coffee_grade'] = df_eng.apply(
-        lambda x: calculate_fine_premium_grade(x['primary_defects'], x['secondary_defects'], x['quality_score']),
-        axis=1
-    )
-    
-    # Bean screen size (simulated from plant characteristics)
-    # Larger, healthier plants tend to produce larger beans
-    df_eng['bean_screen_size_mm'] = (
-        (df_eng['plant_height_cm'] / 200) * 2 +
-        (df_eng['trunk_diameter_cm'] / 15) * 3 +
-        4.5
-    ).clip(4.0, 9.0)
-    
-    df_eng['bean_size_class'] = df_eng['bean_screen_size_mm'].apply(classify_bean_size)
-    
-    # Climate suitability for Robusta (elevation 600-1200 masl, temp 13-26°C)
-    if 'elevation_masl' in df_eng.columns:
-        elevation_score = 1 - abs(df_eng['elevation_masl'] - 900) / 600
-        elevation_score = elevation_score.clip(0, 1)
-    else:
-        elevation_score = 0.8
-    
-    temp_score = 1 - abs(df_eng['monthly_temp_avg_c'] - 19.5) / 13
-    temp_score = temp_score.clip(0, 1)
-    
-    # Robusta requires 200mm rainfall
-    rainfall_score = (df_eng['monthly_rainfall_mm'] / 200).clip(0, 1.5)
-    rainfall_score = rainfall_score.clip(0, 1)
-    
-    df_eng['climate_suitability_robusta'] = (
-        temp_score * 0.4 + 
-        rainfall_score * 0.4 + 
-        elevation_score * 0.2
-    )
-    
-    # Soil suitability for Robusta (pH 5.6-6.5)
-    optimal_ph = 6.0
-    df_eng['soil_suitability_robusta'] = 1 - (abs(df_eng['soil_pH'] - optimal_ph) / 1.5).clip(0, 1)
-    
-    # Moisture suitability
-    df_eng['moisture_suitability'] = (df_eng['soil_moisture_pct'] / 35).clip(0, 1)
-    
-    # Overall quality index
-    df_eng['overall_quality_index'] = (
-        df_eng['climate_suitability_robusta'] * 0.3 +
-        df_eng['soil_suitability_robusta'] * 0.3 +
-        df_eng['moisture_suitability'] * 0.2 +
-        (1 - df_eng['environmental_stress_index']) * 0.2
-    )
-    
-    # Production ready (Robusta bears fruit at 36 months)
-    df_eng['production_ready'] = (df_eng['plant_age_months'] >= 36).astype(int)
-    
-    return df_eng
+    """Create engineered features for Robusta grading (shared scoring engine)"""
+    return engineer_robusta_features(df)
 
 def plot_confusion_matrix(cm, labels, title):
     """Create confusion matrix plot using plotly"""
@@ -362,124 +248,6 @@ def plot_feature_importance(importance_df, top_n=15):
     
     return fig
 
-def calculate_yield_forecast(plant_age_months, farm_area_ha, climate_suitability, soil_suitability, 
-                            fertilization_type, fertilization_frequency, pest_management_frequency,
-                            bean_screen_size, overall_quality_index, forecast_years=5):
-    """
-    Calculate yield forecast for Robusta coffee per hectare over specified years
-    Returns yield per year and grade distribution probabilities
-    """
-    # Base yield parameters for Robusta (kg/ha/year)
-    base_yield_per_ha = 1200  # Average Robusta yield
-    max_yield_per_ha = 2500   # Maximum achievable yield
-    
-    # Age factor - Robusta production curve
-    if plant_age_months < 36:
-        age_factor = 0  # Not yet producing
-    elif plant_age_months < 48:
-        age_factor = 0.5  # Young production
-    elif plant_age_months < 72:
-        age_factor = 0.8  # Growing production
-    elif plant_age_months < 120:
-        age_factor = 1.0  # Prime production
-    elif plant_age_months < 180:
-        age_factor = 0.9  # Mature production
-    elif plant_age_months < 240:
-        age_factor = 0.7  # Declining production
-    else:
-        age_factor = 0.5  # Old trees
-    
-    # Fertilization factor
-    if fertilization_type == "Organic":
-        fert_base = 0.85
-    else:  # Non-organic
-        fert_base = 1.0
-    
-    # Frequency multiplier (1=Never to 5=Always)
-    fert_freq_multiplier = 0.7 + (fertilization_frequency * 0.075)  # 0.7 to 1.075
-    fertilization_factor = fert_base * fert_freq_multiplier
-    
-    # Pest management factor (1=Never to 5=Always)
-    pest_factor = 0.6 + (pest_management_frequency * 0.1)  # 0.6 to 1.0
-    
-    # Environmental factors
-    climate_factor = climate_suitability
-    soil_factor = soil_suitability
-    quality_factor = overall_quality_index
-    
-    # Calculate yearly yields
-    yearly_data = []
-    for year in range(1, forecast_years + 1):
-        # Age progression
-        future_age_months = plant_age_months + (year * 12)
-        
-        # Recalculate age factor for future years
-        if future_age_months < 36:
-            future_age_factor = 0
-        elif future_age_months < 48:
-            future_age_factor = 0.5
-        elif future_age_months < 72:
-            future_age_factor = 0.8
-        elif future_age_months < 120:
-            future_age_factor = 1.0
-        elif future_age_months < 180:
-            future_age_factor = 0.9
-        elif future_age_months < 240:
-            future_age_factor = 0.7
-        else:
-            future_age_factor = 0.5
-        
-        # Calculate yield for this year
-        year_yield = (base_yield_per_ha * 
-                     future_age_factor * 
-                     fertilization_factor * 
-                     pest_factor * 
-                     climate_factor * 
-                     soil_factor * 
-                     quality_factor)
-        
-        # Cap at maximum
-        year_yield = min(year_yield, max_yield_per_ha)
-        
-        # Calculate grade probabilities based on management and conditions
-        quality_score = (fertilization_factor * 0.3 + 
-                        pest_factor * 0.3 + 
-                        climate_factor * 0.2 + 
-                        soil_factor * 0.2)
-        
-        # Grade distribution probabilities
-        if quality_score >= 0.85:
-            fine_prob = 0.6
-            premium_prob = 0.35
-            commercial_prob = 0.05
-        elif quality_score >= 0.75:
-            fine_prob = 0.4
-            premium_prob = 0.45
-            commercial_prob = 0.15
-        elif quality_score >= 0.65:
-            fine_prob = 0.2
-            premium_prob = 0.5
-            commercial_prob = 0.3
-        else:
-            fine_prob = 0.1
-            premium_prob = 0.3
-            commercial_prob = 0.6
-        
-        yearly_data.append({
-            'Year': year,
-            'Age (months)': future_age_months,
-            'Yield (kg/ha)': round(year_yield, 2),
-            'Total Yield (kg)': round(year_yield * farm_area_ha, 2),
-            'Fine Probability': fine_prob,
-            'Premium Probability': premium_prob,
-            'Commercial Probability': commercial_prob,
-            'Fine Yield (kg/ha)': round(year_yield * fine_prob, 2),
-            'Premium Yield (kg/ha)': round(year_yield * premium_prob, 2),
-            'Commercial Yield (kg/ha)': round(year_yield * commercial_prob, 2)
-        })
-    
-    return pd.DataFrame(yearly_data)
-
 # =====================================
 # LOAD DATA
 # =====================================
@@ -1199,48 +967,18 @@ elif page == "🔮 Grade Prediction Tool":
         st.info("These are automatically calculated based on your inputs")
         
         # Calculate total defects percentage
-        # Assume 350g sample, average bean weight ~0.15g per bean
-        total_beans_sample = 350 / 0.15  # approximately 2333 beans
         total_defect_count = primary_defects + secondary_defects
-        total_defect_pct = (total_defect_count / total_beans_sample) * 100
+        total_defect_pct = calculate_defect_pct(primary_defects, secondary_defects)
         
         st.metric("Total Defect %", f"{total_defect_pct:.2f}%")
         
-        # Calculate derived indices with elevation
-        # Elevation suitability for Robusta (600-1200 masl optimal)
-        elevation_optimal_center = 900  # midpoint of 600-1200
-        elevation_optimal_range = 300  # half of the range
-        elevation_score = 1 - abs(elevation - elevation_optimal_center) / elevation_optimal_range
-        elevation_score = max(0, min(1, elevation_score))
-        
-        temp_score = 1 - abs(temp_avg - 19.5) / 13
-        temp_score = max(0, min(1, temp_score))
-        
-        rainfall_score = min(rainfall / 200, 1.5)
-        rainfall_score = max(0, min(1, rainfall_score))
-        
-        climate_suitability = (temp_score * 0.3 + rainfall_score * 0.3 + elevation_score * 0.4)
-        
-        soil_suitability = 1 - abs(soil_ph - 6.0) / 1.5
-        soil_suitability = max(0, min(1, soil_suitability))
-        
-        moisture_suitability = soil_moisture / 35
-        moisture_suitability = max(0, min(1, moisture_suitability))
-        
-        # Calculate environmental stress based on deviations from optimal
-        temp_stress = abs(temp_avg - 19.5) / 13
-        rainfall_stress = abs(rainfall - 200) / 200
-        ph_stress = abs(soil_ph - 6.0) / 1.5
-        elevation_stress = abs(elevation - 900) / 300
-        env_stress = (temp_stress + rainfall_stress + ph_stress + elevation_stress) / 4
-        env_stress = max(0, min(1, env_stress))
-        
-        overall_quality = (
-            climate_suitability * 0.3 +
-            soil_suitability * 0.3 +
-            moisture_suitability * 0.2 +
-            (1 - env_stress) * 0.2
-        )
+        # Calculate derived indices with elevation (shared scoring engine)
+        scores = calculate_suitability_scores(elevation, temp_avg, rainfall, soil_ph, soil_moisture)
+        elevation_score = scores['elevation_score']
+        climate_suitability = scores['climate_suitability']
+        soil_suitability = scores['soil_suitability']
+        env_stress = scores['environmental_stress_index']
+        overall_quality = scores['overall_quality_index']
         
         col_a, col_b = st.columns(2)
         with col_a:
@@ -1251,14 +989,14 @@ elif page == "🔮 Grade Prediction Tool":
             st.metric("Overall Quality Index", f"{overall_quality:.2f}")
             st.metric("Bean Size Class", classify_bean_size(bean_screen))
             st.metric("Elevation Category", 
-                     "Optimal" if 600 <= elevation <= 1200 else "Sub-optimal")
+                     "Optimal" if is_optimal_elevation(elevation) else "Sub-optimal")
     
     st.markdown("---")
     
     if st.button("🔮 Predict Coffee Grade", key='predict_grade', type='primary'):
         with st.spinner("Calculating predictions..."):
             # Determine grade based on CQI/UCDA standards
-            cupping_score = 75 + (overall_quality * 20)  # Scale quality to cupping score
+            cupping_score = estimate_cupping_score(overall_quality)
             
             predicted_grade = calculate_fine_premium_grade(primary_defects, secondary_defects, cupping_score)
             
@@ -1603,40 +1341,16 @@ elif page == "📅 Yield & Grade Forecasting":
         st.markdown("---")
         st.markdown("#### 📊 Calculated Suitability Indices")
         
-        # Calculate suitability scores with elevation
-        elevation_optimal_center = 900  # midpoint of 600-1200
-        elevation_optimal_range = 300  # half of the range
-        elevation_score_fc = 1 - abs(elevation_forecast - elevation_optimal_center) / elevation_optimal_range
-        elevation_score_fc = max(0, min(1, elevation_score_fc))
-        
-        temp_score_fc = 1 - abs(temp_avg_forecast - 19.5) / 13
-        temp_score_fc = max(0, min(1, temp_score_fc))
-        
-        rainfall_score_fc = min(rainfall_forecast / 200, 1.5)
-        rainfall_score_fc = max(0, min(1, rainfall_score_fc))
-        
-        climate_suitability_fc = (temp_score_fc * 0.3 + rainfall_score_fc * 0.3 + elevation_score_fc * 0.4)
-        
-        soil_suitability_fc = 1 - abs(soil_ph_forecast - 6.0) / 1.5
-        soil_suitability_fc = max(0, min(1, soil_suitability_fc))
-        
-        moisture_suitability_fc = soil_moisture_forecast / 35
-        moisture_suitability_fc = max(0, min(1, moisture_suitability_fc))
-        
-        # Calculate environmental stress
-        temp_stress_fc = abs(temp_avg_forecast - 19.5) / 13
-        rainfall_stress_fc = abs(rainfall_forecast - 200) / 200
-        ph_stress_fc = abs(soil_ph_forecast - 6.0) / 1.5
-        elevation_stress_fc = abs(elevation_forecast - 900) / 300
-        env_stress_fc = (temp_stress_fc + rainfall_stress_fc + ph_stress_fc + elevation_stress_fc) / 4
-        env_stress_fc = max(0, min(1, env_stress_fc))
-        
-        overall_quality_fc = (
-            climate_suitability_fc * 0.3 +
-            soil_suitability_fc * 0.3 +
-            moisture_suitability_fc * 0.2 +
-            (1 - env_stress_fc) * 0.2
+        # Calculate suitability scores with elevation (shared scoring engine)
+        scores_fc = calculate_suitability_scores(
+            elevation_forecast, temp_avg_forecast, rainfall_forecast,
+            soil_ph_forecast, soil_moisture_forecast
         )
+        elevation_score_fc = scores_fc['elevation_score']
+        climate_suitability_fc = scores_fc['climate_suitability']
+        soil_suitability_fc = scores_fc['soil_suitability']
+        env_stress_fc = scores_fc['environmental_stress_index']
+        overall_quality_fc = scores_fc['overall_quality_index']
         
         col_a, col_b = st.columns(2)
         with col_a:
@@ -1647,7 +1361,7 @@ elif page == "📅 Yield & Grade Forecasting":
             st.metric("Overall Quality", f"{overall_quality_fc:.2f}")
             st.metric("Env. Stress", f"{env_stress_fc:.2f}")
             st.metric("Elevation Category", 
-                     "Optimal" if 600 <= elevation_forecast <= 1200 else "Sub-optimal")
+                     "Optimal" if is_optimal_elevation(elevation_forecast) else "Sub-optimal")
     
     st.markdown("---")
     